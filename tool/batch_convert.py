@@ -0,0 +1,143 @@
+# file: batch_convert.py
+"""Convert many training notes files to plan JSON files in parallel.
+
+Usage:
+    python batch_convert.py notes/2024/ "exports/*.txt" -o ../assets/training_plans
+"""
+import argparse
+import glob
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional, Tuple
+
+import plan_json
+from parse_cache import ParseCache
+from training_plan_converter import ENGINES, ENGINE_SINGLE_PASS, TrainingPlanConverter, validate_json_structure
+
+DEFAULT_PATTERN = '*.txt'
+
+# One converter (and optional cache) per worker process, created by _init_worker
+_converter = None
+_cache = None
+
+
+def collect_inputs(inputs: List[str], pattern: str = DEFAULT_PATTERN) -> List[Tuple[str, str]]:
+    """Expand directories and globs into (input path, relative output name) pairs"""
+    jobs = []
+    seen = set()
+
+    for entry in inputs:
+        if os.path.isdir(entry):
+            matches = sorted(glob.glob(os.path.join(entry, '**', pattern), recursive=True))
+            pairs = [(path, os.path.relpath(path, entry)) for path in matches]
+        else:
+            matches = sorted(glob.glob(entry, recursive=True)) or [entry]
+            pairs = [(path, os.path.basename(path)) for path in matches]
+
+        for path, relative in pairs:
+            if not os.path.isfile(path):
+                raise FileNotFoundError(f"Input not found: {path}")
+            if path not in seen:
+                seen.add(path)
+                jobs.append((path, os.path.splitext(relative)[0] + '.json'))
+
+    return jobs
+
+
+def _init_worker(engine: str, cache_dir: Optional[str] = None):
+    global _converter, _cache
+    _converter = TrainingPlanConverter(engine=engine)
+    _cache = ParseCache(_converter, directory=cache_dir) if cache_dir else None
+
+
+def convert_file(job: Tuple[str, str]) -> Dict[str, Any]:
+    """Parse, validate and write one notes file; runs inside a worker process"""
+    source, destination = job
+    try:
+        with open(source, encoding='utf-8') as f:
+            text = f.read()
+        cached = False
+        if _cache is not None:
+            misses = _cache.misses
+            result, errors = _cache.get_or_parse(text)
+            cached = _cache.misses == misses
+        else:
+            result = _converter.parse_training_notes(text)
+            errors = validate_json_structure(result)
+
+        os.makedirs(os.path.dirname(destination) or '.', exist_ok=True)
+        with open(destination, 'w', encoding='utf-8') as f:
+            plan_json.dump(result, f)
+
+        return {'source': source, 'bytes': len(text.encode('utf-8')), 'errors': errors, 'cached': cached,
+                'failure': None}
+    except Exception as e:
+        return {'source': source, 'bytes': 0, 'errors': [], 'cached': False, 'failure': str(e)}
+
+
+def run_batch(jobs: List[Tuple[str, str]], output_dir: str, engine: str = ENGINE_SINGLE_PASS,
+              workers: Optional[int] = None, cache_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    tasks = [(source, os.path.join(output_dir, relative)) for source, relative in jobs]
+    destinations = [destination for _, destination in tasks]
+    if len(set(destinations)) != len(destinations):
+        raise ValueError("Several inputs map to the same output file; convert them into separate directories")
+
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, len(tasks) // (workers * 4))
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(engine, cache_dir)) as pool:
+        return list(pool.map(convert_file, tasks, chunksize=chunksize))
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert training notes files to training plan JSON")
+    parser.add_argument('inputs', nargs='+', help="Notes files, globs or directories")
+    parser.add_argument('-o', '--output-dir', default='.', help="Directory for the JSON files (default: current)")
+    parser.add_argument('-p', '--pattern', default=DEFAULT_PATTERN,
+                        help=f"File pattern used inside directories (default: {DEFAULT_PATTERN})")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE_SINGLE_PASS, help="Parsing engine")
+    parser.add_argument('--cache-dir', default=None,
+                        help="Reuse parsed plans of unchanged notes stored in this directory across runs")
+    args = parser.parse_args(argv)
+
+    try:
+        jobs = collect_inputs(args.inputs, args.pattern)
+    except FileNotFoundError as e:
+        print(e, file=sys.stderr)
+        return 2
+    if not jobs:
+        print("No input files found", file=sys.stderr)
+        return 2
+
+    start = time.perf_counter()
+    try:
+        results = run_batch(jobs, args.output_dir, engine=args.engine, workers=args.workers,
+                            cache_dir=args.cache_dir)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 2
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r['failure']]
+    invalid = [r for r in results if r['errors']]
+    for r in failed:
+        print(f"FAILED {r['source']}: {r['failure']}", file=sys.stderr)
+    for r in invalid:
+        print(f"INVALID {r['source']}: {len(r['errors'])} validation errors", file=sys.stderr)
+
+    total_mb = sum(r['bytes'] for r in results) / (1024 * 1024)
+    print(
+        f"Converted {len(results) - len(failed)}/{len(results)} files in {elapsed:.2f}s "
+        f"({len(results) / elapsed:.1f} files/s, {total_mb / elapsed:.2f} MB/s), "
+        f"{len(invalid)} with validation errors"
+    )
+    if args.cache_dir:
+        print(f"Parse cache: {sum(1 for r in results if r['cached'])} hits, "
+              f"{sum(1 for r in results if not r['cached'] and not r['failure'])} misses")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
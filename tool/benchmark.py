@@ -0,0 +1,167 @@
+# file: benchmark.py
+"""Benchmarks for the converter on synthetic notes of increasing size.
+
+Measures parse_training_notes (both engines), parse_interval_set,
+parse_time_to_seconds, validate_json_structure and the JSON round trip of
+plans (each plan_json backend, and a quick fix on the text against one on
+the parsed plan), and reports ops/s,
+latency percentiles and peak traced memory. Results can be saved as a
+baseline and later runs checked against it.
+
+Usage:
+    python benchmark.py                          # run and print
+    python benchmark.py --save baseline.json     # record a baseline
+    python benchmark.py --check baseline.json    # fail if ops/s dropped
+"""
+import argparse
+import json
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import plan_json
+from instrumentation import Instrumentation
+from notes_generator import generate_notes, generate_set_lines, generate_time_strings
+from training_plan_converter import ENGINES, TrainingPlanConverter, fix_recovery_types, validate_json_structure
+
+# (groups, blocks per group) for each size level
+SIZES = ((1, 3), (4, 3), (16, 4), (64, 4))
+DEFAULT_TOLERANCE = 0.2
+
+
+def _percentile(sorted_values: Sequence[float], fraction: float) -> float:
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(func: Callable[[], Any], min_time: float = 0.2, min_runs: int = 5) -> Dict[str, float]:
+    """Time repeated calls of func and trace the peak memory of one call"""
+    func()  # warm up caches and compiled patterns
+
+    timings: List[float] = []
+    clock = time.perf_counter
+    deadline = clock() + min_time
+    while len(timings) < min_runs or clock() < deadline:
+        start = clock()
+        func()
+        timings.append(clock() - start)
+
+    tracemalloc.start()
+    func()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    timings.sort()
+    return {
+        'runs': len(timings),
+        'ops_per_s': len(timings) / sum(timings),
+        'p50_ms': _percentile(timings, 0.50) * 1000,
+        'p95_ms': _percentile(timings, 0.95) * 1000,
+        'p99_ms': _percentile(timings, 0.99) * 1000,
+        'peak_kb': peak / 1024,
+    }
+
+
+def _quick_fix_text(text: str) -> str:
+    data = json.loads(text)
+    fix_recovery_types(data)
+    return json.dumps(data, indent=2, ensure_ascii=False)
+
+
+def _quick_fix_parsed(plan: Dict[str, Any]) -> str:
+    fix_recovery_types(plan)
+    return plan_json.dumps(plan)
+
+
+def build_cases(sizes: Sequence[Sequence[int]] = SIZES) -> Dict[str, Callable[[], Any]]:
+    cases: Dict[str, Callable[[], Any]] = {}
+    converters = {engine: TrainingPlanConverter(engine=engine) for engine in ENGINES}
+    # Same engines with instrumentation enabled, to keep its overhead visible
+    converters.update({f"{engine}+instrumented": TrainingPlanConverter(engine=engine, instrumentation=Instrumentation())
+                       for engine in ENGINES})
+    helper = converters[ENGINES[0]]
+
+    for groups, blocks in sizes:
+        notes = generate_notes(groups=groups, blocks=blocks, seed=groups * 100 + blocks)
+        label = f"{groups}g{blocks}b"
+        for engine, converter in converters.items():
+            cases[f"parse_training_notes[{engine}] {label}"] = (
+                lambda c=converter, n=notes: c.parse_training_notes(n))
+        plan = helper.single_pass_parser.parse(notes)
+        cases[f"validate_json_structure {label}"] = lambda p=plan: validate_json_structure(p)
+        text = plan_json.dumps(plan)
+        for backend in plan_json.BACKENDS:
+            cases[f"plan_json.dumps[{backend}] {label}"] = lambda p=plan, b=backend: plan_json.dumps(p, b)
+            cases[f"plan_json.loads[{backend}] {label}"] = lambda t=text, b=backend: plan_json.loads(t, b)
+        # The editor's quick fixes, before and after they kept the parsed plan
+        cases[f"quick_fix[text] {label}"] = lambda t=text: _quick_fix_text(t)
+        cases[f"quick_fix[parsed] {label}"] = lambda p=plan: _quick_fix_parsed(p)
+
+    set_lines = generate_set_lines(1000)
+    cases["parse_interval_set x1000"] = lambda: [helper.parse_interval_set(line) for line in set_lines]
+    time_strings = generate_time_strings(1000)
+    cases["parse_time_to_seconds x1000"] = lambda: [helper.parse_time_to_seconds(t) for t in time_strings]
+    return cases
+
+
+def run(cases: Dict[str, Callable[[], Any]], min_time: float) -> Dict[str, Dict[str, float]]:
+    results = {}
+    for name, func in cases.items():
+        results[name] = measure(func, min_time=min_time)
+        r = results[name]
+        print(f"{name:<42} {r['ops_per_s']:>10.1f} ops/s  p50 {r['p50_ms']:>8.3f}ms  "
+              f"p95 {r['p95_ms']:>8.3f}ms  p99 {r['p99_ms']:>8.3f}ms  peak {r['peak_kb']:>8.1f}KB")
+    return results
+
+
+def compare(results: Dict[str, Dict[str, float]], baseline: Dict[str, Dict[str, float]],
+            tolerance: float = DEFAULT_TOLERANCE) -> List[str]:
+    """Benchmarks whose ops/s fell more than tolerance below the baseline"""
+    regressions = []
+    for name, previous in baseline.items():
+        current = results.get(name)
+        if current is None:
+            continue
+        floor = previous['ops_per_s'] * (1 - tolerance)
+        if current['ops_per_s'] < floor:
+            regressions.append(
+                f"{name}: {current['ops_per_s']:.1f} ops/s vs baseline {previous['ops_per_s']:.1f} "
+                f"({current['ops_per_s'] / previous['ops_per_s'] - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the training notes converter")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds spent per benchmark (default: 0.2)")
+    parser.add_argument('--filter', default='', help="Only run benchmarks whose name contains this text")
+    parser.add_argument('--save', metavar='PATH', help="Write results as a baseline")
+    parser.add_argument('--check', metavar='PATH', help="Compare with a baseline, exit 1 on regressions")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f"Allowed ops/s drop for --check (default: {DEFAULT_TOLERANCE})")
+    args = parser.parse_args(argv)
+
+    cases = {name: func for name, func in build_cases().items() if args.filter in name}
+    results = run(cases, args.min_time)
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as f:
+            json.dump({'python': platform.python_version(), 'results': results}, f, indent=2)
+        print(f"Baseline written to {args.save}")
+
+    if args.check:
+        with open(args.check, encoding='utf-8') as f:
+            baseline = json.load(f)['results']
+        regressions = compare(results, baseline, args.tolerance)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            return 1
+        print(f"No regressions against {args.check}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
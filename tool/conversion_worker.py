@@ -0,0 +1,124 @@
+# file: conversion_worker.py
+"""Off-thread conversion of session notes for the Streamlit editor.
+
+The script thread submits the notes and returns at once; a single worker
+thread parses them through the ParseCache, publishing each group as soon as
+it is parsed, then validates the plan and renders the JSON to download.
+Submitting other notes cancels the running conversion at its next group
+boundary, so a stale parse never overwrites a newer one. One worker keeps
+parses in submission order, which the incremental parser relies on.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, List, Optional
+
+import plan_json
+from parse_cache import ParseCache
+
+# Conversion states
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+CANCELLED = 'cancelled'
+
+
+class ConversionCancelled(Exception):
+    """Raised inside the worker to abandon a conversion whose notes changed"""
+
+
+class Conversion:
+    """One conversion of one version of the notes, filled in by the worker.
+
+    ``groups`` grows while the notes are parsed; ``plan``, ``errors`` and
+    ``json_output`` are set once validation finishes and the state is DONE.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        self.state = RUNNING
+        self.groups: List[Dict[str, Any]] = []
+        self.plan: Optional[Dict[str, Any]] = None
+        self.errors: List[str] = []
+        self.json_output = ""
+        self.error: Optional[BaseException] = None
+        self.future: Optional[Future] = None
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def finished(self) -> bool:
+        return self.state != RUNNING
+
+    @property
+    def cancel_requested(self) -> bool:
+        return self._cancelled.is_set()
+
+    def cancel(self):
+        """Stop at the next group boundary; a finished conversion is left as is"""
+        self._cancelled.set()
+        if self.future is not None and self.future.cancel():
+            self.state = CANCELLED
+
+    def groups_so_far(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return list(self.groups)
+
+    def _add_group(self, index: int, group: Dict[str, Any]):
+        if self._cancelled.is_set():
+            raise ConversionCancelled()
+        with self._lock:
+            self.groups.append(group)
+
+    def _run(self, parse_cache: ParseCache):
+        try:
+            plan, errors = parse_cache.get_or_parse(self.text, on_group=self._add_group)
+            json_output = plan_json.dumps(plan)
+        except ConversionCancelled:
+            self.state = CANCELLED
+            return
+        except Exception as e:
+            self.error = e
+            self.state = FAILED
+            return
+        self.plan = plan
+        self.errors = errors
+        self.json_output = json_output
+        self.state = DONE
+
+
+class ConversionWorker:
+    """Runs conversions on one background thread, newest notes first"""
+
+    def __init__(self, parse_cache: ParseCache):
+        self.parse_cache = parse_cache
+        self.current: Optional[Conversion] = None
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='notes-conversion')
+
+    def submit(self, text: str) -> Conversion:
+        """Start converting the notes, cancelling a conversion of other notes.
+
+        Submitting the notes that are still being converted returns that conversion.
+        """
+        current = self.current
+        if current is not None:
+            if current.text == text and current.state == RUNNING:
+                return current
+            current.cancel()
+
+        conversion = Conversion(text)
+        conversion.future = self._executor.submit(conversion._run, self.parse_cache)
+        self.current = conversion
+        return conversion
+
+    def cancel_stale(self, text: str) -> bool:
+        """Cancel the running conversion if its notes are not ``text`` any more"""
+        current = self.current
+        if current is None or current.finished or current.text == text:
+            return False
+        current.cancel()
+        return True
+
+    def shutdown(self):
+        if self.current is not None:
+            self.current.cancel()
+        self._executor.shutdown(wait=False)
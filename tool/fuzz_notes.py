@@ -0,0 +1,452 @@
+# file: fuzz_notes.py
+"""Property-based fuzzing of the notes parser across a process pool.
+
+Two kinds of cases are generated from a seed, so any run can be replayed:
+
+- structured cases render a random session model (groups, blocks, interval
+  lines in varied spellings) whose expected sets are known: every group and
+  block must come out, single-percentage lines must keep their repetitions
+  and "3 x 400 90%-95%-100%" lines must expand to one set per percentage;
+- raw cases mutate real notes (the bundled sample, generated notes and any
+  files given) by deleting, duplicating, splicing and inserting tokens,
+  including long runs of digits, spaces and dashes.
+
+Every case must parse without raising, produce a plan that validates (out
+of range values copied from the notes, like "0%", are the notes' mistakes
+and left to the editor to report) and stay within a time budget linear in
+the input size; parses running past a hard deadline are interrupted and
+reported as catastrophic backtracking.
+Failures are deduplicated by signature, minimized (raw text by delta
+debugging, structured cases by dropping model lines) and can be written to a
+regression corpus, which later runs replay first.
+
+Usage:
+    python fuzz_notes.py --cases 20000 --corpus fuzz_corpus
+    python fuzz_notes.py notes/*.txt --engine legacy --corpus fuzz_corpus
+"""
+import argparse
+import glob
+import hashlib
+import json
+import os
+import random
+import signal
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+from notes_generator import DISTANCES, PERCENTAGES, RECOVERY_PHRASES, RECOVERY_TIMES, generate_notes
+from plan_schema import OUT_OF_RANGE, validate_plan
+from training_plan_converter import ENGINES, ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter
+
+# Failure kinds
+CRASH = 'crash'
+INVALID = 'invalid'
+REPS = 'reps'
+EXPANSION = 'expansion'
+STRUCTURE = 'structure'
+SLOW = 'slow'
+TIMEOUT = 'timeout'
+
+DEFAULT_BUDGET_MS = 50.0
+DEFAULT_BUDGET_MS_PER_KB = 5.0
+# Hard deadline, as a multiple of the budget
+TIMEOUT_FACTOR = 20
+MAX_MINIMIZE_CHECKS = 3000
+
+# Tokens spliced into raw cases: grammar fragments, odd time spellings and
+# characters the patterns treat specially
+TOKENS = (
+    "Bloc GROUPE 1 :", "Bloc GROUPE", "Bloc ", "Bloc 2\n", "Échauffement", "Retour au calme",
+    "Remarques supplémentaires :", "- ", "-", " x ", "x", "%", "-%", "95%-", "'", "’", "''", "'min",
+    "actif", "pause sèche", "marche", "trott", "min", "1'30", "’45", "3'", "\n", "\r\n", "\t", " ",
+    "0", "00", "99999999999999999999", "é", " ", "1e400", ".5", ",",
+)
+RUN_CHARS = ('1', ' ', '-', "'", '%', 'x', '\n')
+
+# A structured interval line: (repetitions, distance, percentages, spelling)
+Line = Tuple[int, int, Tuple[int, ...], int]
+# Groups -> blocks -> lines
+Model = List[List[List[Line]]]
+
+
+class Failure(NamedTuple):
+    kind: str
+    detail: str
+    text: str
+    model: Optional[Model] = None
+
+    @property
+    def signature(self) -> str:
+        return f"{self.kind}: {self.detail}"
+
+
+class _Deadline(Exception):
+    pass
+
+
+def _on_alarm(signum, frame):
+    raise _Deadline()
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Interrupt the block after ``seconds`` where SIGALRM exists.
+
+    The regex engine checks for signals while matching, so this also stops a
+    pattern stuck backtracking.
+    """
+    if not hasattr(signal, 'setitimer'):
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+# --- Structured cases -------------------------------------------------------
+
+SEPARATORS = ('x', 'x ', ' x ', ' x', '  x\t', 'X')
+INDENTS = ('-', '- ', '-       ', '-\t', '  - ')
+
+
+def random_model(rng: random.Random) -> Model:
+    model = []
+    for _ in range(rng.randint(1, 4)):
+        group = []
+        for _ in range(rng.randint(1, 4)):
+            block = []
+            for _ in range(rng.randint(0, 3)):
+                repetitions = rng.randint(1, 12)
+                if 2 <= repetitions <= 5 and rng.random() < 0.4:
+                    # One percentage per repetition, as coaches write progressions
+                    percentages = tuple(rng.choice(PERCENTAGES) for _ in range(repetitions))
+                else:
+                    percentages = (rng.choice(PERCENTAGES),)
+                block.append((repetitions, rng.choice(DISTANCES), percentages, rng.randrange(1 << 16)))
+            group.append(block)
+        model.append(group)
+    return model
+
+
+def render_line(line: Line) -> str:
+    repetitions, distance, percentages, spelling = line
+    rng = random.Random(spelling)
+    if len(percentages) > 1 and rng.random() < 0.3:
+        # "85-90-95%": only the last percentage carries the sign
+        run = '-'.join(str(p) for p in percentages) + '%'
+    else:
+        run = '-'.join(f"{p}%" for p in percentages)
+    recovery = rng.choice(RECOVERY_PHRASES).format(time=rng.choice(RECOVERY_TIMES))
+    return (f"{rng.choice(INDENTS)}{repetitions}{rng.choice(SEPARATORS).replace('X', 'x')}{distance} {run}"
+            f"{rng.choice(('', ' ', '  '))}\n\n{recovery} ")
+
+
+def render_model(model: Model) -> str:
+    lines = ["Avant  séance (20min)", "", "Échauffement 15' boucle habituelle + 3 gammes", ""]
+    for g, group in enumerate(model, start=1):
+        lines += [f"Bloc GROUPE {g}  :", ""]
+        for b, block in enumerate(group, start=1):
+            lines += [f"Bloc {b} ", ""]
+            for line in block:
+                lines += [render_line(line), ""]
+    lines += ["Retour au calme en footing 5'", "", "Remarques supplémentaires : ", "", "Bien."]
+    return '\n'.join(lines)
+
+
+def expected_sets(line: Line) -> List[Tuple[int, int, float]]:
+    repetitions, distance, percentages, _ = line
+    if len(percentages) > 1:
+        return [(1, distance, float(p)) for p in percentages]
+    return [(repetitions, distance, float(percentages[0]))]
+
+
+def check_model(plan: Dict[str, Any], model: Model) -> Optional[Tuple[str, str]]:
+    groups = plan.get('groups', [])
+    if [g.get('title') for g in groups] != [f"Groupe {g}" for g in range(1, len(model) + 1)]:
+        return STRUCTURE, "group titles differ"
+    for group, expected_group in zip(groups, model):
+        blocks = group.get('blocks', [])
+        if len(blocks) != len(expected_group):
+            return STRUCTURE, "block count differs"
+        for block, lines in zip(blocks, expected_group):
+            actual = [(s.get('repetitions'), s.get('distanceMeters'), s.get('vmaPercent')) for s in block['sets']]
+            expected = [s for line in lines for s in expected_sets(line)]
+            if sum(s[0] or 0 for s in actual) != sum(line[0] for line in lines):
+                return REPS, "repetitions not preserved"
+            if actual != expected:
+                return EXPANSION, "sets differ from the interval lines"
+    return None
+
+
+# --- Raw cases --------------------------------------------------------------
+
+def mutate(text: str, rng: random.Random, donors: Sequence[str]) -> str:
+    for _ in range(rng.randint(1, 5)):
+        choice = rng.random()
+        position = rng.randint(0, len(text))
+        if choice < 0.25:
+            text = text[:position] + rng.choice(TOKENS) + text[position:]
+        elif choice < 0.4:
+            text = text[:position] + text[position + rng.randint(1, 40):]
+        elif choice < 0.55:
+            lines = text.split('\n')
+            i = rng.randrange(len(lines))
+            lines.insert(rng.randrange(len(lines) + 1), lines[i])
+            text = '\n'.join(lines)
+        elif choice < 0.7:
+            donor_lines = rng.choice(donors).split('\n')
+            text = text[:position] + rng.choice(donor_lines) + text[position:]
+        elif choice < 0.85:
+            # Long runs are where backtracking patterns go quadratic or worse
+            run = rng.choice(RUN_CHARS) * rng.choice((8, 64, 512, 2048))
+            text = text[:position] + run + text[position:]
+        else:
+            digits = str(rng.choice((0, 1, 7, 60, 999, 10 ** rng.randint(3, 30))))
+            text = text[:position] + digits + text[position:]
+    return text
+
+
+# --- Checking ---------------------------------------------------------------
+
+class Checker:
+    """Runs one engine on a case and reports the first broken property"""
+
+    def __init__(self, engine: str, budget_ms: float = DEFAULT_BUDGET_MS,
+                 budget_ms_per_kb: float = DEFAULT_BUDGET_MS_PER_KB):
+        self.engine = engine
+        self.converter = TrainingPlanConverter(engine=engine)
+        self.budget_ms = budget_ms
+        self.budget_ms_per_kb = budget_ms_per_kb
+
+    def budget(self, text: str) -> float:
+        return (self.budget_ms + self.budget_ms_per_kb * len(text) / 1024) / 1000
+
+    def _parse(self, text: str, limit: float) -> Tuple[Dict[str, Any], float]:
+        start = time.perf_counter()
+        with deadline(limit):
+            plan = self.converter.parse_training_notes(text)
+        return plan, time.perf_counter() - start
+
+    def check(self, text: str, model: Optional[Model] = None) -> Optional[Failure]:
+        budget = self.budget(text)
+        try:
+            plan, elapsed = self._parse(text, budget * TIMEOUT_FACTOR)
+            if elapsed > budget:
+                # Confirm on a second run, so a pause of the machine is not reported
+                _, elapsed = self._parse(text, budget * TIMEOUT_FACTOR)
+                if elapsed > budget:
+                    return Failure(SLOW, "parse over its time budget", text, model)
+            issues = [issue for issue in validate_plan(plan) if issue.code != OUT_OF_RANGE]
+        except _Deadline:
+            return Failure(TIMEOUT, "parse interrupted at its deadline", text, model)
+        except Exception as e:
+            frame = traceback.extract_tb(e.__traceback__)[-1]
+            return Failure(CRASH, f"{type(e).__name__} in {frame.name}", text, model)
+
+        if issues:
+            # Code and message without the path, so one bug gives one signature
+            return Failure(INVALID, f"[{issues[0].code}] {issues[0].message}", text, model)
+        if model is not None:
+            broken = check_model(plan, model)
+            if broken:
+                return Failure(broken[0], broken[1], text, model)
+        return None
+
+    def same_failure(self, failure: Failure, text: str, model: Optional[Model] = None) -> bool:
+        found = self.check(text, model)
+        if found is None:
+            return False
+        # Slow and timed out inputs are the same finding at different sizes
+        if failure.kind in (SLOW, TIMEOUT):
+            return found.kind in (SLOW, TIMEOUT)
+        return found.signature == failure.signature
+
+
+def _ddmin(items: List[Any], fails, budget: List[int]) -> List[Any]:
+    """Delta debugging: a 1-minimal sublist of items for which fails() holds"""
+    granularity = 2
+    while len(items) >= 2 and budget[0] > 0:
+        size = max(1, len(items) // granularity)
+        reduced = False
+        for start in range(0, len(items), size):
+            candidate = items[:start] + items[start + size:]
+            budget[0] -= 1
+            if candidate and fails(candidate):
+                items = candidate
+                granularity = max(granularity - 1, 2)
+                reduced = True
+                break
+            if budget[0] <= 0:
+                break
+        if not reduced:
+            if size == 1:
+                break
+            granularity = min(len(items), granularity * 2)
+    return items
+
+
+def minimize(checker: Checker, failure: Failure) -> Failure:
+    budget = [MAX_MINIMIZE_CHECKS]
+    if failure.model is not None:
+        # Drop interval lines while it still fails; headers stay so group and block numbers hold
+        flat = [(g, b, i) for g, group in enumerate(failure.model) for b, block in enumerate(group)
+                for i in range(len(block))]
+
+        def build(keep) -> Model:
+            kept = set(keep)
+            model = [[[line for i, line in enumerate(block) if (g, b, i) in kept] for b, block in enumerate(group)]
+                     for g, group in enumerate(failure.model)]
+            return model
+
+        def fails(keep) -> bool:
+            model = build(keep)
+            return checker.same_failure(failure, render_model(model), model)
+
+        model = build(_ddmin(flat, fails, budget) if flat else [])
+        return Failure(failure.kind, failure.detail, render_model(model), model)
+
+    lines = _ddmin(failure.text.split('\n'),
+                   lambda candidate: checker.same_failure(failure, '\n'.join(candidate)), budget)
+    chars = _ddmin(list('\n'.join(lines)),
+                   lambda candidate: checker.same_failure(failure, ''.join(candidate)), budget)
+    return Failure(failure.kind, failure.detail, ''.join(chars))
+
+
+# --- Workers ----------------------------------------------------------------
+
+_checker: Optional[Checker] = None
+_donors: List[str] = []
+
+
+def _init_worker(engine: str, budget_ms: float, budget_ms_per_kb: float, donors: List[str]):
+    global _checker, _donors
+    _checker = Checker(engine, budget_ms, budget_ms_per_kb)
+    _donors = donors
+
+
+def make_case(seed: int, index: int, donors: Sequence[str]) -> Tuple[str, Optional[Model]]:
+    rng = random.Random(f"{seed}:{index}")
+    if rng.random() < 0.5:
+        model = random_model(rng)
+        return render_model(model), model
+    if rng.random() < 0.5:
+        base = rng.choice(donors)
+    else:
+        base = generate_notes(rng.randint(1, 4), rng.randint(1, 4), rng.randint(1, 2), seed=rng.randrange(1 << 30))
+    return mutate(base, rng, donors), None
+
+
+def run_cases(seed: int, start: int, count: int) -> Tuple[int, List[Failure]]:
+    """Check cases start..start+count of a seed; returns (structured cases, failures)"""
+    failures: Dict[str, Failure] = {}
+    structured = 0
+    for index in range(start, start + count):
+        text, model = make_case(seed, index, _donors)
+        structured += model is not None
+        failure = _checker.check(text, model)
+        if failure is not None and failure.signature not in failures:
+            failures[failure.signature] = failure
+    return structured, list(failures.values())
+
+
+def minimize_failure(failure: Failure) -> Failure:
+    return minimize(_checker, failure)
+
+
+def check_corpus_entry(entry: Dict[str, Any]) -> Optional[Failure]:
+    return _checker.check(entry['text'], entry.get('model'))
+
+
+# --- Corpus -----------------------------------------------------------------
+
+def load_corpus(directory: str) -> List[Tuple[str, Dict[str, Any]]]:
+    entries = []
+    for path in sorted(glob.glob(os.path.join(directory, '*.json'))):
+        with open(path, encoding='utf-8') as f:
+            entries.append((path, json.load(f)))
+    return entries
+
+
+def save_failure(directory: str, engine: str, failure: Failure) -> str:
+    os.makedirs(directory, exist_ok=True)
+    digest = hashlib.sha256(f"{engine}\0{failure.text}".encode('utf-8')).hexdigest()[:12]
+    path = os.path.join(directory, f"{engine}-{failure.kind}-{digest}.json")
+    entry = {'engine': engine, 'kind': failure.kind, 'detail': failure.detail, 'text': failure.text}
+    if failure.model is not None:
+        entry['model'] = failure.model
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(entry, f, indent=2, ensure_ascii=False)
+    return path
+
+
+def read_donors(inputs: Sequence[str]) -> List[str]:
+    donors = [SAMPLE_NOTES]
+    for entry in inputs:
+        paths = sorted(glob.glob(os.path.join(entry, '**', '*.txt'), recursive=True)) if os.path.isdir(entry) \
+            else sorted(glob.glob(entry)) or [entry]
+        for path in paths:
+            with open(path, encoding='utf-8') as f:
+                donors.append(f.read())
+    return donors
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Fuzz the notes parser and minimize failing inputs")
+    parser.add_argument('inputs', nargs='*', help="Real notes files, directories or globs to mutate")
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE_SINGLE_PASS)
+    parser.add_argument('--cases', type=int, default=5000)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=100, help="Cases per worker task")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help="Time budget of a parse, plus --budget-ms-per-kb of input")
+    parser.add_argument('--budget-ms-per-kb', type=float, default=DEFAULT_BUDGET_MS_PER_KB)
+    parser.add_argument('--corpus', help="Directory of minimized failures: replayed first, new ones added")
+    args = parser.parse_args(argv)
+
+    donors = read_donors(args.inputs)
+    corpus = load_corpus(args.corpus) if args.corpus else []
+    corpus = [(path, entry) for path, entry in corpus if entry.get('engine', args.engine) == args.engine]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker,
+                             initargs=(args.engine, args.budget_ms, args.budget_ms_per_kb, donors)) as pool:
+        still_failing = 0
+        for (path, _), failure in zip(corpus, pool.map(check_corpus_entry, [entry for _, entry in corpus])):
+            if failure is not None:
+                still_failing += 1
+                print(f"corpus {os.path.basename(path)}: still fails ({failure.signature})")
+        if corpus:
+            print(f"corpus: {len(corpus) - still_failing}/{len(corpus)} entries pass")
+
+        chunks = [(args.seed, first, min(args.chunk, args.cases - first))
+                  for first in range(0, args.cases, args.chunk)]
+        failures: Dict[str, Failure] = {}
+        structured = 0
+        for chunk_structured, chunk_failures in pool.map(run_cases, *zip(*chunks)) if chunks else ():
+            structured += chunk_structured
+            for failure in chunk_failures:
+                failures.setdefault(failure.signature, failure)
+        elapsed = time.perf_counter() - start
+        print(f"{args.cases} cases ({structured} structured) on {args.engine} in {elapsed:.1f}s "
+              f"({args.cases / elapsed:,.0f} cases/s), {len(failures)} distinct failures")
+
+        for failure in pool.map(minimize_failure, list(failures.values())):
+            shown = failure.text if len(failure.text) <= 200 else failure.text[:200] + '...'
+            print(f"- {failure.signature}\n  {shown!r}")
+            if args.corpus:
+                print(f"  saved to {save_failure(args.corpus, args.engine, failure)}")
+
+    return 1 if failures or still_failing else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
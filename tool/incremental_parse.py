@@ -0,0 +1,202 @@
+# file: incremental_parse.py
+"""Incremental parsing, validation and preview for the Streamlit editor.
+
+Each new version of the notes is split into "Bloc GROUPE" / "Bloc N" sections
+and compared with the sections of the previous version: only sections whose
+text changed are parsed again, the others reuse their previous result. The
+JSON side works the same way per group: validation issues and preview markdown
+are recomputed only for groups whose content changed.
+"""
+import time
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import plan_json
+from instrumentation import BLOCK_SPLIT, GROUP_SPLIT
+from notes_engine import DEFAULT_COOLDOWN, DEFAULT_REMARKS, DEFAULT_WARMUP
+from plan_schema import GROUP_SCHEMA, PLAN_SCHEMA, PlanValidator, validate_plan
+from training_plan_converter import ENGINE_SINGLE_PASS, GroupCallback, TrainingPlanConverter
+
+
+def _copy_block(block: Dict[str, Any]) -> Dict[str, Any]:
+    copied = dict(block)
+    copied['sets'] = [dict(set_data) for set_data in block['sets']]
+    return copied
+
+
+class IncrementalNotesParser:
+    """Re-parse only the blocks whose text changed since the previous call.
+
+    Produces the same plan as ``parse_training_notes``. Blocks are cached by
+    their title and text for one version, so the cache never grows beyond the
+    current document. Exposes ``parse_training_notes`` so it can stand in for
+    a converter, e.g. behind a ParseCache. ``on_group`` sees each group as
+    soon as its blocks are parsed; if it raises, the previous version stays
+    the reference for the next call.
+    """
+
+    def __init__(self, converter: Optional[TrainingPlanConverter] = None):
+        self.converter = converter or TrainingPlanConverter(engine=ENGINE_SINGLE_PASS)
+        self.grammar = self.converter.grammar
+        self.block_parser = self.converter.single_pass_parser
+        self._blocks: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._groups: List[Tuple[str, str]] = []
+        self.reparsed_blocks = 0
+        self.reused_blocks = 0
+        self.changed_groups: Set[int] = set()
+
+    @property
+    def instrumentation(self):
+        return self.converter.instrumentation
+
+    def parse_training_notes(self, text: str, on_group: Optional[GroupCallback] = None) -> Dict[str, Any]:
+        grammar = self.grammar
+        instrumentation = self.converter.instrumentation
+        instrumented = instrumentation.enabled
+        warmup_match = grammar.warmup.search(text)
+        cooldown_match = grammar.cooldown.search(text)
+        remarks_match = grammar.remarks.search(text)
+
+        previous_blocks = self._blocks
+        previous_groups = self._groups
+        blocks_cache: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        group_sections: List[Tuple[str, str]] = []
+        self.reparsed_blocks = 0
+        self.reused_blocks = 0
+        self.changed_groups = set()
+
+        groups = []
+        if instrumented:
+            start = time.perf_counter()
+        parts = grammar.group_split.split(text)
+        if instrumented:
+            instrumentation.add_time(GROUP_SPLIT, time.perf_counter() - start)
+            instrumentation.count('regex_calls', 4)
+        for i in range(1, len(parts), 2):
+            group_number, group_content = parts[i], parts[i + 1]
+            index = len(group_sections)
+            group_sections.append((group_number, group_content))
+            if index >= len(previous_groups) or previous_groups[index] != (group_number, group_content):
+                self.changed_groups.add(index)
+
+            blocks = []
+            if instrumented:
+                start = time.perf_counter()
+            block_parts = grammar.block_split.split(group_content)
+            if instrumented:
+                instrumentation.add_time(BLOCK_SPLIT, time.perf_counter() - start)
+                instrumentation.count('regex_calls')
+            for j in range(1, len(block_parts), 2):
+                key = (f"Bloc {block_parts[j]}", block_parts[j + 1])
+                block = blocks_cache.get(key) or previous_blocks.get(key)
+                if block is None:
+                    block = self.block_parser.parse_block(*key)
+                    self.reparsed_blocks += 1
+                else:
+                    self.reused_blocks += 1
+                blocks_cache[key] = block
+                blocks.append(_copy_block(block))
+
+            groups.append({
+                'title': f'Groupe {group_number}',
+                'blocks': blocks
+            })
+            if on_group is not None:
+                on_group(index, groups[-1])
+
+        self._blocks = blocks_cache
+        self._groups = group_sections
+        if instrumented:
+            instrumentation.count('reparsed_blocks', self.reparsed_blocks)
+            instrumentation.count('reused_blocks', self.reused_blocks)
+
+        return {
+            'title': 'Mercredi (séance piste)',
+            'warmup': warmup_match.group(1).strip() if warmup_match else DEFAULT_WARMUP,
+            'cooldown': cooldown_match.group(1).strip() if cooldown_match else DEFAULT_COOLDOWN,
+            'remarks': remarks_match.group(1).strip() if remarks_match else DEFAULT_REMARKS,
+            'groups': groups
+        }
+
+
+def render_group_markdown(group: Any) -> str:
+    """Preview of one group, as shown in the editor's preview column"""
+    lines = [f"### 🏁 {group.get('title', 'Untitled Group')}", ""]
+
+    for block in group.get('blocks', []):
+        lines.append(f"**{block.get('title', 'Untitled Block')}**")
+        lines.append("")
+
+        for set_data in block.get('sets', []):
+            distance = set_data.get('distanceMeters')
+            duration = set_data.get('durationSeconds')
+            if distance:
+                activity = f"{distance}m"
+            elif duration:
+                activity = f"{duration}s"
+            else:
+                activity = "N/A"
+
+            lines.append(
+                f"- {set_data.get('repetitions', '?')}x {activity} "
+                f"at {set_data.get('vmaPercent', '?')}% VMA, "
+                f"{set_data.get('recoverySeconds', '?')}s {set_data.get('recoveryType', '?')} recovery"
+            )
+        lines.append("")
+
+        if block.get('afterRecoverySeconds'):
+            lines.append(
+                f"*Then {block['afterRecoverySeconds']}s "
+                f"{block.get('afterRecoveryType', 'rest')} recovery*"
+            )
+            lines.append("")
+
+    return '\n'.join(lines)
+
+
+class IncrementalPlanView:
+    """Validation issues and preview markdown of a plan, cached per group.
+
+    Groups are keyed by their compact JSON, which is far cheaper to produce
+    than validating or rendering them, so unchanged groups cost one dump.
+    Issues come out in the same order as ``validate_json_structure``.
+    """
+
+    def __init__(self):
+        top_level = dict(PLAN_SCHEMA)
+        top_level['properties'] = dict(PLAN_SCHEMA['properties'], groups={'type': 'array'})
+        self.top_validator = PlanValidator(top_level)
+        self.group_validator = PlanValidator(GROUP_SCHEMA)
+        self._groups: Dict[Tuple[int, bytes], Tuple[List[str], str]] = {}
+        self.recomputed_groups = 0
+
+    def update(self, plan: Any) -> Tuple[List[str], List[str]]:
+        """Return (validation errors, preview markdown per group) for a parsed plan"""
+        groups = plan.get('groups') if isinstance(plan, dict) else None
+        if not isinstance(groups, list):
+            # Nothing to split into groups; validate the whole value at once
+            self._groups = {}
+            return [str(issue) for issue in validate_plan(plan)], []
+
+        errors = [str(issue) for issue in self.top_validator.validate(plan)]
+        previous = self._groups
+        current: Dict[Tuple[int, bytes], Tuple[List[str], str]] = {}
+        previews = []
+        self.recomputed_groups = 0
+
+        for index, group in enumerate(groups):
+            key = (index, plan_json.dumps_compact(group))
+            cached = previous.get(key)
+            if cached is None:
+                issues = [str(issue) for issue in self.group_validator.validate(group, path=('groups', index))]
+                try:
+                    markdown = render_group_markdown(group)
+                except Exception as e:
+                    markdown = f"Error generating preview: {str(e)}"
+                cached = (issues, markdown)
+                self.recomputed_groups += 1
+            current[key] = cached
+            errors.extend(cached[0])
+            previews.append(cached[1])
+
+        self._groups = current
+        return errors, previews
@@ -0,0 +1,145 @@
+# file: instrumentation.py
+"""Optional timing and regex counters for the converter's parse stages.
+
+The converter always holds an instrumentation object. By default it is
+NULL_INSTRUMENTATION, whose ``enabled`` flag is False, and hot paths only
+check that flag before doing any timing or counting. An enabled
+Instrumentation accumulates stage timings and counters until ``emit()`` hands
+a report to its sinks: any callable, a LoggingSink, or the Streamlit panel.
+"""
+import time
+from collections import defaultdict
+from typing import TYPE_CHECKING, Any, Callable, Dict, Optional
+
+if TYPE_CHECKING:
+    import logging
+
+# Stage names
+GROUP_SPLIT = 'group_split'
+BLOCK_SPLIT = 'block_split'
+INTERVAL_EXTRACTION = 'interval_extraction'
+RECOVERY_MATCHING = 'recovery_matching'
+SCAN = 'scan'
+VALIDATION = 'validation'
+
+Report = Dict[str, Dict[str, float]]
+Sink = Callable[[Report], Any]
+
+
+class _NullStage:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_STAGE = _NullStage()
+
+
+class NullInstrumentation:
+    """Instrumentation that records nothing"""
+
+    enabled = False
+
+    def add_time(self, stage: str, seconds: float):
+        pass
+
+    def count(self, name: str, amount: int = 1):
+        pass
+
+    def stage(self, name: str):
+        return _NULL_STAGE
+
+    def emit(self) -> Report:
+        return {}
+
+
+NULL_INSTRUMENTATION = NullInstrumentation()
+
+
+class _Stage:
+    __slots__ = ('instrumentation', 'name', 'start')
+
+    def __init__(self, instrumentation: 'Instrumentation', name: str):
+        self.instrumentation = instrumentation
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.instrumentation.add_time(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class Instrumentation(NullInstrumentation):
+    """Accumulates stage timings and counters, emitted to sinks on demand"""
+
+    enabled = True
+
+    def __init__(self, *sinks: Sink):
+        self.sinks = list(sinks)
+        self.reset()
+
+    def reset(self):
+        self.timings: Dict[str, float] = defaultdict(float)
+        self.calls: Dict[str, int] = defaultdict(int)
+        self.counts: Dict[str, int] = defaultdict(int)
+
+    def add_time(self, stage: str, seconds: float):
+        self.timings[stage] += seconds
+        self.calls[stage] += 1
+
+    def count(self, name: str, amount: int = 1):
+        self.counts[name] += amount
+
+    def stage(self, name: str) -> _Stage:
+        """Context manager timing a coarse stage"""
+        return _Stage(self, name)
+
+    def snapshot(self) -> Report:
+        return {
+            'timings_ms': {stage: seconds * 1000 for stage, seconds in self.timings.items()},
+            'calls': dict(self.calls),
+            'counts': dict(self.counts),
+        }
+
+    def emit(self) -> Report:
+        """Send what was recorded since the last emit to every sink, then reset"""
+        report = self.snapshot()
+        for sink in self.sinks:
+            sink(report)
+        self.reset()
+        return report
+
+
+class LoggingSink:
+    """Writes each report as one structured log record"""
+
+    def __init__(self, logger: Optional['logging.Logger'] = None, level: Optional[int] = None):
+        # logging is only loaded by processes that log metrics
+        import logging
+        self.logger = logger or logging.getLogger('training_plan_converter')
+        self.level = logging.INFO if level is None else level
+
+    def __call__(self, report: Report):
+        import json
+        self.logger.log(self.level, "converter metrics %s", json.dumps(report, sort_keys=True),
+                        extra={'metrics': report})
+
+
+def render_streamlit_panel(st, report: Report):
+    """Show a report as Streamlit metrics: one per stage, then the counters"""
+    timings = report.get('timings_ms', {})
+    if not timings and not report.get('counts'):
+        st.caption("No metrics recorded yet")
+        return
+
+    columns = st.columns(max(1, len(timings)))
+    for column, (stage, milliseconds) in zip(columns, sorted(timings.items())):
+        column.metric(stage.replace('_', ' '), f"{milliseconds:.2f} ms",
+                      help=f"{report['calls'].get(stage, 0)} calls")
+    if report.get('counts'):
+        st.table({'counter': list(report['counts']), 'value': list(report['counts'].values())})
@@ -0,0 +1,425 @@
+# file: intervals_upload.py
+"""Upload a converted plan to Intervals.icu for a whole roster of athletes.
+
+Every athlete gets the plan's groups as WORKOUT events whose steps carry
+concrete pace targets computed from the athlete's VMA, in the Intervals.icu
+workout text format. Events of one athlete are sent in batches to the bulk
+events endpoint over a small pool of keep-alive asyncio connections, with a
+concurrency limit and retries with exponential backoff on throttling, server
+errors and dropped connections. Events carry an ``external_id`` derived from
+the date and group and are sent with ``upsert=true``, so retries and re-runs
+update workouts instead of duplicating them.
+
+The roster is a CSV file with ``athlete_id``, ``api_key``, ``vma`` and an
+optional ``group`` column (e.g. ``Groupe 2``); athletes without a group get
+every group of the plan. Athletes whose group is not in the plan get no
+events: they are listed and the run exits 1.
+
+Usage:
+    python intervals_upload.py plan.json roster.csv --date 2026-10-21
+    python intervals_upload.py notes.txt roster.csv --date 2026-10-21 --dry-run
+    python intervals_upload.py plan.json roster.csv --mock --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import random
+import re
+import ssl
+import sys
+import time
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+import plan_json
+from pace_targets import format_pace_per_km, read_roster
+
+DEFAULT_BASE_URL = 'https://intervals.icu'
+BULK_EVENTS_PATH = '/api/v1/athlete/{athlete_id}/events/bulk?upsert=true'
+DEFAULT_CONCURRENCY = 8
+DEFAULT_BATCH_SIZE = 20
+DEFAULT_RETRIES = 4
+DEFAULT_BACKOFF = 0.5
+MAX_BACKOFF = 30.0
+DEFAULT_TIMEOUT = 30.0
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+# Same rules as the credentials dialog in lib/plan_exporter.dart
+ATHLETE_ID_PATTERN = re.compile(r'^i[0-9]+$')
+API_KEY_PATTERN = re.compile(r'^[A-Za-z0-9]{20,40}$')
+
+RECOVERY_CUES = {'active': 'Active recovery', 'walk': 'Walk', 'jog': 'Jog', 'rest': 'Rest'}
+
+
+class Athlete(NamedTuple):
+    athlete_id: str
+    api_key: str
+    vma: float
+    group: Optional[str] = None
+
+
+class HttpResponse(NamedTuple):
+    status: int
+    headers: Dict[str, str]
+    body: bytes
+
+
+class UploadResult(NamedTuple):
+    athlete_id: str
+    events: int
+    status: Optional[int]
+    attempts: int
+    error: Optional[str]
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def load_roster(path: str) -> List[Athlete]:
+    """Read and check the roster CSV; the VMA and group are read like pace_targets rosters"""
+    athletes = []
+    for location, row, athlete in read_roster(path):
+        api_key = (row.get('api_key') or '').strip()
+        if not ATHLETE_ID_PATTERN.match(athlete.athlete_id):
+            raise ValueError(f"{location}: invalid athlete_id {athlete.athlete_id!r} (expected e.g. i12345)")
+        if not API_KEY_PATTERN.match(api_key):
+            raise ValueError(f"{location}: invalid api_key for {athlete.athlete_id}")
+        athletes.append(Athlete(athlete.athlete_id, api_key, athlete.vma, athlete.group))
+    return athletes
+
+
+# Workout text -------------------------------------------------------------
+
+def format_step_duration(seconds: float) -> str:
+    """Duration in the workout text format: 45s, 2m, 2m30s, 1h5m"""
+    total = int(round(seconds))
+    hours, rest = divmod(total, 3600)
+    minutes, secs = divmod(rest, 60)
+    parts = []
+    if hours:
+        parts.append(f"{hours}h")
+    if minutes:
+        parts.append(f"{minutes}m")
+    if secs or not parts:
+        parts.append(f"{secs}s")
+    return ''.join(parts)
+
+
+def _work_step(set_data: Dict[str, Any], vma: float) -> str:
+    if set_data.get('distanceMeters'):
+        amount = f"{set_data['distanceMeters']:g}m"
+    else:
+        amount = format_step_duration(set_data.get('durationSeconds') or 0)
+    percent = set_data.get('vmaPercent') or 0
+    if percent <= 0:
+        # No %VMA, no pace: the step runs untargeted
+        return f"- {amount}"
+    return f"- {amount} {format_pace_per_km(vma * percent / 100)}/km Pace"
+
+
+def _recovery_step(seconds: float, recovery_type: str) -> str:
+    return f"- {RECOVERY_CUES.get(recovery_type, 'Rest')} {format_step_duration(seconds)}"
+
+
+def workout_description(plan: Dict[str, Any], group: Dict[str, Any], vma: float) -> str:
+    """Intervals.icu workout text of one group with pace targets for a VMA"""
+    lines = [f"Warmup: {plan.get('warmup', '')}", '']
+
+    for block in group.get('blocks', []):
+        lines.append(block.get('title', ''))
+        for set_data in block.get('sets', []):
+            repetitions = set_data.get('repetitions') or 1
+            if repetitions > 1:
+                lines.append(f"{repetitions}x")
+            lines.append(_work_step(set_data, vma))
+            if set_data.get('recoverySeconds'):
+                lines.append(_recovery_step(set_data['recoverySeconds'], set_data.get('recoveryType')))
+            if repetitions > 1:
+                lines.append('')
+        if block.get('afterRecoverySeconds'):
+            lines.append(_recovery_step(block['afterRecoverySeconds'], block.get('afterRecoveryType', 'rest')))
+        lines.append('')
+
+    lines += [f"Cooldown: {plan.get('cooldown', '')}", '', f"Remarks: {plan.get('remarks', '')}"]
+    return '\n'.join(lines).strip()
+
+
+def workout_events(plan: Dict[str, Any], athlete: Athlete, date: str) -> List[Dict[str, Any]]:
+    """WORKOUT events of the plan for one athlete on the given ISO date"""
+    events = []
+    for group in plan.get('groups', []):
+        if athlete.group is not None and group.get('title') != athlete.group:
+            continue
+        name = f"{plan.get('title', 'Training')} - {group.get('title', '')}".strip(' -')
+        description = workout_description(plan, group, athlete.vma)
+        # Keyed on date and name only, so re-uploading after a VMA change updates the event
+        digest = hashlib.sha1(f"{date}\0{name}".encode('utf-8')).hexdigest()[:16]
+        events.append({
+            'category': 'WORKOUT',
+            'type': 'Run',
+            'start_date_local': f"{date}T00:00:00",
+            'name': name,
+            'description': description,
+            'external_id': f"vma-running-{digest}",
+        })
+    return events
+
+
+def unmatched_athletes(plan: Dict[str, Any], roster: Sequence[Athlete]) -> List[Athlete]:
+    """Athletes whose group is not a group of the plan, and so would get no events"""
+    titles = {group.get('title') for group in plan.get('groups', [])}
+    return [athlete for athlete in roster if athlete.group is not None and athlete.group not in titles]
+
+
+def build_batches(plan: Dict[str, Any], roster: Sequence[Athlete], date: str,
+                  batch_size: int = DEFAULT_BATCH_SIZE) -> List[Tuple[Athlete, List[Dict[str, Any]]]]:
+    """Events of every athlete, split into bulk requests of at most batch_size events"""
+    batches = []
+    for athlete in roster:
+        events = workout_events(plan, athlete, date)
+        for start in range(0, len(events), batch_size):
+            batches.append((athlete, events[start:start + batch_size]))
+    return batches
+
+
+# HTTP over asyncio streams -------------------------------------------------
+
+async def read_head(reader: asyncio.StreamReader) -> Tuple[str, Dict[str, str]]:
+    """Start line and lower-cased headers of an HTTP/1.1 message"""
+    head = await reader.readuntil(b'\r\n\r\n')
+    lines = head.decode('latin-1').split('\r\n')
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return lines[0], headers
+
+
+def status_code(status_line: str) -> int:
+    """Status of an HTTP/1.1 start line; a malformed one raises ConnectionError, like a dropped connection"""
+    parts = status_line.split()
+    if len(parts) < 2 or not parts[0].startswith('HTTP/') or not parts[1].isdigit():
+        raise ConnectionError(f"Malformed status line: {status_line!r}")
+    return int(parts[1])
+
+
+async def read_body(reader: asyncio.StreamReader, headers: Dict[str, str]) -> bytes:
+    if headers.get('transfer-encoding', '').lower() == 'chunked':
+        chunks = []
+        while True:
+            size = int((await reader.readuntil(b'\r\n')).split(b';')[0], 16)
+            chunk = await reader.readexactly(size + 2)
+            if size == 0:
+                # Skip trailers, if any, up to the final empty line
+                while chunk != b'\r\n':
+                    chunk = await reader.readuntil(b'\r\n')
+                return b''.join(chunks)
+            chunks.append(chunk[:-2])
+    return await reader.readexactly(int(headers.get('content-length', 0)))
+
+
+class ConnectionPool:
+    """Keep-alive HTTP/1.1 connections to one origin, at most ``limit`` at a time"""
+
+    def __init__(self, base_url: str, limit: int = DEFAULT_CONCURRENCY, timeout: float = DEFAULT_TIMEOUT):
+        parts = urlsplit(base_url)
+        self.host = parts.hostname
+        self.secure = parts.scheme == 'https'
+        self.port = parts.port or (443 if self.secure else 80)
+        self.host_header = parts.netloc
+        self.timeout = timeout
+        self._ssl = ssl.create_default_context() if self.secure else None
+        self._slots = asyncio.Semaphore(limit)
+        self._idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+        self.connections_opened = 0
+
+    async def request(self, method: str, path: str, body: bytes = b'',
+                      headers: Optional[Dict[str, str]] = None) -> HttpResponse:
+        async with self._slots:
+            if self._idle:
+                reader, writer = self._idle.pop()
+            else:
+                reader, writer = await asyncio.wait_for(
+                    asyncio.open_connection(self.host, self.port, ssl=self._ssl), self.timeout)
+                self.connections_opened += 1
+
+            lines = [f"{method} {path} HTTP/1.1", f"Host: {self.host_header}",
+                     f"Content-Length: {len(body)}", "Connection: keep-alive"]
+            lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+            try:
+                writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+                await writer.drain()
+                status_line, response_headers = await asyncio.wait_for(read_head(reader), self.timeout)
+                status = status_code(status_line)
+                response_body = await asyncio.wait_for(read_body(reader, response_headers), self.timeout)
+            except BaseException:
+                writer.close()
+                raise
+
+            if response_headers.get('connection', '').lower() == 'close':
+                writer.close()
+            else:
+                self._idle.append((reader, writer))
+            return HttpResponse(status, response_headers, response_body)
+
+    async def close(self):
+        idle, self._idle = self._idle, []
+        for _, writer in idle:
+            writer.close()
+        for _, writer in idle:
+            try:
+                await writer.wait_closed()
+            except (ConnectionError, ssl.SSLError):
+                pass
+
+
+# Upload -------------------------------------------------------------------
+
+def _retry_delay(attempt: int, backoff: float, response: Optional[HttpResponse], rng: random.Random) -> float:
+    if response is not None and 'retry-after' in response.headers:
+        try:
+            return min(MAX_BACKOFF, float(response.headers['retry-after']))
+        except ValueError:
+            pass
+    # Full jitter: spreads retries of many athletes instead of synchronizing them
+    return rng.uniform(0, min(MAX_BACKOFF, backoff * 2 ** attempt))
+
+
+class IntervalsUploader:
+    """Sends event batches to the bulk endpoint with retries"""
+
+    def __init__(self, pool: ConnectionPool, retries: int = DEFAULT_RETRIES, backoff: float = DEFAULT_BACKOFF,
+                 seed: Optional[int] = None):
+        self.pool = pool
+        self.retries = retries
+        self.backoff = backoff
+        self._rng = random.Random(seed)
+
+    async def upload_batch(self, athlete: Athlete, events: List[Dict[str, Any]]) -> UploadResult:
+        token = base64.b64encode(f"API_KEY:{athlete.api_key}".encode('utf-8')).decode('ascii')
+        headers = {'Authorization': f"Basic {token}", 'Content-Type': 'application/json'}
+        body = plan_json.dumps_compact(events)
+        path = BULK_EVENTS_PATH.format(athlete_id=athlete.athlete_id)
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = await self.pool.request('POST', path, body, headers)
+                if response.status < 300:
+                    return UploadResult(athlete.athlete_id, len(events), response.status, attempt + 1, None)
+                error = f"HTTP {response.status}: {response.body[:200].decode('utf-8', 'replace')}"
+                retryable = response.status in RETRY_STATUSES
+            except (OSError, asyncio.IncompleteReadError, asyncio.LimitOverrunError, asyncio.TimeoutError) as e:
+                error = f"{type(e).__name__}: {e}"
+                retryable = True
+
+            if not retryable or attempt >= self.retries:
+                status = response.status if response is not None else None
+                return UploadResult(athlete.athlete_id, len(events), status, attempt + 1, error)
+            await asyncio.sleep(_retry_delay(attempt, self.backoff, response, self._rng))
+            attempt += 1
+
+    async def upload(self, batches: Sequence[Tuple[Athlete, List[Dict[str, Any]]]]) -> List[UploadResult]:
+        """Upload every batch; the pool bounds how many are in flight"""
+        return await asyncio.gather(*(self.upload_batch(athlete, events) for athlete, events in batches))
+
+
+async def upload_roster(plan: Dict[str, Any], roster: Sequence[Athlete], date: str,
+                        base_url: str = DEFAULT_BASE_URL, concurrency: int = DEFAULT_CONCURRENCY,
+                        batch_size: int = DEFAULT_BATCH_SIZE, retries: int = DEFAULT_RETRIES,
+                        backoff: float = DEFAULT_BACKOFF) -> List[UploadResult]:
+    pool = ConnectionPool(base_url, limit=concurrency)
+    try:
+        uploader = IntervalsUploader(pool, retries=retries, backoff=backoff)
+        return await uploader.upload(build_batches(plan, roster, date, batch_size))
+    finally:
+        await pool.close()
+
+
+def load_plan(path: str) -> Dict[str, Any]:
+    """A plan JSON file, or a notes file converted on the fly"""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith('.json'):
+            return json.load(f)
+        text = f.read()
+    from training_plan_converter import ENGINE_SINGLE_PASS, TrainingPlanConverter
+    return TrainingPlanConverter(engine=ENGINE_SINGLE_PASS).parse_training_notes(text)
+
+
+async def _run(args: argparse.Namespace, plan: Dict[str, Any], roster: List[Athlete]) -> int:
+    server = None
+    base_url = args.base_url
+    if args.mock:
+        from mock_intervals_server import MockIntervalsServer
+        server = MockIntervalsServer(latency=args.mock_latency, fail_rate=args.fail_rate, seed=0)
+        await server.start()
+        base_url = server.url
+
+    try:
+        start = time.perf_counter()
+        results = await upload_roster(plan, roster, args.date, base_url=base_url, concurrency=args.concurrency,
+                                      batch_size=args.batch_size, retries=args.retries, backoff=args.backoff)
+        elapsed = time.perf_counter() - start
+    finally:
+        if server is not None:
+            await server.close()
+
+    failed = [r for r in results if not r.ok]
+    for r in failed:
+        print(f"FAILED {r.athlete_id} after {r.attempts} attempts: {r.error}", file=sys.stderr)
+    events = sum(r.events for r in results if r.ok)
+    retries = sum(r.attempts - 1 for r in results)
+    complete = {r.athlete_id for r in results} - {r.athlete_id for r in failed}
+    print(f"Uploaded {events} events, complete for {len(complete)}/{len(roster)} athletes "
+          f"in {len(results)} requests, {elapsed:.2f}s ({len(results) / elapsed:.1f} req/s), {retries} retries")
+    if server is not None:
+        print(f"Mock server: {server.stats()}")
+    return 1 if failed else 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Upload a training plan to Intervals.icu for a roster")
+    parser.add_argument('plan', help="Plan JSON file, or a notes file to convert")
+    parser.add_argument('roster', help="CSV with athlete_id, api_key, vma and optional group columns")
+    parser.add_argument('--date', required=True, help="Session date, YYYY-MM-DD")
+    parser.add_argument('--base-url', default=DEFAULT_BASE_URL)
+    parser.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY,
+                        help=f"Connections / requests in flight (default: {DEFAULT_CONCURRENCY})")
+    parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+                        help=f"Events per bulk request (default: {DEFAULT_BATCH_SIZE})")
+    parser.add_argument('--retries', type=int, default=DEFAULT_RETRIES)
+    parser.add_argument('--backoff', type=float, default=DEFAULT_BACKOFF, help="Base retry delay in seconds")
+    parser.add_argument('--dry-run', action='store_true', help="Print the events as NDJSON instead of uploading")
+    parser.add_argument('--mock', action='store_true', help="Upload to a local mock server instead")
+    parser.add_argument('--mock-latency', type=float, default=0.005, help="Mock server latency in seconds")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of mock requests that fail")
+    args = parser.parse_args(argv)
+
+    try:
+        plan = load_plan(args.plan)
+        roster = load_roster(args.roster)
+    except (OSError, ValueError) as e:
+        print(e, file=sys.stderr)
+        return 2
+
+    unmatched = unmatched_athletes(plan, roster)
+    for athlete in unmatched:
+        print(f"NO EVENTS for {athlete.athlete_id}: the plan has no group {athlete.group!r}", file=sys.stderr)
+
+    if args.dry_run:
+        for athlete, events in build_batches(plan, roster, args.date, args.batch_size):
+            for event in events:
+                print(json.dumps(dict(event, athlete_id=athlete.athlete_id), ensure_ascii=False))
+        status = 0
+    else:
+        status = asyncio.run(_run(args, plan, roster))
+    return status or (1 if unmatched else 0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
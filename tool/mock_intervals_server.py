@@ -0,0 +1,171 @@
+# file: mock_intervals_server.py
+"""Local stand-in for the Intervals.icu bulk events endpoint.
+
+Speaks keep-alive HTTP/1.1 on asyncio streams, checks the Basic auth header,
+upserts events by ``external_id`` per athlete and can inject latency,
+throttling (429 with Retry-After) and server errors (503) or dropped
+connections, so intervals_upload.py can be tested offline.
+
+Usage:
+    python mock_intervals_server.py --port 8765 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import random
+import re
+import sys
+from typing import Any, Dict, List, Optional
+
+from intervals_upload import read_body, read_head
+
+BULK_EVENTS_ROUTE = re.compile(r'^/api/v1/athlete/(i\d+)/events/bulk(?:\?.*)?$')
+
+REASONS = {200: 'OK', 400: 'Bad Request', 401: 'Unauthorized', 404: 'Not Found', 429: 'Too Many Requests',
+           503: 'Service Unavailable'}
+
+
+class MockIntervalsServer:
+    """In-memory bulk events endpoint with failure injection.
+
+    ``fail_rate`` is split evenly between 429 responses, 503 responses and
+    connections closed before answering.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 0, latency: float = 0.0,
+                 fail_rate: float = 0.0, seed: Optional[int] = None):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+        self._server: Optional[asyncio.AbstractServer] = None
+        self.events: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.connections = 0
+        self.requests = 0
+        self.failures = 0
+        self._next_id = 1
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    async def __aenter__(self) -> 'MockIntervalsServer':
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            'connections': self.connections,
+            'requests': self.requests,
+            'failures': self.failures,
+            'athletes': len(self.events),
+            'events': sum(len(events) for events in self.events.values()),
+        }
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.connections += 1
+        try:
+            while True:
+                try:
+                    request_line, headers = await read_head(reader)
+                    body = await read_body(reader, headers)
+                except (asyncio.IncompleteReadError, ConnectionError):
+                    break
+                self.requests += 1
+                if self.latency:
+                    await asyncio.sleep(self.latency)
+
+                roll = self._rng.random()
+                if roll < self.fail_rate / 3:
+                    # Drop the connection without answering
+                    self.failures += 1
+                    break
+                if roll < self.fail_rate * 2 / 3:
+                    self.failures += 1
+                    self._respond(writer, 429, {'error': 'rate limited'}, {'Retry-After': '0'})
+                elif roll < self.fail_rate:
+                    self.failures += 1
+                    self._respond(writer, 503, {'error': 'unavailable'})
+                else:
+                    status, payload = self._route(request_line, headers, body)
+                    self._respond(writer, status, payload)
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def _route(self, request_line: str, headers: Dict[str, str], body: bytes):
+        method, target = request_line.split()[:2]
+        match = BULK_EVENTS_ROUTE.match(target)
+        if method != 'POST' or not match:
+            return 404, {'error': f"no route for {method} {target}"}
+        if not headers.get('authorization', '').startswith('Basic '):
+            return 401, {'error': 'missing credentials'}
+        try:
+            events = json.loads(body)
+        except ValueError:
+            return 400, {'error': 'invalid JSON'}
+        if not isinstance(events, list):
+            return 400, {'error': 'expected a list of events'}
+
+        stored = self.events.setdefault(match.group(1), {})
+        created: List[Dict[str, Any]] = []
+        for event in events:
+            key = event.get('external_id') or f"id-{self._next_id}"
+            previous = stored.get(key)
+            record = dict(event, id=previous['id'] if previous else self._next_id)
+            if previous is None:
+                self._next_id += 1
+            stored[key] = record
+            created.append(record)
+        return 200, created
+
+    @staticmethod
+    def _respond(writer: asyncio.StreamWriter, status: int, payload: Any, headers: Optional[Dict[str, str]] = None):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        lines = [f"HTTP/1.1 {status} {REASONS.get(status, '')}", 'Content-Type: application/json',
+                 f"Content-Length: {len(body)}", 'Connection: keep-alive']
+        lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1') + body)
+
+
+async def _serve(args: argparse.Namespace):
+    server = MockIntervalsServer(args.host, args.port, args.latency, args.fail_rate)
+    await server.start()
+    print(f"Mock Intervals.icu listening on {server.url}", flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        print(f"Served: {server.stats()}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Run a local mock of the Intervals.icu bulk events endpoint")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help="Seconds before each response")
+    parser.add_argument('--fail-rate', type=float, default=0.0, help="Share of requests that fail")
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(_serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
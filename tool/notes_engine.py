@@ -0,0 +1,282 @@
+# file: notes_engine.py
+import re
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from instrumentation import RECOVERY_MATCHING, SCAN
+from notes_languages import DEFAULT_LANGUAGES, Language, fold, initials, merge, phrase_trie, select_languages
+
+# Token kinds emitted by SinglePassNotesParser.tokenize
+GROUP = 'group'
+BLOCK = 'block'
+SET = 'set'
+RECOVERY = 'recovery'
+WARMUP = 'warmup'
+COOLDOWN = 'cooldown'
+REMARKS = 'remarks'
+
+DEFAULT_WARMUP = "Échauffement 15' boucle habituelle + 3 gammes"
+DEFAULT_COOLDOWN = "Retour au calme en footing lent autour de la piste dans le sens horlogique 5'"
+DEFAULT_REMARKS = "Bien respecter les % de VMA très important."
+
+Token = Tuple[str, 're.Match[str]']
+# Receives (index, group) as groups of a plan are parsed; raising aborts the parse
+GroupCallback = Callable[[int, Dict[str, Any]], None]
+
+
+def _phrase_key(text: str) -> str:
+    return fold(text).replace(' ', '')
+
+
+class NotesGrammar:
+    """Compiled patterns of the session notes grammar, built once per converter.
+
+    Section headers and recovery phrases come from the given languages
+    (DEFAULT_LANGUAGES, i.e. French, by default), merged into one trie-shaped alternative per
+    token kind. Headers match whatever the accents and the case of their
+    letters after the first, which must be a capital. Output titles stay
+    "Groupe N" / "Bloc N" whatever the language of the notes.
+    """
+
+    def __init__(self, languages: Optional[Sequence[Language]] = None):
+        if languages is None:
+            languages = select_languages(DEFAULT_LANGUAGES)
+        self.languages = list(languages)
+
+        group_headers = merge(self.languages, 'group_headers')
+        block_headers = merge(self.languages, 'block_headers')
+        warmup_headers = merge(self.languages, 'warmup_headers')
+        cooldown_headers = merge(self.languages, 'cooldown_headers')
+        remarks_headers = merge(self.languages, 'remarks_headers')
+        # Folded phrase -> recovery type, in priority order
+        self.recovery_types: Dict[str, str] = {}
+        for language in self.languages:
+            for phrase, recovery_type in language.recovery_phrases:
+                self.recovery_types.setdefault(fold(phrase), recovery_type)
+        # Separators are dropped from these keys: the tries let a space match none
+        self._recovery_priority: Dict[str, Tuple[int, str]] = {}
+        for priority, (phrase, recovery_type) in enumerate(self.recovery_types.items()):
+            self._recovery_priority.setdefault(_phrase_key(phrase), (priority, recovery_type))
+        self._recovery_cache: Dict[str, str] = {}
+
+        group = phrase_trie(group_headers)
+        block = phrase_trie(block_headers)
+        warmup = phrase_trie(warmup_headers)
+        cooldown = phrase_trie(cooldown_headers)
+        remarks = phrase_trie(remarks_headers)
+        recovery = phrase_trie(self.recovery_types)
+        capitals = initials(group_headers + block_headers + warmup_headers + cooldown_headers + remarks_headers,
+                            capitals=True)
+        header_start = rf'(?=[{capitals}])'
+
+        # Intervals start with '-', recoveries with a digit and section headers
+        # with a capital letter. The leading lookahead is a single character
+        # class, which lets the scanner skip every other position without
+        # trying each branch, and the lookahead on a recovery's first letter
+        # cuts short the digit runs of distances and percentages. A recovery
+        # time starts at the first digit of a run and is matched atomically
+        # (a lookahead captures it, a backreference consumes it): giving back
+        # digits can never reach a recovery phrase, and retrying every split
+        # at every start made long digit runs cubic.
+        self.scanner = re.compile(
+            rf"(?=[-\d{capitals}])"
+            r"(?:(?P<set>-\s*(?P<reps>\d+)\s*x\s*(?P<distance>\d+)\s+(?P<percentages>[\d%-]+))"
+            r"|(?P<recovery>(?<!\d)(?=(?P<recovery_time>\d+'?\d*))(?P=recovery_time)"
+            rf"\s*(?=[{initials(self.recovery_types)}])"
+            rf"(?P<recovery_kind>{recovery}))"
+            rf"|(?P<group>{group}\s*(?P<group_number>\d+)\s*:)"
+            rf"|(?P<block>{block}\s+(?P<block_number>\d+))"
+            rf"|(?P<warmup>{warmup})"
+            rf"|(?P<cooldown>{cooldown})"
+            rf"|(?P<remarks>{remarks}\s*:))"
+        )
+        self.recovery_phrase = re.compile(recovery)
+        # Section values are read with anchored matches right after their header
+        self.line_value = re.compile(r'\s*(.+)')
+        self.rest_value = re.compile(r'\s*(.+)', re.DOTALL)
+        # Section splitting, for callers that parse groups and blocks separately
+        self.group_split = re.compile(rf'{header_start}{group}\s*(\d+)\s*:')
+        self.block_split = re.compile(rf'{header_start}{block}\s+(\d+)')
+        self.warmup = re.compile(rf'{header_start}{warmup}\s*(.+)')
+        self.cooldown = re.compile(rf'{header_start}{cooldown}\s*(.+)')
+        self.remarks = re.compile(rf'{header_start}{remarks}\s*:\s*(.+)', re.DOTALL)
+
+    def recovery_type(self, text: str) -> str:
+        """Recovery type named in a text; the highest-priority phrase wins, 'rest' if none"""
+        recovery_type = self._recovery_cache.get(text)
+        if recovery_type is None:
+            recovery_type = self.recovery_types.get(fold(text))
+            if recovery_type is None:
+                found = [self._recovery_priority.get(_phrase_key(match.group()))
+                         for match in self.recovery_phrase.finditer(text)]
+                found = [entry for entry in found if entry is not None]
+                recovery_type = min(found)[1] if found else 'rest'
+            if len(self._recovery_cache) < 1024:
+                self._recovery_cache[text] = recovery_type
+        return recovery_type
+
+
+class SinglePassNotesParser:
+    """Parse training notes in one left-to-right scan of the text.
+
+    Produces the same plan as the legacy ``parse_training_notes`` for regular
+    notes. Tokens never overlap, so degenerate lines where a recovery phrase
+    starts inside an interval's percentage run (``- 3 x 800 2 actif``) are read
+    as an interval only.
+
+    With the converter's instrumentation enabled, the scan is timed as one
+    stage (group, block and interval tokens come out of the same regex) and
+    recovery matching is timed per block.
+    """
+
+    def __init__(self, converter, grammar: Optional[NotesGrammar] = None):
+        self.converter = converter
+        self.grammar = grammar or NotesGrammar()
+
+    def tokenize(self, text: str) -> Iterator[Token]:
+        for match in self.grammar.scanner.finditer(text):
+            yield match.lastgroup, match
+
+    def parse(self, text: str, on_group: Optional[GroupCallback] = None) -> Dict[str, Any]:
+        """Parse notes into a plan; ``on_group(index, group)`` sees each group once its last block is scanned"""
+        converter = self.converter
+        instrumentation = converter.instrumentation
+        if instrumentation.enabled:
+            start = time.perf_counter()
+        grammar = self.grammar
+        line_value = grammar.line_value
+        rest_value = grammar.rest_value
+
+        warmup = cooldown = remarks = None
+        groups = []
+        blocks = None
+        sets = None
+        recoveries = None
+        block_title = None
+
+        # tokenize() inlined: the scan is the hot loop of a conversion
+        for match in grammar.scanner.finditer(text):
+            kind = match.lastgroup
+            if kind == SET:
+                if sets is not None:
+                    sets.extend(converter.build_sets(
+                        int(match.group('reps')),
+                        int(match.group('distance')),
+                        match.group('percentages'),
+                    ))
+            elif kind == RECOVERY:
+                if recoveries is not None:
+                    recoveries.append(match)
+            elif kind == BLOCK:
+                if blocks is not None:
+                    if block_title is not None:
+                        blocks.append(self._finish_block(block_title, sets, recoveries))
+                    block_title = f"Bloc {match.group('block_number')}"
+                    sets = []
+                    recoveries = []
+            elif kind == GROUP:
+                if block_title is not None:
+                    blocks.append(self._finish_block(block_title, sets, recoveries))
+                if on_group is not None and groups:
+                    on_group(len(groups) - 1, groups[-1])
+                blocks = []
+                groups.append({
+                    'title': f"Groupe {match.group('group_number')}",
+                    'blocks': blocks
+                })
+                block_title = sets = recoveries = None
+            elif kind == WARMUP:
+                if warmup is None:
+                    value = line_value.match(text, match.end())
+                    if value:
+                        warmup = value.group(1).strip()
+            elif kind == COOLDOWN:
+                if cooldown is None:
+                    value = line_value.match(text, match.end())
+                    if value:
+                        cooldown = value.group(1).strip()
+            elif kind == REMARKS:
+                if remarks is None:
+                    value = rest_value.match(text, match.end())
+                    if value:
+                        remarks = value.group(1).strip()
+
+        if block_title is not None:
+            blocks.append(self._finish_block(block_title, sets, recoveries))
+        if on_group is not None and groups:
+            on_group(len(groups) - 1, groups[-1])
+
+        if instrumentation.enabled:
+            instrumentation.add_time(SCAN, time.perf_counter() - start)
+            # One scanner pass plus an anchored match per section value found
+            sections = (warmup is not None) + (cooldown is not None) + (remarks is not None)
+            instrumentation.count('regex_calls', 1 + sections)
+            instrumentation.count('regex_matches.group', len(groups))
+
+        return {
+            'title': 'Mercredi (séance piste)',
+            'warmup': warmup if warmup is not None else DEFAULT_WARMUP,
+            'cooldown': cooldown if cooldown is not None else DEFAULT_COOLDOWN,
+            'remarks': remarks if remarks is not None else DEFAULT_REMARKS,
+            'groups': groups
+        }
+
+    def parse_block(self, title: str, content: str) -> Dict[str, Any]:
+        """Parse the text between one "Bloc N" header and the next"""
+        converter = self.converter
+        instrumentation = converter.instrumentation
+        if instrumentation.enabled:
+            start = time.perf_counter()
+        sets = []
+        recoveries = []
+        for kind, match in self.tokenize(content):
+            if kind == SET:
+                sets.extend(converter.build_sets(
+                    int(match.group('reps')),
+                    int(match.group('distance')),
+                    match.group('percentages'),
+                ))
+            elif kind == RECOVERY:
+                recoveries.append(match)
+        if instrumentation.enabled:
+            instrumentation.add_time(SCAN, time.perf_counter() - start)
+            instrumentation.count('regex_calls')
+        return self._finish_block(title, sets, recoveries)
+
+    def _finish_block(self, title: str, sets: List[Dict[str, Any]],
+                      recoveries: List['re.Match[str]']) -> Dict[str, Any]:
+        converter = self.converter
+        instrumentation = converter.instrumentation
+        if instrumentation.enabled:
+            start = time.perf_counter()
+
+        recovery_types = [converter.parse_recovery_type(match.group('recovery_kind')) for match in recoveries]
+        for set_data, match, recovery_type in zip(sets, recoveries, recovery_types):
+            set_data['recoverySeconds'] = converter.parse_time_to_seconds(match.group('recovery_time'))
+            set_data['recoveryType'] = recovery_type
+
+        after_recovery_seconds = None
+        for match, recovery_type in zip(recoveries, recovery_types):
+            if recovery_type == 'rest':
+                after_recovery_seconds = converter.parse_time_to_seconds(match.group('recovery_time'))
+                break
+
+        block_data = {
+            'title': title,
+            'sets': sets
+        }
+
+        if after_recovery_seconds:
+            block_data['afterRecoverySeconds'] = after_recovery_seconds
+            block_data['afterRecoveryType'] = converter.parse_recovery_type('pause sèche')
+        else:
+            block_data['afterRecoverySeconds'] = 180
+            block_data['afterRecoveryType'] = 'rest'
+
+        if instrumentation.enabled:
+            instrumentation.add_time(RECOVERY_MATCHING, time.perf_counter() - start)
+            instrumentation.count('regex_matches.block')
+            instrumentation.count('sets', len(sets))
+            instrumentation.count('regex_matches.recovery', len(recoveries))
+
+        return block_data
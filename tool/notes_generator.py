@@ -0,0 +1,98 @@
+# file: notes_generator.py
+"""Deterministic synthetic session notes in the club's French format.
+
+The same seed and sizes always give the same text, so benchmarks and fuzzing
+runs are reproducible.
+
+Usage:
+    python notes_generator.py --groups 4 --blocks 3 --seed 7
+"""
+import argparse
+import random
+import sys
+from typing import List, Optional
+
+DISTANCES = (100, 200, 300, 400, 500, 600, 800, 1000, 1200, 1500, 2000)
+PERCENTAGES = tuple(range(70, 111, 5))
+SET_SEPARATORS = ('x ', ' x ', 'x', ' x')
+RECOVERY_TIMES = ("30''", "45''", "1'", "1'30''", "1'30", "2'", "2'30''", "3'", "90", "1’30", "2’")
+RECOVERY_PHRASES = (
+    "{time} actif (pour les plus en forme), marche ou trott entre chaque répétition",
+    "{time} actif entre chaque répétition",
+    "{time} marche",
+    "{time} trott",
+    "récup {time} trott entre les répétitions",
+)
+AFTER_RECOVERY_PHRASES = ("3'min pause sèche", "3' pause sèche", "5' pause sèche", "2 pause sèche")
+TIME_STRINGS = ("2'30", "3'", "45", "1’30", "2’", "’45", "3min", "90", "1'", "10")
+
+
+def generate_set_line(rng: random.Random, multi_percent_ratio: float = 0.3) -> str:
+    distance = rng.choice(DISTANCES)
+    if rng.random() < multi_percent_ratio:
+        count = rng.randint(2, 4)
+        start = rng.randrange(0, len(PERCENTAGES) - count + 1)
+        percentages = '-'.join(f"{p}%" for p in PERCENTAGES[start:start + count])
+        return f"-       {count}{rng.choice(SET_SEPARATORS)}{distance} {percentages}"
+    return f"-       {rng.randint(2, 10)}{rng.choice(SET_SEPARATORS)}{distance} {rng.choice(PERCENTAGES)}%"
+
+
+def generate_notes(groups: int = 2, blocks: int = 3, sets: int = 1, seed: int = 0,
+                   multi_percent_ratio: float = 0.3) -> str:
+    """Session notes with the given number of groups, blocks per group and set lines per block"""
+    rng = random.Random(seed)
+    lines: List[str] = [
+        "Avant  séance (20min)",
+        "",
+        f"Échauffement {rng.choice((10, 15, 20))}' boucle habituelle + {rng.randint(2, 4)} gammes  ",
+        "",
+        "Contenu de la séance (40 min)",
+        "",
+    ]
+
+    for group in range(1, groups + 1):
+        lines += [f"Bloc GROUPE {group}  :", ""]
+        for block in range(1, blocks + 1):
+            lines += [f"Bloc {block} ", ""]
+            if block > 1 and rng.random() < 0.5:
+                lines += [rng.choice(AFTER_RECOVERY_PHRASES) + " ", ""]
+            for _ in range(sets):
+                lines += [generate_set_line(rng, multi_percent_ratio), ""]
+                phrase = rng.choice(RECOVERY_PHRASES)
+                lines += [phrase.format(time=rng.choice(RECOVERY_TIMES)) + " ", ""]
+
+    lines += [
+        "Retour au calme en footing lent autour de la piste dans le sens horlogique 5'",
+        "",
+        "Remarques supplémentaires : ",
+        "",
+        "Bien respecter les % de VMA très important.",
+    ]
+    return '\n'.join(lines)
+
+
+def generate_set_lines(count: int, seed: int = 0) -> List[str]:
+    """Interval lines as extracted from a block, for parse_interval_set"""
+    rng = random.Random(seed)
+    return [generate_set_line(rng).lstrip('- ') for _ in range(count)]
+
+
+def generate_time_strings(count: int, seed: int = 0) -> List[str]:
+    """Recovery times in the spellings parse_time_to_seconds accepts"""
+    rng = random.Random(seed)
+    return [rng.choice(TIME_STRINGS) for _ in range(count)]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Print synthetic training notes")
+    parser.add_argument('--groups', type=int, default=2)
+    parser.add_argument('--blocks', type=int, default=3, help="Blocks per group")
+    parser.add_argument('--sets', type=int, default=1, help="Set lines per block")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    print(generate_notes(args.groups, args.blocks, args.sets, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
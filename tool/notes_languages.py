@@ -0,0 +1,183 @@
+# file: notes_languages.py
+"""Keywords of the session notes grammar, per language.
+
+A Language lists the phrases that open each section and the recovery phrases
+with the recovery type they stand for. NotesGrammar merges the registered
+languages and compiles every phrase list into one trie-shaped regex, so
+matching several languages costs one scan, like matching one. Phrases match
+regardless of case and accents, and a space or hyphen in a phrase matches
+any run of spaces and hyphens (``warm-up``, ``warm up``, ``warmup``).
+Grammars read French by default; other languages are opt-in, because their
+phrases turn up in French remarks (``2 active``, ``5 rest``) and would start
+recoveries there. The short French headers (``Groupe 2 :``, ``Remarques :``)
+are opt-in for the same reason, as the ``fr-short`` language.
+Section headers only need a capital first letter (``ECHAUFFEMENT``,
+``Cool down``): lower-case letters are most of the notes, and letting every
+one of them start a header would cost the scanner more than all the
+languages together.
+"""
+import re
+import unicodedata
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+
+class Language(NamedTuple):
+    code: str
+    group_headers: Tuple[str, ...]
+    block_headers: Tuple[str, ...]
+    warmup_headers: Tuple[str, ...]
+    cooldown_headers: Tuple[str, ...]
+    # Matched before a colon, like "Remarques supplémentaires :"
+    remarks_headers: Tuple[str, ...]
+    # Phrase -> recovery type, earlier phrases win when a text holds several
+    recovery_phrases: Tuple[Tuple[str, str], ...]
+
+
+FRENCH = Language(
+    code='fr',
+    group_headers=('Bloc GROUPE',),
+    block_headers=('Bloc',),
+    warmup_headers=('Échauffement',),
+    cooldown_headers=('Retour au calme',),
+    remarks_headers=('Remarques supplémentaires',),
+    recovery_phrases=(
+        ('actif', 'active'),
+        ('actif (pour les plus en forme)', 'active'),
+        ('marche', 'walk'),
+        ('trott', 'jog'),
+        ('pause sèche', 'rest'),
+    ),
+)
+
+# French notes that also use the bare "Groupe N :" and "Remarques :" headers
+FRENCH_SHORT = FRENCH._replace(
+    code='fr-short',
+    group_headers=FRENCH.group_headers + ('Groupe',),
+    remarks_headers=FRENCH.remarks_headers + ('Remarques',),
+)
+
+ENGLISH = Language(
+    code='en',
+    group_headers=('Group',),
+    block_headers=('Block',),
+    warmup_headers=('Warm-up',),
+    cooldown_headers=('Cool-down',),
+    remarks_headers=('Additional remarks', 'Remarks'),
+    recovery_phrases=(
+        ('active', 'active'),
+        ('walk', 'walk'),
+        ('jog', 'jog'),
+        ('standing rest', 'rest'),
+        ('rest', 'rest'),
+    ),
+)
+
+DUTCH = Language(
+    code='nl',
+    group_headers=('Groep',),
+    block_headers=('Blok',),
+    warmup_headers=('Warming-up', 'Inlopen'),
+    cooldown_headers=('Cooling-down', 'Uitlopen'),
+    remarks_headers=('Extra opmerkingen', 'Opmerkingen'),
+    recovery_phrases=(
+        ('actief', 'active'),
+        ('wandelen', 'walk'),
+        ('joggen', 'jog'),
+        ('dribbelen', 'jog'),
+        ('stilstaande rust', 'rest'),
+        ('rust', 'rest'),
+    ),
+)
+
+# Registered languages, in priority order; French first, as the notes format started there
+LANGUAGES: Dict[str, Language] = {language.code: language
+                                  for language in (FRENCH, FRENCH_SHORT, ENGLISH, DUTCH)}
+# Languages a grammar reads when none are given
+DEFAULT_LANGUAGES = ('fr',)
+
+
+def register_language(language: Language):
+    """Make a language available to select_languages"""
+    LANGUAGES[language.code] = language
+
+
+def select_languages(codes: Iterable[str]) -> List[Language]:
+    """Registered languages by code, e.g. ``select_languages(['fr', 'en'])``"""
+    languages = []
+    for code in codes:
+        if code not in LANGUAGES:
+            raise ValueError(f"Unknown notes language: {code} (expected one of {', '.join(LANGUAGES)})")
+        languages.append(LANGUAGES[code])
+    return languages
+
+
+def _build_fold_table() -> Tuple[Dict[int, str], Dict[str, str]]:
+    # One character in, one character out, so folded text keeps its offsets
+    table: Dict[int, str] = {}
+    variants: Dict[str, List[str]] = {}
+    for code in list(range(ord('A'), ord('Z') + 1)) + list(range(ord('a'), ord('z') + 1)) + list(range(0xC0, 0x100)):
+        char = chr(code)
+        base = unicodedata.normalize('NFD', char)[0].lower()
+        if 'a' <= base <= 'z':
+            table[code] = base
+            variants.setdefault(base, []).append(char)
+    classes = {base: '[' + ''.join(chars) + ']' for base, chars in variants.items()}
+    return table, classes
+
+
+_FOLD_TABLE, _CHAR_CLASSES = _build_fold_table()
+_SEPARATORS = re.compile(r'[-\s]+')
+
+
+def fold(text: str) -> str:
+    """Lower-case, accent-free text with runs of spaces and hyphens turned into one space"""
+    return _SEPARATORS.sub(' ', unicodedata.normalize('NFC', text).translate(_FOLD_TABLE)).strip()
+
+
+def _char_pattern(char: str) -> str:
+    if char == ' ':
+        return r'[-\s]*'
+    return _CHAR_CLASSES.get(char) or re.escape(char)
+
+
+def phrase_trie(phrases: Iterable[str]) -> str:
+    """Regex matching any of the phrases, with shared prefixes factored out.
+
+    Longer phrases are preferred where one phrase extends another, and
+    the trie shape means the engine never re-reads a common prefix.
+    """
+    trie: Dict[str, dict] = {}
+    for phrase in phrases:
+        node = trie
+        for char in fold(phrase):
+            node = node.setdefault(char, {})
+        node[''] = {}
+
+    def emit(node: Dict[str, dict]) -> str:
+        branches = [_char_pattern(char) + emit(child) for char, child in node.items() if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        return f'(?:{body})?' if '' in node else body
+
+    return emit(trie)
+
+
+def initials(phrases: Iterable[str], capitals: bool = False) -> str:
+    """Character class body with the accent variants of the phrases' first letters.
+
+    Both cases are included unless ``capitals`` is set.
+    """
+    chars = set()
+    for phrase in phrases:
+        first = fold(phrase)[0]
+        variants = _CHAR_CLASSES[first][1:-1] if first in _CHAR_CLASSES else first
+        chars.update(char for char in variants if not capitals or char.isupper())
+    return ''.join(re.escape(char) for char in sorted(chars))
+
+
+def merge(languages: Sequence[Language], field: str) -> List[str]:
+    phrases: List[str] = []
+    for language in languages:
+        phrases.extend(phrase for phrase in getattr(language, field) if phrase not in phrases)
+    return phrases
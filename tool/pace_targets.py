@@ -0,0 +1,266 @@
+# file: pace_targets.py
+"""Per-athlete pace targets, split times and recoveries of a plan.
+
+Formatting mirrors lib/time_utils.dart (formatPacePerKm,
+formatTimeForDistance, formatElapsed), so athletes see the same values as in
+the app. A club has few distinct VMAs and sets reuse a handful of
+(%VMA, distance) pairs, so targets are memoized per (VMA, %VMA, distance)
+and each group is serialized once per distinct VMA: the cost of a roster
+grows with its number of distinct VMAs, plus one line written per athlete.
+
+Usage:
+    python pace_targets.py plan.json roster.csv -o targets.ndjson
+    python pace_targets.py plan.json --roster-size 10000
+"""
+import argparse
+import csv
+import json
+import math
+import random
+import sys
+import time
+from typing import Any, Dict, IO, Iterator, List, NamedTuple, Optional, Sequence, Tuple
+
+import plan_json
+from plan_schema import EXAMPLE_PLAN
+
+
+def _round(value: float) -> int:
+    # Dart's num.round() rounds halves away from zero, Python's round() to even
+    return int(math.floor(value + 0.5))
+
+
+def format_elapsed(total_seconds: int) -> str:
+    """Compact elapsed time, as formatElapsed in lib/time_utils.dart"""
+    if total_seconds < 0:
+        return '-'
+    days, rest = divmod(total_seconds, 86400)
+    hours, rest = divmod(rest, 3600)
+    minutes, seconds = divmod(rest, 60)
+
+    if days > 0:
+        return f"{days}d {hours:02d}:{minutes:02d}:{seconds:02d}"
+    if hours > 0:
+        return f"{hours}:{minutes:02d}:{seconds:02d}"
+    return f"{minutes:02d}:{seconds:02d}"
+
+
+def format_pace_per_km(speed_kmh: float, include_unit: bool = False) -> str:
+    """Pace per kilometer for a speed in km/h, as formatPacePerKm"""
+    if speed_kmh <= 0:
+        return '-'
+    total_seconds = _round(3600 / speed_kmh)
+    base = f"{total_seconds // 60:02d}:{total_seconds % 60:02d}"
+    return f"{base} /km" if include_unit else base
+
+
+def format_time_for_distance(speed_kmh: float, distance_meters: float, include_unit: bool = False) -> str:
+    """Time needed to cover a distance at a speed in km/h, as formatTimeForDistance"""
+    if speed_kmh <= 0 or distance_meters <= 0:
+        return '-'
+    speed_ms = speed_kmh * 1000 / 3600
+    base = format_elapsed(_round(distance_meters / speed_ms))
+    if not include_unit:
+        return base
+
+    km_value = distance_meters / 1000
+    if km_value >= 1:
+        unit_label = f"{km_value:.{0 if km_value % 1 == 0 else 1}f} km"
+    else:
+        unit_label = f"{distance_meters:.0f} m"
+    return f"{base} ({unit_label})"
+
+
+class Target(NamedTuple):
+    speed_kmh: float
+    pace: str
+    split: str
+    split_seconds: Optional[int]
+
+
+class PaceTargets:
+    """Memoized targets per (VMA, %VMA, distance)"""
+
+    def __init__(self):
+        self._targets: Dict[Tuple[float, float, Optional[float]], Target] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def target(self, vma: float, vma_percent: float, distance_meters: Optional[float]) -> Target:
+        key = (vma, vma_percent, distance_meters)
+        target = self._targets.get(key)
+        if target is not None:
+            self.hits += 1
+            return target
+
+        self.misses += 1
+        speed = vma * vma_percent / 100
+        if distance_meters and speed > 0:
+            split_seconds = _round(distance_meters / (speed * 1000 / 3600))
+            split = format_elapsed(split_seconds)
+        else:
+            split_seconds = None
+            split = '-'
+        target = Target(speed, format_pace_per_km(speed), split, split_seconds)
+        self._targets[key] = target
+        return target
+
+    def __len__(self) -> int:
+        return len(self._targets)
+
+
+class Athlete(NamedTuple):
+    athlete_id: str
+    vma: float
+    group: Optional[str] = None
+
+
+def read_roster(path: str) -> Iterator[Tuple[str, Dict[str, str], Athlete]]:
+    """(file:line, raw row, athlete) of each roster CSV row, with its VMA checked.
+
+    The CSV has athlete_id, vma and an optional group column; other columns
+    stay in the raw row for callers that need them, e.g. intervals_upload.
+    """
+    with open(path, newline='', encoding='utf-8') as f:
+        for line, row in enumerate(csv.DictReader(f), start=2):
+            location = f"{path}:{line}"
+            try:
+                vma = float(row.get('vma') or '')
+            except ValueError:
+                raise ValueError(f"{location}: invalid vma {row.get('vma')!r}") from None
+            if not math.isfinite(vma) or vma <= 0:
+                raise ValueError(f"{location}: vma must be a positive number")
+            yield location, row, Athlete((row.get('athlete_id') or '').strip(), vma,
+                                         (row.get('group') or '').strip() or None)
+
+
+def load_athletes(path: str) -> List[Athlete]:
+    """Roster CSV with athlete_id, vma and an optional group column"""
+    return [athlete for _, _, athlete in read_roster(path)]
+
+
+class PlanTargets:
+    """Targets of one plan, materialized once per distinct VMA.
+
+    ``groups(vma)`` returns the plan's groups with, for every set, the target
+    pace, split time per rep and recovery timings; ``athlete_json`` gives the
+    compact per-athlete record.
+    """
+
+    def __init__(self, plan: Dict[str, Any], targets: Optional[PaceTargets] = None):
+        self.plan = plan
+        self.targets = targets or PaceTargets()
+        self._groups: Dict[float, List[Dict[str, Any]]] = {}
+        self._group_json: Dict[Tuple[float, Optional[str]], str] = {}
+
+    def _set_targets(self, set_data: Dict[str, Any], vma: float) -> Dict[str, Any]:
+        distance = set_data.get('distanceMeters')
+        target = self.targets.target(vma, set_data['vmaPercent'], distance)
+        record = {
+            'reps': set_data['repetitions'],
+            'vmaPercent': set_data['vmaPercent'],
+            'pace': target.pace,
+        }
+        if distance:
+            record['distanceMeters'] = distance
+            record['split'] = target.split
+            record['splitSeconds'] = target.split_seconds
+        else:
+            record['durationSeconds'] = set_data.get('durationSeconds')
+            record['split'] = format_elapsed(int(set_data.get('durationSeconds') or 0))
+        record['recovery'] = format_elapsed(int(set_data.get('recoverySeconds') or 0))
+        record['recoveryType'] = set_data.get('recoveryType')
+        return record
+
+    def groups(self, vma: float) -> List[Dict[str, Any]]:
+        groups = self._groups.get(vma)
+        if groups is None:
+            groups = []
+            for group in self.plan.get('groups', []):
+                blocks = []
+                for block in group.get('blocks', []):
+                    materialized = {
+                        'title': block.get('title'),
+                        'sets': [self._set_targets(set_data, vma) for set_data in block.get('sets', [])],
+                    }
+                    if block.get('afterRecoverySeconds') is not None:
+                        materialized['afterRecovery'] = format_elapsed(int(block['afterRecoverySeconds']))
+                        materialized['afterRecoveryType'] = block.get('afterRecoveryType', 'rest')
+                    blocks.append(materialized)
+                groups.append({'title': group.get('title'), 'blocks': blocks})
+            self._groups[vma] = groups
+        return groups
+
+    @property
+    def distinct_vmas(self) -> int:
+        return len(self._groups)
+
+    def _groups_json(self, vma: float, group_title: Optional[str]) -> str:
+        key = (vma, group_title)
+        serialized = self._group_json.get(key)
+        if serialized is None:
+            groups = self.groups(vma)
+            if group_title is not None:
+                groups = [group for group in groups if group['title'] == group_title]
+            serialized = plan_json.dumps_compact(groups).decode('utf-8')
+            self._group_json[key] = serialized
+        return serialized
+
+    def athlete_json(self, athlete: Athlete) -> str:
+        """One compact JSON line for an athlete; only the id differs between athletes of equal VMA"""
+        # allow_nan=False: a NaN or infinite VMA would make the line invalid JSON
+        vma = json.dumps(athlete.vma, allow_nan=False)
+        return (f'{{"athlete":{json.dumps(athlete.athlete_id, ensure_ascii=False)},"vma":{vma},'
+                f'"groups":{self._groups_json(athlete.vma, athlete.group)}}}')
+
+
+def write_targets(plan: Dict[str, Any], roster: Sequence[Athlete], out: IO[str],
+                  targets: Optional[PaceTargets] = None) -> PlanTargets:
+    """Write one NDJSON line of targets per athlete"""
+    plan_targets = PlanTargets(plan, targets)
+    for athlete in roster:
+        out.write(plan_targets.athlete_json(athlete))
+        out.write('\n')
+    return plan_targets
+
+
+class _NullWriter:
+    def write(self, text: str) -> int:
+        return len(text)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Materialize per-athlete pace targets of a plan")
+    parser.add_argument('plan', nargs='?', default=EXAMPLE_PLAN, help="Plan JSON file (default: the bundled example)")
+    parser.add_argument('roster', nargs='?', help="CSV with athlete_id, vma and optional group columns")
+    parser.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    parser.add_argument('--roster-size', type=int, default=10000,
+                        help="Without a roster, benchmark a synthetic roster of this size")
+    args = parser.parse_args(argv)
+
+    with open(args.plan, encoding='utf-8') as f:
+        plan = json.load(f)
+
+    if args.roster:
+        roster = load_athletes(args.roster)
+        if args.output == '-':
+            write_targets(plan, roster, sys.stdout)
+        else:
+            with open(args.output, 'w', encoding='utf-8') as out:
+                write_targets(plan, roster, out)
+        return 0
+
+    # VMAs of a club cluster on 0.5 km/h steps
+    rng = random.Random(0)
+    roster = [Athlete(f"a{i}", rng.randrange(20, 41) / 2) for i in range(args.roster_size)]
+    start = time.perf_counter()
+    plan_targets = write_targets(plan, roster, _NullWriter())
+    elapsed = time.perf_counter() - start
+    targets = plan_targets.targets
+    print(f"{len(roster)} athletes, {plan_targets.distinct_vmas} distinct VMAs: {elapsed * 1000:.1f}ms "
+          f"({len(roster) / elapsed:,.0f} athletes/s), {len(targets)} targets computed, {targets.hits} memo hits")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
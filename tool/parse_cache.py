@@ -0,0 +1,145 @@
+# file: parse_cache.py
+import hashlib
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+import plan_json
+from training_plan_converter import (
+    CONVERTER_VERSION, ENGINE_SINGLE_PASS, GroupCallback, TrainingPlanConverter, validate_json_structure,
+)
+
+
+def normalize_notes(text: str) -> str:
+    """Canonical form of pasted notes: composed accents and \\n line endings"""
+    return unicodedata.normalize('NFC', text).replace('\r\n', '\n').replace('\r', '\n')
+
+
+class ParseCache:
+    """Content-addressed cache of parsed plans and their validation errors.
+
+    Entries are keyed by a hash of the normalized notes and the converter
+    version, kept in an in-memory LRU bounded by entry count and bytes, and
+    optionally mirrored to a directory so later runs start warm. Entries are
+    stored as compact JSON so callers always get their own copy of the plan.
+    """
+
+    def __init__(self, converter: Optional[TrainingPlanConverter] = None, max_entries: int = 256,
+                 max_bytes: int = 16 * 1024 * 1024, directory: Optional[str] = None):
+        self.converter = converter or TrainingPlanConverter(engine=ENGINE_SINGLE_PASS)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.directory = directory
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self._entries: 'OrderedDict[str, bytes]' = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def key(self, text: str) -> str:
+        return self._key(normalize_notes(text))
+
+    def get_or_parse(self, text: str, on_group: Optional[GroupCallback] = None) -> Tuple[Dict[str, Any], List[str]]:
+        """Return (plan, validation errors) for the notes, parsing only on a miss.
+
+        ``on_group`` is passed to the converter on a miss and called with the
+        cached groups on a hit, so callers see every group either way.
+        """
+        normalized = normalize_notes(text)
+        key = self._key(normalized)
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+
+        if entry is None:
+            entry = self._read_disk(key)
+            if entry is not None:
+                with self._lock:
+                    self.disk_hits += 1
+                    self._store(key, entry)
+
+        hit = entry is not None
+        if not hit:
+            if on_group is None:
+                plan = self.converter.parse_training_notes(normalized)
+            else:
+                plan = self.converter.parse_training_notes(normalized, on_group)
+            errors = validate_json_structure(plan, getattr(self.converter, 'instrumentation', None))
+            entry = plan_json.dumps_compact({'plan': plan, 'errors': errors})
+            with self._lock:
+                self.misses += 1
+                self._store(key, entry)
+            self._write_disk(key, entry)
+
+        cached = plan_json.loads(entry)
+        if hit and on_group is not None:
+            for index, group in enumerate(cached['plan']['groups']):
+                on_group(index, group)
+        return cached['plan'], cached['errors']
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'disk_hits': self.disk_hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+            }
+
+    def clear(self):
+        """Drop the in-memory entries; the on-disk store is left untouched"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def _key(self, normalized: str) -> str:
+        return hashlib.sha256(f"{CONVERTER_VERSION}\0{normalized}".encode('utf-8')).hexdigest()
+
+    def _store(self, key: str, entry: bytes):
+        # Caller holds the lock
+        if key in self._entries:
+            return
+        size = len(entry)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = entry
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key[:2], f"{key}.json")
+
+    def _read_disk(self, key: str) -> Optional[bytes]:
+        if not self.directory:
+            return None
+        try:
+            with open(self._path(key), 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def _write_disk(self, key: str, entry: bytes):
+        if not self.directory:
+            return
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Write then rename so concurrent workers never read a partial entry
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(entry)
+        os.replace(tmp_path, path)
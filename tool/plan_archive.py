@@ -0,0 +1,401 @@
+# file: plan_archive.py
+"""Pack many plans into one indexed archive file and query it.
+
+Layout (little-endian):
+
+- header: magic ``VMAPARC1``, then the offset and length of the index meta;
+- plan records: each plan as zlib-compressed compact JSON;
+- index columns, one contiguous typed array each, 8-byte aligned:
+  per plan its record offset/length, date and first set row; per set its
+  plan, group, block, group title id, repetitions, distance, duration and
+  %VMA;
+- sorted indexes: plan numbers ordered by date next to the sorted dates, set
+  rows ordered by distance and by %VMA next to the sorted values, and set rows
+  grouped by group title (a posting list per title);
+- index meta: JSON with counts, the group title table, the posting list
+  bounds and column positions.
+
+The reader memory-maps the file and exposes the columns as zero-copy
+memoryviews. A query bisects each sorted index for its bounds, checks the
+remaining bounds only on the rows of the narrowest candidate range, and
+decompresses only the plans that contain a match.
+
+Usage:
+    python plan_archive.py pack seasons.vpa plans/*.json season.ndjson
+    python plan_archive.py query seasons.vpa --min-distance 1000 --min-percent 95
+    python plan_archive.py info seasons.vpa
+"""
+import argparse
+import bisect
+import datetime
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+import time
+import zlib
+from array import array
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+import plan_json
+
+MAGIC = b'VMAPARC1'
+HEADER = struct.Struct('<8sQQ')
+FORMAT_VERSION = 2
+
+# (name, typecode) of the per-plan and per-set index columns
+PLAN_COLUMNS = (('offset', 'Q'), ('length', 'I'), ('date', 'i'), ('first_set', 'I'))
+SET_COLUMNS = (('plan', 'I'), ('group', 'H'), ('block', 'H'), ('title', 'I'), ('repetitions', 'I'),
+               ('distance', 'f'), ('duration', 'f'), ('percent', 'f'))
+# Sorted indexes: plan order by date, set row orders by distance / %VMA, set rows by group title
+INDEX_COLUMNS = (('date_order', 'I'), ('dates', 'i'), ('distance_order', 'I'), ('distances', 'f'),
+                 ('percent_order', 'I'), ('percents', 'f'), ('title_rows', 'I'))
+
+NO_DATE = 0
+DATE_IN_NAME = re.compile(r'(\d{4}-\d{2}-\d{2})')
+
+
+def date_ordinal(value: Optional[str]) -> int:
+    """Proleptic ordinal of an ISO date, NO_DATE when missing"""
+    return datetime.date.fromisoformat(value).toordinal() if value else NO_DATE
+
+
+def ordinal_date(ordinal: int) -> Optional[str]:
+    return datetime.date.fromordinal(ordinal).isoformat() if ordinal != NO_DATE else None
+
+
+def _float32(value: Optional[float]) -> Optional[float]:
+    # Bounds are rounded like the float32 columns they are compared with
+    return struct.unpack('<f', struct.pack('<f', value))[0] if value is not None else None
+
+
+def _native(column: array) -> array:
+    if sys.byteorder != 'little':
+        column = array(column.typecode, column)
+        column.byteswap()
+    return column
+
+
+class PlanArchiveWriter:
+    """Stream plans into an archive file; the index is written on close"""
+
+    def __init__(self, path: str, level: int = 6):
+        self.path = path
+        self.level = level
+        self._file = open(path, 'wb')
+        self._file.write(HEADER.pack(MAGIC, 0, 0))
+        self._plans = {name: array(code) for name, code in PLAN_COLUMNS}
+        self._sets = {name: array(code) for name, code in SET_COLUMNS}
+        self._titles: Dict[str, int] = {}
+
+    def add(self, plan: Dict[str, Any], date: Optional[str] = None) -> int:
+        """Append one plan with an optional ISO date; returns its index"""
+        record = zlib.compress(plan_json.dumps_compact(plan), self.level)
+        index = len(self._plans['offset'])
+        self._plans['offset'].append(self._file.tell())
+        self._plans['length'].append(len(record))
+        self._plans['date'].append(date_ordinal(date))
+        self._plans['first_set'].append(len(self._sets['plan']))
+        self._file.write(record)
+
+        sets = self._sets
+        for group_index, group in enumerate(plan.get('groups', [])):
+            title = self._titles.setdefault(group.get('title') or '', len(self._titles))
+            for block_index, block in enumerate(group.get('blocks', [])):
+                for set_data in block.get('sets', []):
+                    sets['plan'].append(index)
+                    sets['group'].append(group_index)
+                    sets['block'].append(block_index)
+                    sets['title'].append(title)
+                    sets['repetitions'].append(int(set_data.get('repetitions') or 0))
+                    sets['distance'].append(float(set_data.get('distanceMeters') or 0))
+                    sets['duration'].append(float(set_data.get('durationSeconds') or 0))
+                    sets['percent'].append(float(set_data.get('vmaPercent') or 0))
+        return index
+
+    def _write_columns(self, columns: Dict[str, array]) -> Dict[str, int]:
+        offsets = {}
+        for name, column in columns.items():
+            self._file.write(b'\0' * (-self._file.tell() % 8))
+            offsets[name] = self._file.tell()
+            self._file.write(_native(column).tobytes())
+        return offsets
+
+    def _indexes(self) -> Tuple[Dict[str, array], List[int]]:
+        """Sorted index columns and the bounds of each title's posting list"""
+        dates, sets = self._plans['date'], self._sets
+        columns = {name: array(code) for name, code in INDEX_COLUMNS}
+        columns['date_order'].extend(sorted(range(len(dates)), key=dates.__getitem__))
+        columns['dates'].extend(dates[i] for i in columns['date_order'])
+        for name, values in (('distance', sets['distance']), ('percent', sets['percent'])):
+            order = sorted(range(len(values)), key=values.__getitem__)
+            columns[f'{name}_order'].extend(order)
+            columns[f'{name}s'].extend(values[row] for row in order)
+        titles = sets['title']
+        columns['title_rows'].extend(sorted(range(len(titles)), key=titles.__getitem__))
+        starts = [0] * (len(self._titles) + 1)
+        for title in titles:
+            starts[title + 1] += 1
+        for title in range(len(self._titles)):
+            starts[title + 1] += starts[title]
+        return columns, starts
+
+    def close(self):
+        if self._file.closed:
+            return
+        indexes, title_starts = self._indexes()
+        meta = {
+            'version': FORMAT_VERSION,
+            'plans': len(self._plans['offset']),
+            'sets': len(self._sets['plan']),
+            'titles': sorted(self._titles, key=self._titles.get),
+            'plan_columns': self._write_columns(self._plans),
+            'set_columns': self._write_columns(self._sets),
+            'index_columns': self._write_columns(indexes),
+            'title_starts': title_starts,
+        }
+        meta_bytes = plan_json.dumps_compact(meta)
+        meta_offset = self._file.tell()
+        self._file.write(meta_bytes)
+        self._file.seek(0)
+        self._file.write(HEADER.pack(MAGIC, meta_offset, len(meta_bytes)))
+        self._file.close()
+
+    def __enter__(self) -> 'PlanArchiveWriter':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class BlockMatch(NamedTuple):
+    plan: int
+    date: Optional[str]
+    group: str
+    block: Dict[str, Any]
+
+
+class PlanArchive:
+    """Memory-mapped reader of a plan archive"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, meta_offset, meta_length = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or not meta_offset:
+            self.close()
+            raise ValueError(f"{path} is not a plan archive (or was not closed after writing)")
+        meta = plan_json.loads(self._mmap[meta_offset:meta_offset + meta_length])
+        if meta['version'] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"{path}: unsupported archive version {meta['version']}")
+
+        self.titles: List[str] = meta['titles']
+        self._view = memoryview(self._mmap)
+        self.plans = self._columns(PLAN_COLUMNS, meta['plan_columns'], meta['plans'])
+        self.sets = self._columns(SET_COLUMNS, meta['set_columns'], meta['sets'])
+        counts = {'date_order': meta['plans'], 'dates': meta['plans']}
+        self.indexes = {name: self._columns(((name, code),), meta['index_columns'],
+                                            counts.get(name, meta['sets']))[name]
+                        for name, code in INDEX_COLUMNS}
+        self._title_starts: List[int] = meta['title_starts']
+        # Plans decompressed by the last query
+        self.plans_loaded = 0
+
+    def _columns(self, layout, offsets: Dict[str, int], count: int) -> Dict[str, Any]:
+        columns = {}
+        for name, code in layout:
+            size = array(code).itemsize
+            raw = self._view[offsets[name]:offsets[name] + count * size]
+            columns[name] = raw.cast(code) if sys.byteorder == 'little' else _native(array(code, raw.tobytes()))
+        return columns
+
+    def __len__(self) -> int:
+        return len(self.plans['offset'])
+
+    def plan(self, index: int) -> Dict[str, Any]:
+        """Decompress one plan; only its record is read from the file"""
+        offset = self.plans['offset'][index]
+        return plan_json.loads(zlib.decompress(self._view[offset:offset + self.plans['length'][index]]))
+
+    def date(self, index: int) -> Optional[str]:
+        return ordinal_date(self.plans['date'][index])
+
+    def _plan_indexes(self, date_from: Optional[str], date_to: Optional[str]) -> Iterable[int]:
+        """Plans dated within the bounds, found by bisecting the sorted dates"""
+        if date_from is None and date_to is None:
+            return range(len(self))
+        low = date_ordinal(date_from) if date_from else NO_DATE + 1
+        high = date_ordinal(date_to) if date_to else datetime.date.max.toordinal()
+        dates = self.indexes['dates']
+        return self.indexes['date_order'][bisect.bisect_left(dates, low):bisect.bisect_right(dates, high)]
+
+    def _plan_rows(self, plan_index: int) -> range:
+        first_set = self.plans['first_set']
+        stop = first_set[plan_index + 1] if plan_index + 1 < len(first_set) else len(self.sets['plan'])
+        return range(first_set[plan_index], stop)
+
+    def _value_rows(self, name: str, low: Optional[float], high: Optional[float]) -> Sequence[int]:
+        """Set rows whose value lies within the bounds, from a sorted index"""
+        values = self.indexes[f'{name}s']
+        start = bisect.bisect_left(values, low) if low is not None else 0
+        stop = bisect.bisect_right(values, high) if high is not None else len(values)
+        return self.indexes[f'{name}_order'][start:stop]
+
+    def query(self, date_from: Optional[str] = None, date_to: Optional[str] = None,
+              group: Optional[str] = None, min_distance: Optional[float] = None,
+              max_distance: Optional[float] = None, min_percent: Optional[float] = None,
+              max_percent: Optional[float] = None, min_repetitions: Optional[int] = None) -> List[BlockMatch]:
+        """Blocks holding at least one set within every given bound (bounds are inclusive)"""
+        sets = self.sets
+        plan_column, group_column, block_column = sets['plan'], sets['group'], sets['block']
+        title_column, reps_column = sets['title'], sets['repetitions']
+        distance_column, percent_column = sets['distance'], sets['percent']
+        date_column = self.plans['date']
+
+        title_id = None
+        if group is not None:
+            if group not in self.titles:
+                return []
+            title_id = self.titles.index(group)
+        low_distance = _float32(min_distance)
+        high_distance = _float32(max_distance)
+        low_percent = _float32(min_percent)
+        high_percent = _float32(max_percent)
+        dated = date_from is not None or date_to is not None
+        low_date = date_ordinal(date_from) if date_from else NO_DATE + 1
+        high_date = date_ordinal(date_to) if date_to else datetime.date.max.toordinal()
+
+        # Candidate rows of each indexed bound; only the narrowest range is scanned
+        candidates: List[Sequence[int]] = []
+        if dated:
+            plans = self._plan_indexes(date_from, date_to)
+            candidates.append([row for plan_index in sorted(plans) for row in self._plan_rows(plan_index)])
+        if title_id is not None:
+            candidates.append(self.indexes['title_rows'][self._title_starts[title_id]:
+                                                         self._title_starts[title_id + 1]])
+        if low_distance is not None or high_distance is not None:
+            candidates.append(self._value_rows('distance', low_distance, high_distance))
+        if low_percent is not None or high_percent is not None:
+            candidates.append(self._value_rows('percent', low_percent, high_percent))
+        rows = min(candidates, key=len) if candidates else range(len(plan_column))
+
+        hits: List[Tuple[int, int, int]] = []
+        for row in sorted(rows) if candidates else rows:
+            if dated and not low_date <= date_column[plan_column[row]] <= high_date:
+                continue
+            if title_id is not None and title_column[row] != title_id:
+                continue
+            if low_distance is not None and distance_column[row] < low_distance:
+                continue
+            if high_distance is not None and distance_column[row] > high_distance:
+                continue
+            if low_percent is not None and percent_column[row] < low_percent:
+                continue
+            if high_percent is not None and percent_column[row] > high_percent:
+                continue
+            if min_repetitions is not None and reps_column[row] < min_repetitions:
+                continue
+            key = (plan_column[row], group_column[row], block_column[row])
+            if not hits or hits[-1] != key:
+                hits.append(key)
+
+        matches = []
+        loaded: Dict[int, Dict[str, Any]] = {}
+        for plan_index, group_index, block_index in hits:
+            plan = loaded.get(plan_index)
+            if plan is None:
+                plan = loaded[plan_index] = self.plan(plan_index)
+            plan_group = plan['groups'][group_index]
+            matches.append(BlockMatch(plan_index, self.date(plan_index), plan_group.get('title', ''),
+                                      plan_group['blocks'][block_index]))
+        self.plans_loaded = len(loaded)
+        return matches
+
+    def close(self):
+        # Column views must be released before the map can close
+        for columns in (getattr(self, 'plans', {}), getattr(self, 'sets', {}), getattr(self, 'indexes', {})):
+            for column in columns.values():
+                if isinstance(column, memoryview):
+                    column.release()
+        if getattr(self, '_view', None) is not None:
+            self._view.release()
+            self._view = None
+        self._mmap.close()
+        self._file.close()
+
+    def __enter__(self) -> 'PlanArchive':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def iter_plan_files(paths: Iterable[str]) -> Iterable[Tuple[Dict[str, Any], Optional[str]]]:
+    """(plan, date) of JSON files and NDJSON exports; dates come from YYYY-MM-DD in file names"""
+    for path in paths:
+        match = DATE_IN_NAME.search(os.path.basename(path))
+        date = match.group(1) if match else None
+        with open(path, encoding='utf-8') as f:
+            if path.endswith('.ndjson'):
+                for line in f:
+                    if line.strip():
+                        yield plan_json.loads(line), date
+            else:
+                yield plan_json.load(f), date
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Pack plans into an indexed archive and query it")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    pack = commands.add_parser('pack', help="Write an archive from plan JSON / NDJSON files")
+    pack.add_argument('archive')
+    pack.add_argument('inputs', nargs='+')
+
+    query = commands.add_parser('query', help="Print blocks with a set matching every bound, as NDJSON")
+    query.add_argument('archive')
+    query.add_argument('--from', dest='date_from', help="First date, YYYY-MM-DD")
+    query.add_argument('--to', dest='date_to', help="Last date, YYYY-MM-DD")
+    query.add_argument('--group', help="Group title, e.g. 'Groupe 1'")
+    query.add_argument('--min-distance', type=float)
+    query.add_argument('--max-distance', type=float)
+    query.add_argument('--min-percent', type=float)
+    query.add_argument('--max-percent', type=float)
+    query.add_argument('--min-reps', type=int)
+
+    info = commands.add_parser('info', help="Print archive statistics")
+    info.add_argument('archive')
+    args = parser.parse_args(argv)
+
+    if args.command == 'pack':
+        start = time.perf_counter()
+        with PlanArchiveWriter(args.archive) as writer:
+            count = sum(1 for plan, date in iter_plan_files(args.inputs) if writer.add(plan, date) is not None)
+        print(f"Packed {count} plans into {args.archive} ({os.path.getsize(args.archive) / 1024:.1f} KB) "
+              f"in {time.perf_counter() - start:.2f}s")
+        return 0
+
+    with PlanArchive(args.archive) as archive:
+        if args.command == 'info':
+            dates = [d for d in archive.plans['date'] if d != NO_DATE]
+            print(f"{len(archive)} plans, {len(archive.sets['plan'])} sets, {len(archive.titles)} group titles, "
+                  f"dates {ordinal_date(min(dates)) if dates else '-'} .. {ordinal_date(max(dates)) if dates else '-'}")
+            return 0
+
+        start = time.perf_counter()
+        matches = archive.query(args.date_from, args.date_to, args.group, args.min_distance, args.max_distance,
+                                args.min_percent, args.max_percent, args.min_reps)
+        elapsed = time.perf_counter() - start
+        for match in matches:
+            print(json.dumps(match._asdict(), ensure_ascii=False))
+        print(f"{len(matches)} blocks from {archive.plans_loaded}/{len(archive)} plans in {elapsed * 1000:.1f}ms",
+              file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
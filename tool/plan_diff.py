@@ -0,0 +1,646 @@
+# file: plan_diff.py
+"""Canonical hashes of plans, groups and blocks, duplicate lookup and structural diffs.
+
+One bottom-up pass gives every node of a plan a digest per kind, each node
+hashing its own fields and the digests of its children:
+
+- ``exact``: every field after canonicalization (keys sorted, whole floats
+  as integers, strings NFC-normalized), so a re-serialized copy hashes alike;
+- ``shape``: the same without the texts (title, warmup, cooldown, remarks);
+- ``distance``, ``intensity``, ``repetitions``, ``recovery``: the shape
+  without one family of set fields. Blocks or groups with the same
+  ``distance`` digest but different shapes differ only in their distances,
+  like Groupe 1 and Groupe 2 of the sample notes.
+
+PlanIndex files every plan, group and block of an archive under these
+digests, so exact and near duplicates come from one dict lookup per node
+rather than comparing every pair. For each new plan it also picks the
+earlier plan sharing the most equal or near-equal blocks as the base to diff
+it against.
+
+``diff_plans`` returns a JSON Patch (RFC 6902) from one plan to another.
+Lists are aligned on exact digests, so unchanged groups and blocks cost
+nothing; paired items are compared field by field; an added group or block
+is written as a ``copy`` of an equal or near-equal one earlier in the plan
+plus its differences when that is shorter. ``apply_diff`` gives back a plan
+equal to the target up to canonicalization.
+
+Usage:
+    python plan_diff.py diff old.json new.json [-o patch.json]
+    python plan_diff.py apply old.json patch.json [-o new.json]
+    python plan_diff.py dedup plans/*.json season.vpa [--top 10]
+    python plan_diff.py benchmark --plans 2000
+"""
+import argparse
+import copy
+import hashlib
+import itertools
+import random
+import sys
+import time
+import unicodedata
+from collections import ChainMap, Counter
+from difflib import SequenceMatcher
+from typing import Any, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+import plan_json
+from plan_archive import PlanArchive, iter_plan_files
+
+PLAN = 'plan'
+GROUP = 'group'
+BLOCK = 'block'
+SET = 'set'
+# level -> (key holding its children, their level)
+CHILDREN = {PLAN: ('groups', GROUP), GROUP: ('blocks', BLOCK), BLOCK: ('sets', SET)}
+# Levels PlanIndex records; a set alone is too small to be worth sharing
+INDEXED_LEVELS = (PLAN, GROUP, BLOCK)
+
+TEXT_FIELDS = ('title', 'warmup', 'cooldown', 'remarks')
+# Field families left out by the near-duplicate kinds
+MASKS = {
+    'distance': ('distanceMeters', 'durationSeconds'),
+    'intensity': ('vmaPercent',),
+    'repetitions': ('repetitions',),
+    'recovery': ('recoverySeconds', 'recoveryType', 'afterRecoverySeconds', 'afterRecoveryType'),
+}
+KINDS = ('exact', 'shape') + tuple(MASKS)
+EXACT = 0
+SHAPE = 1
+# Fields left out of the digest of each kind
+_DROPPED = (frozenset(), frozenset(TEXT_FIELDS)) + tuple(frozenset(TEXT_FIELDS + fields) for fields in MASKS.values())
+DIGEST_SIZE = 16
+
+Digests = Tuple[bytes, ...]
+Patch = List[Dict[str, Any]]
+
+
+def canonical(value: Any) -> Any:
+    """Equal for values that only differ in key order, 80.0 against 80 or Unicode normalization"""
+    if isinstance(value, dict):
+        return {key: canonical(value[key]) for key in sorted(value)}
+    if isinstance(value, list):
+        return [canonical(item) for item in value]
+    if type(value) is float and value.is_integer():
+        return int(value)
+    if type(value) is str:
+        return unicodedata.normalize('NFC', value)
+    return value
+
+
+def _same(a: Any, b: Any) -> bool:
+    # Encoded, so True and 1 stay different
+    return plan_json.dumps_compact(canonical(a)) == plan_json.dumps_compact(canonical(b))
+
+
+class NodeHash(NamedTuple):
+    level: str
+    path: str  # JSON Pointer of the node in its plan
+    digests: Digests  # one per KINDS
+    size: int  # length of its canonical encoding, close to its minified JSON
+
+
+def _hash_node(node: Any, level: str, path: str, out: Optional[List[NodeHash]],
+               memo: Optional[Dict[int, Digests]]) -> Tuple[Digests, int]:
+    children = CHILDREN.get(level)
+    child_digests: Optional[List[Digests]] = None
+    size = 0
+    if isinstance(node, dict):
+        # repr of canonical values is deterministic and much cheaper than JSON
+        fields = []
+        for key in sorted(node):
+            value = node[key]
+            if children is not None and key == children[0] and isinstance(value, list):
+                results = [_hash_node(item, children[1], f"{path}/{key}/{index}", out, memo)
+                           for index, item in enumerate(value)]
+                child_digests = [digests for digests, _ in results]
+                size += sum(child_size for _, child_size in results)
+            else:
+                fields.append((key, repr((key, canonical(value)))))
+        keys = [key for key, _ in fields]
+        exact = '\0'.join(text for _, text in fields)
+        encodings = [exact if dropped.isdisjoint(keys) else '\0'.join(text for key, text in fields if key not in dropped)
+                     for dropped in _DROPPED]
+    else:
+        encodings = [repr(canonical(node))] * len(KINDS)
+    size += len(encodings[EXACT])
+
+    prefix = level + ('\0' if child_digests is None else '\1')
+    hashed: Dict[str, bytes] = {}
+    digests = []
+    for kind, encoding in enumerate(encodings):
+        if child_digests is None and encoding in hashed:
+            digests.append(hashed[encoding])
+            continue
+        data = (prefix + encoding).encode('utf-8')
+        if child_digests is not None:
+            data += b''.join(child[kind] for child in child_digests)
+        hashed[encoding] = hashlib.sha256(data).digest()[:DIGEST_SIZE]
+        digests.append(hashed[encoding])
+    digests = tuple(digests)
+    if memo is not None:
+        memo[id(node)] = digests
+    if out is not None and level in INDEXED_LEVELS:
+        out.append(NodeHash(level, path, digests, size))
+    return digests, size
+
+
+def hash_nodes(plan: Dict[str, Any]) -> List[NodeHash]:
+    """Digests of the plan, its groups and its blocks, children before parents"""
+    nodes: List[NodeHash] = []
+    _hash_node(plan, PLAN, '', nodes, None)
+    return nodes
+
+
+def plan_hash(plan: Dict[str, Any], kind: str = 'exact') -> str:
+    """Hex digest of a plan; equal for plans that only differ in formatting"""
+    digests, _ = _hash_node(plan, PLAN, '', None, None)
+    return digests[KINDS.index(kind)].hex()
+
+
+def describe(node: Any) -> str:
+    """Short text of a plan, group, block or set for reports"""
+    if not isinstance(node, dict):
+        return plan_json.dumps_compact(node).decode('utf-8')
+    if 'groups' in node:
+        return f"{node.get('title', '?')} ({len(node['groups'])} groups)"
+    if 'blocks' in node:
+        return f"{node.get('title', '?')} ({len(node['blocks'])} blocks)"
+    if 'sets' in node:
+        return f"{node.get('title', '?')}: " + ', '.join(describe(set_data) for set_data in node['sets'])
+    if 'repetitions' in node:
+        amount = (f"{node['distanceMeters']:g}m" if 'distanceMeters' in node
+                  else f"{node.get('durationSeconds', 0) / 60:g}'")
+        return f"{node['repetitions']}x{amount}@{node.get('vmaPercent', 0):g}%"
+    return plan_json.dumps_compact(node).decode('utf-8')
+
+
+class Occurrence(NamedTuple):
+    plan: int  # order in which the plan was added to the index
+    path: str
+
+
+class PlanIndex:
+    """Plans, groups and blocks of an archive filed by digest.
+
+    Adding a plan costs one hash pass and a few dict operations per group and
+    block, whatever the size of the archive.
+    """
+
+    def __init__(self, candidates: int = 8):
+        self.labels: List[str] = []
+        # Earlier plan sharing the most blocks with each plan, or None
+        self.bases: List[Optional[int]] = []
+        self.nodes: Counter = Counter()
+        self.bytes: Counter = Counter()
+        # Bytes of nodes whose shape was already in the index
+        self.repeated_bytes: Counter = Counter()
+        # Recent occurrences of a shape looked at when picking a base
+        self.candidates = candidates
+        self._shapes: Dict[str, Dict[bytes, List[Occurrence]]] = {level: {} for level in INDEXED_LEVELS}
+        # (kind, digest) -> shape -> first occurrence, for the near-duplicate kinds
+        self._near: Dict[str, Dict[Tuple[int, bytes], Dict[bytes, Occurrence]]] = {
+            level: {} for level in INDEXED_LEVELS}
+
+    def __len__(self) -> int:
+        return len(self.labels)
+
+    def distinct(self, level: str) -> int:
+        return len(self._shapes[level])
+
+    def add(self, plan: Dict[str, Any], label: Optional[str] = None) -> int:
+        """Index a plan; returns its number"""
+        number = len(self.labels)
+        nodes = hash_nodes(plan)
+        self.labels.append(label or f"#{number}")
+        self.bases.append(self._base(nodes))
+        for node in nodes:
+            shape = node.digests[SHAPE]
+            occurrence = Occurrence(number, node.path)
+            self.nodes[node.level] += 1
+            self.bytes[node.level] += node.size
+            seen = self._shapes[node.level].setdefault(shape, [])
+            if seen:
+                self.repeated_bytes[node.level] += node.size
+            seen.append(occurrence)
+            near = self._near[node.level]
+            for kind in range(SHAPE + 1, len(KINDS)):
+                near.setdefault((kind, node.digests[kind]), {}).setdefault(shape, occurrence)
+        return number
+
+    def _base(self, nodes: List[NodeHash]) -> Optional[int]:
+        votes: Counter = Counter()
+        shapes = self._shapes[BLOCK]
+        near = self._near[BLOCK]
+        for node in nodes:
+            if node.level != BLOCK:
+                continue
+            for occurrence in itertools.islice(reversed(shapes.get(node.digests[SHAPE], ())), self.candidates):
+                votes[occurrence.plan] += len(MASKS)
+            for kind in range(SHAPE + 1, len(KINDS)):
+                bucket = near.get((kind, node.digests[kind]))
+                if bucket:
+                    for occurrence in itertools.islice(reversed(bucket.values()), self.candidates):
+                        votes[occurrence.plan] += 1
+        if not votes:
+            return None
+        # Most votes, then the latest plan
+        return max(votes.items(), key=lambda item: (item[1], item[0]))[0]
+
+    def duplicates(self, level: str = BLOCK) -> List[List[Occurrence]]:
+        """Occurrences of every shape seen more than once, most repeated first"""
+        return sorted((seen for seen in self._shapes[level].values() if len(seen) > 1), key=len, reverse=True)
+
+    def near_duplicates(self, level: str = BLOCK) -> List[Tuple[str, List[Occurrence]]]:
+        """(kind, first occurrence of each shape) of shapes that differ only in the fields of that kind"""
+        clusters = [(KINDS[kind], list(shapes.values()))
+                    for (kind, _), shapes in self._near[level].items() if len(shapes) > 1]
+        return sorted(clusters, key=lambda cluster: len(cluster[1]), reverse=True)
+
+
+def _pointer(path: str, key: str) -> str:
+    return f"{path}/{key.replace('~', '~0').replace('/', '~1')}"
+
+
+def resolve(document: Any, pointer: str) -> Any:
+    """Value at a JSON Pointer; ValueError when it does not exist"""
+    value = document
+    if pointer:
+        for token in pointer[1:].split('/'):
+            token = token.replace('~1', '/').replace('~0', '~')
+            try:
+                if isinstance(value, list):
+                    if not token.isdigit():
+                        raise IndexError(token)
+                    value = value[int(token)]
+                else:
+                    value = value[token]
+            except (IndexError, KeyError, TypeError) as e:
+                raise ValueError(f"No value at {pointer}") from e
+    return value
+
+
+class _PatchBuilder:
+    def __init__(self, digests: Dict[int, Digests], sources: Optional[ChainMap] = None):
+        self.digests = digests
+        self.ops: Patch = []
+        # (kind, digest) -> (pointer, node) of groups and blocks already final in
+        # the patched plan, which later operations never shift; None disables copies
+        self.sources = sources
+
+    def _candidate(self) -> '_PatchBuilder':
+        # Copy sources it finds are dropped with it unless it is chosen
+        return _PatchBuilder(self.digests, self.sources.new_child())
+
+    def node(self, old: Any, new: Any, level: str, path: str):
+        if self.digests[id(old)][EXACT] == self.digests[id(new)][EXACT]:
+            return
+        if not isinstance(old, dict) or not isinstance(new, dict):
+            self.ops.append({'op': 'replace', 'path': path, 'value': new})
+            return
+        children = CHILDREN.get(level)
+        for key in old:
+            if key not in new:
+                self.ops.append({'op': 'remove', 'path': _pointer(path, key)})
+        for key, value in new.items():
+            target = _pointer(path, key)
+            if key not in old:
+                self.ops.append({'op': 'add', 'path': target, 'value': value})
+            elif (children is not None and key == children[0]
+                  and isinstance(old[key], list) and isinstance(value, list)):
+                self.list(old[key], value, children[1], target)
+            elif not _same(old[key], value):
+                self.ops.append({'op': 'replace', 'path': target, 'value': value})
+
+    def list(self, old_items: List[Any], new_items: List[Any], level: str, path: str):
+        matcher = SequenceMatcher(None, [self.digests[id(item)][EXACT] for item in old_items],
+                                  [self.digests[id(item)][EXACT] for item in new_items], autojunk=False)
+        # Items before j1 already match new_items, so old items i1.. sit at j1..
+        for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+            paired = min(i2 - i1, j2 - j1)
+            for k in range(paired):
+                self.node(old_items[i1 + k], new_items[j1 + k], level, f"{path}/{j1 + k}")
+                self.finished(new_items[j1 + k], level, f"{path}/{j1 + k}")
+            for _ in range(i2 - i1 - paired):
+                self.ops.append({'op': 'remove', 'path': f"{path}/{j1 + paired}"})
+            for j in range(j1 + paired, j2):
+                self.add(new_items[j], level, f"{path}/{j}")
+                self.finished(new_items[j], level, f"{path}/{j}")
+
+    def add(self, value: Any, level: str, path: str):
+        """Add a node, as a copy of an earlier one plus changes when that is shorter"""
+        added: Patch = [{'op': 'add', 'path': path, 'value': value}]
+        if self.sources is None or level not in (GROUP, BLOCK):
+            self.ops.extend(added)
+            return
+        candidates = [(len(plan_json.dumps_compact(added)), added, None)]
+        tried = set()
+        for kind, digest in enumerate(self.digests[id(value)]):
+            source = self.sources.get((kind, digest))
+            if source is None or source[0] in tried:
+                continue
+            tried.add(source[0])
+            builder = self._candidate()
+            builder.ops.append({'op': 'copy', 'from': source[0], 'path': path})
+            builder.node(source[1], value, level, path)
+            candidates.append((len(plan_json.dumps_compact(builder.ops)), builder.ops, builder.sources))
+            if kind == EXACT:
+                break
+        exact = (EXACT, self.digests[id(value)][EXACT]) in self.sources
+        if level == GROUP and not exact and isinstance(value, dict) and value.get('blocks'):
+            # An empty group, then each block added on its own (copied when possible)
+            builder = self._candidate()
+            builder.ops.append({'op': 'add', 'path': path,
+                                'value': {key: [] if key == 'blocks' else item for key, item in value.items()}})
+            for index, block in enumerate(value['blocks']):
+                builder.add(block, BLOCK, f"{path}/blocks/{index}")
+                builder.finished(block, BLOCK, f"{path}/blocks/{index}")
+            candidates.append((len(plan_json.dumps_compact(builder.ops)), builder.ops, builder.sources))
+        _, ops, sources = min(candidates, key=lambda candidate: candidate[0])
+        self.ops.extend(ops)
+        if sources is not None:
+            self.sources.update(sources.maps[0])
+
+    def finished(self, node: Any, level: str, path: str):
+        """Offer a group or block whose place in the patched plan is final as a copy source"""
+        if self.sources is None or level not in (GROUP, BLOCK):
+            return
+        for kind, digest in enumerate(self.digests[id(node)]):
+            self.sources.setdefault((kind, digest), (path, node))
+        if level == GROUP and isinstance(node, dict) and isinstance(node.get('blocks'), list):
+            for index, block in enumerate(node['blocks']):
+                self.finished(block, BLOCK, f"{path}/blocks/{index}")
+
+
+def diff_plans(old: Dict[str, Any], new: Dict[str, Any], copies: bool = True) -> Patch:
+    """JSON Patch turning ``old`` into ``new``; ``copies=False`` never copies groups or blocks"""
+    digests: Dict[int, Digests] = {}
+    _hash_node(old, PLAN, '', None, digests)
+    _hash_node(new, PLAN, '', None, digests)
+    builder = _PatchBuilder(digests, ChainMap() if copies else None)
+    builder.node(old, new, PLAN, '')
+    return builder.ops
+
+
+def apply_operation(document: Any, operation: Dict[str, Any]) -> Tuple[Any, Any]:
+    """Apply one operation in place; returns the document and the value it replaced or removed"""
+    kind = operation.get('op')
+    path = operation.get('path')
+    if kind == 'copy':
+        value = copy.deepcopy(resolve(document, operation['from']))
+    elif kind in ('add', 'replace'):
+        value = copy.deepcopy(operation['value'])
+    elif kind != 'remove':
+        raise ValueError(f"Unsupported patch operation: {kind!r}")
+    if not isinstance(path, str) or (path and not path.startswith('/')):
+        raise ValueError(f"Invalid patch path: {path!r}")
+    if not path:
+        if kind == 'remove':
+            raise ValueError("Cannot remove the whole plan")
+        return value, document
+
+    parent_path, _, token = path.rpartition('/')
+    token = token.replace('~1', '/').replace('~0', '~')
+    parent = resolve(document, parent_path)
+    previous = None
+    if isinstance(parent, list):
+        if kind in ('add', 'copy') and token == '-':
+            token = str(len(parent))
+        limit = len(parent) if kind in ('add', 'copy') else len(parent) - 1
+        if not token.isdigit() or int(token) > limit:
+            raise ValueError(f"Invalid patch path: {path}")
+        index = int(token)
+        if kind in ('add', 'copy'):
+            parent.insert(index, value)
+        elif kind == 'replace':
+            previous, parent[index] = parent[index], value
+        else:
+            previous = parent.pop(index)
+    elif isinstance(parent, dict):
+        if kind in ('replace', 'remove') and token not in parent:
+            raise ValueError(f"Invalid patch path: {path}")
+        previous = parent.get(token)
+        if kind == 'remove':
+            del parent[token]
+        else:
+            parent[token] = value
+    else:
+        raise ValueError(f"Invalid patch path: {path}")
+    return document, previous
+
+
+def apply_diff(plan: Dict[str, Any], patch: Patch) -> Dict[str, Any]:
+    """The plan with a patch applied; the input is left unchanged"""
+    document = copy.deepcopy(plan)
+    for operation in patch:
+        document, _ = apply_operation(document, operation)
+    return document
+
+
+def describe_operation(operation: Dict[str, Any], previous: Any = None) -> str:
+    """One review line per operation"""
+    kind = operation['op']
+    if kind == 'copy':
+        return f"copy    {operation['from']} -> {operation['path']}"
+    if kind == 'remove':
+        return f"remove  {operation['path']}" + (f"  ({describe(previous)})" if previous is not None else '')
+    if kind == 'replace' and not isinstance(operation['value'], (dict, list)):
+        return f"replace {operation['path']}: {describe(previous)} -> {describe(operation['value'])}"
+    return f"{kind:<7} {operation['path']}: {describe(operation['value'])}"
+
+
+def iter_plans(paths: Iterable[str]) -> Iterator[Tuple[Dict[str, Any], str]]:
+    """(plan, label) of plan JSON / NDJSON files and plan archives"""
+    for path in paths:
+        if path.endswith('.vpa'):
+            with PlanArchive(path) as archive:
+                for index in range(len(archive)):
+                    yield archive.plan(index), f"{path}#{index}"
+        elif path.endswith('.ndjson'):
+            for index, (plan, _) in enumerate(iter_plan_files([path])):
+                yield plan, f"{path}#{index}"
+        else:
+            for plan, _ in iter_plan_files([path]):
+                yield plan, path
+
+
+def diff_report(plans: List[Dict[str, Any]], index: PlanIndex) -> Dict[str, int]:
+    """Minified bytes of the plans against each plan stored as a diff from its base, when shorter"""
+    report = {'plans': len(plans), 'with_base': 0, 'full_bytes': 0, 'stored_bytes': 0}
+    for plan, base in zip(plans, index.bases):
+        full = len(plan_json.dumps_compact(plan))
+        stored = full
+        if base is not None:
+            stored = min(full, len(plan_json.dumps_compact(diff_plans(plans[base], plan))))
+            report['with_base'] += stored < full
+        report['full_bytes'] += full
+        report['stored_bytes'] += stored
+    return report
+
+
+def _print_index(index: PlanIndex, plans: List[Dict[str, Any]], top: int):
+    for level in INDEXED_LEVELS:
+        count = index.nodes[level]
+        repeated = index.repeated_bytes[level] / index.bytes[level] if index.bytes[level] else 0.0
+        print(f"  {level + 's':<7} {count:>8} ({index.distinct(level)} distinct shapes), "
+              f"{repeated:.0%} of their bytes repeat an earlier one")
+    for level in (GROUP, BLOCK):
+        kinds = Counter(kind for kind, _ in index.near_duplicates(level))
+        if kinds:
+            print(f"  near-duplicate {level} clusters: " + ', '.join(f"{kind} {kinds[kind]}" for kind in MASKS if kind in kinds))
+
+    if top:
+        print("Most repeated blocks:")
+        for occurrences in index.duplicates(BLOCK)[:top]:
+            first = occurrences[0]
+            print(f"  {len(occurrences):>5}x {describe(resolve(plans[first.plan], first.path))}"
+                  f"  (first: {index.labels[first.plan]} {first.path})")
+        print("Largest near-duplicate groups and blocks:")
+        clusters = sorted(index.near_duplicates(GROUP)[:top] + index.near_duplicates(BLOCK)[:top],
+                          key=lambda cluster: len(cluster[1]), reverse=True)
+        for kind, occurrences in clusters[:top]:
+            shown = ' ~ '.join(f"{index.labels[o.plan]} {o.path}" for o in occurrences[:3])
+            more = f" and {len(occurrences) - 3} more" if len(occurrences) > 3 else ''
+            print(f"  differ in {kind}: {shown}{more}")
+
+
+def _print_diff_report(report: Dict[str, int]):
+    full, stored = report['full_bytes'], report['stored_bytes']
+    print(f"Stored as diffs from the most similar earlier plan ({report['with_base']}/{report['plans']} plans): "
+          f"{full / 1024:.1f} KB -> {stored / 1024:.1f} KB ({stored / full if full else 1:.0%})")
+
+
+def _tweak(plan: Dict[str, Any], rng: random.Random) -> Dict[str, Any]:
+    """A copy of a plan with the small edits coaches make from one week to the next"""
+    plan = copy.deepcopy(plan)
+    groups = [group for group in plan['groups'] if group['blocks']]
+    for _ in range(rng.randint(1, 3)):
+        group = rng.choice(groups)
+        block = rng.choice(group['blocks'])
+        choice = rng.random()
+        if choice < 0.4:
+            factor = rng.choice((0.8, 1.25))
+            for set_data in block['sets']:
+                if 'distanceMeters' in set_data:
+                    set_data['distanceMeters'] = int(round(set_data['distanceMeters'] * factor / 100) * 100) or 100
+        elif choice < 0.7:
+            set_data = rng.choice(block['sets'])
+            set_data['vmaPercent'] = set_data['vmaPercent'] + rng.choice((-5.0, 5.0))
+        elif choice < 0.85:
+            rng.choice(block['sets'])['repetitions'] += 1
+        elif len(group['blocks']) > 1:
+            group['blocks'].remove(block)
+    return plan
+
+
+def run_benchmark(count: int, seed: int) -> int:
+    from notes_generator import generate_notes
+    from training_plan_converter import ENGINE_SINGLE_PASS, TrainingPlanConverter
+
+    converter = TrainingPlanConverter(ENGINE_SINGLE_PASS)
+    templates = [converter.parse_training_notes(generate_notes(groups=4, blocks=3, seed=s)) for s in range(32)]
+    rng = random.Random(seed)
+    # Three sessions a week, each usually last week's one with a few edits
+    slots = [rng.choice(templates) for _ in range(3)]
+    plans = []
+    for number in range(count):
+        slot = number % 3
+        slots[slot] = rng.choice(templates) if rng.random() < 0.15 else _tweak(slots[slot], rng)
+        plans.append(slots[slot])
+
+    index = PlanIndex()
+    quarters = []
+    for quarter in range(4):
+        start = time.perf_counter()
+        part = plans[quarter * count // 4:(quarter + 1) * count // 4]
+        for plan in part:
+            index.add(plan)
+        quarters.append((time.perf_counter() - start) / max(1, len(part)))
+    print(f"Indexed {count} plans: " + ', '.join(f"{cost * 1e6:.0f}us" for cost in quarters)
+          + " per plan in each quarter of the archive")
+    _print_index(index, plans, 0)
+
+    start = time.perf_counter()
+    report = diff_report(plans, index)
+    elapsed = time.perf_counter() - start
+    for plan, base in zip(plans, index.bases):
+        if base is not None and plan_hash(apply_diff(plans[base], diff_plans(plans[base], plan))) != plan_hash(plan):
+            print(f"Diff from plan {base} does not rebuild the plan", file=sys.stderr)
+            return 1
+    _print_diff_report(report)
+    print(f"  diff against the base: {elapsed / count * 1e6:.0f}us per plan; every diff rebuilds its plan")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Find duplicate plans, groups and blocks and diff plans")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    diff = commands.add_parser('diff', help="Print the changes from one plan to another")
+    diff.add_argument('old')
+    diff.add_argument('new')
+    diff.add_argument('-o', '--output', help="Also write the JSON Patch to this file")
+
+    apply = commands.add_parser('apply', help="Apply a JSON Patch written by diff")
+    apply.add_argument('plan')
+    apply.add_argument('patch')
+    apply.add_argument('-o', '--output', default='-', help="Plan JSON file (default: stdout)")
+
+    dedup = commands.add_parser('dedup', help="Report repeated and near-identical plans, groups and blocks")
+    dedup.add_argument('inputs', nargs='+', help="Plan JSON / NDJSON files or .vpa archives, oldest first")
+    dedup.add_argument('--top', type=int, default=10, help="Clusters listed (default: 10)")
+
+    benchmark = commands.add_parser('benchmark', help="Index and diff a synthetic season of edited copies")
+    benchmark.add_argument('--plans', type=int, default=2000)
+    benchmark.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+
+    if args.command == 'benchmark':
+        return run_benchmark(args.plans, args.seed)
+
+    if args.command == 'dedup':
+        index = PlanIndex()
+        plans = []
+        start = time.perf_counter()
+        for plan, label in iter_plans(args.inputs):
+            index.add(plan, label)
+            plans.append(plan)
+        elapsed = time.perf_counter() - start
+        print(f"Indexed {len(plans)} plans in {elapsed:.2f}s")
+        _print_index(index, plans, args.top)
+        _print_diff_report(diff_report(plans, index))
+        return 0
+
+    with open(args.plan if args.command == 'apply' else args.old, encoding='utf-8') as f:
+        old = plan_json.load(f)
+    if args.command == 'apply':
+        with open(args.patch, encoding='utf-8') as f:
+            patch = plan_json.load(f)
+        try:
+            plan = apply_diff(old, patch)
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 1
+        if args.output == '-':
+            print(plan_json.dumps(plan))
+        else:
+            with open(args.output, 'w', encoding='utf-8') as f:
+                plan_json.dump(plan, f)
+        return 0
+
+    with open(args.new, encoding='utf-8') as f:
+        new = plan_json.load(f)
+    patch = diff_plans(old, new)
+    document = copy.deepcopy(old)
+    for operation in patch:
+        document, previous = apply_operation(document, operation)
+        print(describe_operation(operation, previous))
+    print(f"{len(patch)} operations, {len(plan_json.dumps_compact(patch))} bytes "
+          f"({len(plan_json.dumps_compact(new))} bytes for the whole plan)", file=sys.stderr)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            plan_json.dump(patch, f)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,288 @@
+# file: plan_feed.py
+"""Publish plans as a manifest plus content-hashed, compressed chunks.
+
+The feed directory holds:
+
+- ``manifest.json``: feed version, the ids of the dictionary and string table
+  chunks, and one entry per plan (chunk id, compressed size, date);
+- ``dictionary/<id>.bin``: the preset deflate dictionary chunks are
+  compressed with; it is built from the plan JSON keys and a few typical
+  fragments so that even a one-plan chunk compresses well;
+- ``strings/<id>.deflate``: the title, warmup, cooldown and remarks texts
+  shared by plans, as one JSON array;
+- ``plans/<id>.deflate``: one minified plan per chunk, where ``title``,
+  ``warmup``, ``cooldown`` and ``remarks`` are indexes into the string table.
+
+Chunks are raw deflate streams using the preset dictionary (``zlib`` with
+``wbits=-15``; Dart's ``ZLibDecoder(raw: true, dictionary: ...)``). A chunk
+id is the first 20 hex digits of the SHA-256 of its JSON, so an unchanged
+plan keeps its file and a client holding the previous manifest downloads
+only ids it has not seen. The string table is append-only across
+publications, which keeps older chunks valid. The report compares what a
+client downloads with the single pretty-printed feed file.
+
+Usage:
+    python plan_feed.py publish feed/ plans/*.json
+    python plan_feed.py publish feed/ season.ndjson --prune
+    python plan_feed.py verify feed/ plans/*.json
+"""
+import argparse
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import sys
+import zlib
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import plan_json
+from plan_archive import iter_plan_files
+
+FEED_FORMAT = 1
+MANIFEST = 'manifest.json'
+SHARED_FIELDS = ('title', 'warmup', 'cooldown', 'remarks')
+
+# Deflate looks back into the dictionary for matches, closest bytes first, so
+# the most frequent fragments come last. Changing it changes every chunk id.
+DICTIONARY = (
+    '"durationSeconds":"recoveryType":"walk"},"recoveryType":"jog"},'
+    '{"title":"Bloc 4","sets":[{"repetitions":2,"distanceMeters":1500,"vmaPercent":100.0,"recoverySeconds":90.0,'
+    '"recoveryType":"rest"}],"afterRecoverySeconds":300.0,"afterRecoveryType":"rest"}]},'
+    '{"title":"Groupe 2","blocks":[{"title":"Bloc 1","sets":[{"repetitions":1,"distanceMeters":1000,'
+    '"vmaPercent":85.0,"recoverySeconds":0,"recoveryType":"active"},{"repetitions":1,"distanceMeters":1200,'
+    '"vmaPercent":80.0,"recoverySeconds":120.0,"recoveryType":"active"}],"afterRecoverySeconds":180,'
+    '"afterRecoveryType":"rest"},{"title":"Bloc 2","sets":[{"repetitions":3,"distanceMeters":800,'
+    '"vmaPercent":90.0,"recoverySeconds":150.0,"recoveryType":"active"}],"afterRecoverySeconds":180,'
+    '"afterRecoveryType":"rest"},{"title":"Bloc 3","sets":[{"repetitions":4,"distanceMeters":400,'
+    '"vmaPercent":105.0,"recoverySeconds":60.0,"recoveryType":"active"}],"afterRecoverySeconds":180,'
+    '"afterRecoveryType":"rest"}]}]}'
+    '{"title":0,"warmup":1,"cooldown":2,"remarks":3,"groups":[{"title":"Groupe 1","blocks":[{"title":"Bloc 1",'
+    '"sets":[{"repetitions":'
+).encode('utf-8')
+
+
+def _minify(value: Any) -> bytes:
+    return plan_json.dumps_compact(value)
+
+
+def chunk_id(payload: bytes) -> str:
+    return hashlib.sha256(payload).hexdigest()[:20]
+
+
+def compress_chunk(payload: bytes, dictionary: bytes = DICTIONARY) -> bytes:
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -15, zdict=dictionary)
+    return compressor.compress(payload) + compressor.flush()
+
+
+def decompress_chunk(data: bytes, dictionary: bytes = DICTIONARY) -> bytes:
+    decompressor = zlib.decompressobj(-15, zdict=dictionary)
+    return decompressor.decompress(data) + decompressor.flush()
+
+
+class StringTable:
+    """Append-only table of shared texts"""
+
+    def __init__(self, strings: Sequence[str] = ()):
+        self.strings = list(strings)
+        self._index = {text: i for i, text in enumerate(self.strings)}
+
+    def intern(self, text: str) -> int:
+        index = self._index.get(text)
+        if index is None:
+            index = self._index[text] = len(self.strings)
+            self.strings.append(text)
+        return index
+
+
+def encode_plan(plan: Dict[str, Any], strings: StringTable) -> Dict[str, Any]:
+    encoded = dict(plan)
+    for field in SHARED_FIELDS:
+        if isinstance(encoded.get(field), str):
+            encoded[field] = strings.intern(encoded[field])
+    return encoded
+
+
+def decode_plan(encoded: Dict[str, Any], strings: Sequence[str]) -> Dict[str, Any]:
+    plan = dict(encoded)
+    for field in SHARED_FIELDS:
+        if isinstance(plan.get(field), int):
+            plan[field] = strings[plan[field]]
+    return plan
+
+
+class Chunk:
+    __slots__ = ('id', 'path', 'data')
+
+    def __init__(self, directory: str, payload: bytes):
+        self.id = chunk_id(payload)
+        self.path = f"{directory}/{self.id}.deflate"
+        self.data = compress_chunk(payload)
+
+
+def load_manifest(feed_dir: str) -> Optional[Dict[str, Any]]:
+    path = os.path.join(feed_dir, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _read_chunk(feed_dir: str, directory: str, identifier: str, dictionary: bytes) -> Any:
+    path = f"{directory}/{identifier}.deflate"
+    with open(os.path.join(feed_dir, path), 'rb') as f:
+        payload = decompress_chunk(f.read(), dictionary)
+    if chunk_id(payload) != identifier:
+        raise ValueError(f"{path}: content does not match its id")
+    return plan_json.loads(payload)
+
+
+def _read_dictionary(feed_dir: str, identifier: str) -> bytes:
+    with open(os.path.join(feed_dir, 'dictionary', f"{identifier}.bin"), 'rb') as f:
+        dictionary = f.read()
+    if chunk_id(dictionary) != identifier:
+        raise ValueError(f"dictionary/{identifier}.bin: content does not match its id")
+    return dictionary
+
+
+def load_feed(feed_dir: str) -> List[Dict[str, Any]]:
+    """Plans of a published feed, as a client would rebuild them"""
+    manifest = load_manifest(feed_dir)
+    if manifest is None:
+        raise FileNotFoundError(f"No {MANIFEST} in {feed_dir}")
+    dictionary = _read_dictionary(feed_dir, manifest['dictionary'])
+    strings = _read_chunk(feed_dir, 'strings', manifest['strings'], dictionary)
+    return [decode_plan(_read_chunk(feed_dir, 'plans', entry['id'], dictionary), strings)
+            for entry in manifest['plans']]
+
+
+def _write_atomic(path: str, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    temporary = f"{path}.tmp"
+    with open(temporary, 'wb') as f:
+        f.write(data)
+    os.replace(temporary, path)
+
+
+def publish(feed_dir: str, plans: Iterable[Tuple[Dict[str, Any], Optional[str]]],
+            prune: bool = False) -> Dict[str, int]:
+    """Write chunks and the manifest; returns byte counts for the report"""
+    previous = load_manifest(feed_dir)
+    if previous is not None and previous['dictionary'] != chunk_id(DICTIONARY):
+        # Old chunks cannot be decoded with the new dictionary: start over
+        previous = None
+    strings = StringTable(_read_chunk(feed_dir, 'strings', previous['strings'], DICTIONARY) if previous else ())
+    seen = set()
+    if previous is not None:
+        seen = {entry['id'] for entry in previous['plans']} | {previous['strings'], previous['dictionary']}
+
+    pretty_plans = []
+    chunks: List[Chunk] = []
+    entries = []
+    for plan, date in plans:
+        pretty_plans.append(plan)
+        chunk = Chunk('plans', _minify(encode_plan(plan, strings)))
+        chunks.append(chunk)
+        entry = {'id': chunk.id, 'bytes': len(chunk.data)}
+        if date:
+            entry['date'] = date
+        entries.append(entry)
+    strings_chunk = Chunk('strings', _minify(strings.strings))
+    chunks.append(strings_chunk)
+    dictionary_id = chunk_id(DICTIONARY)
+
+    for chunk in chunks:
+        target = os.path.join(feed_dir, chunk.path)
+        if not os.path.exists(target):
+            _write_atomic(target, chunk.data)
+    dictionary_path = os.path.join(feed_dir, 'dictionary', f"{dictionary_id}.bin")
+    if not os.path.exists(dictionary_path):
+        _write_atomic(dictionary_path, DICTIONARY)
+
+    content = {'dictionary': dictionary_id, 'strings': strings_chunk.id, 'plans': entries}
+    unchanged = previous is not None and all(previous[key] == value for key, value in content.items())
+    version = previous['version'] + (0 if unchanged else 1) if previous else 1
+    manifest = {
+        'format': FEED_FORMAT,
+        'version': version,
+        'generated': previous['generated'] if unchanged
+        else datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0).isoformat(),
+        **content,
+    }
+    manifest_bytes = _minify(manifest)
+    _write_atomic(os.path.join(feed_dir, MANIFEST), manifest_bytes)
+
+    if prune:
+        referenced = {chunk.path for chunk in chunks} | {f"dictionary/{dictionary_id}.bin"}
+        for directory in ('plans', 'strings', 'dictionary'):
+            folder = os.path.join(feed_dir, directory)
+            for name in os.listdir(folder) if os.path.isdir(folder) else ():
+                if f"{directory}/{name}" not in referenced:
+                    os.remove(os.path.join(folder, name))
+
+    single_file = plan_json.dumps_bytes(pretty_plans)
+    new_chunks = [chunk for chunk in chunks if chunk.id not in seen]
+    dictionary_bytes = len(DICTIONARY) if dictionary_id not in seen else 0
+    return {
+        'version': version,
+        'plans': len(entries),
+        'single_file_bytes': len(single_file),
+        'single_file_gzip_bytes': len(gzip.compress(single_file, compresslevel=9, mtime=0)),
+        'manifest_bytes': len(manifest_bytes),
+        'full_download_bytes': len(manifest_bytes) + len(DICTIONARY) + sum(len(chunk.data) for chunk in chunks),
+        'new_chunks': len(new_chunks),
+        'update_download_bytes': len(manifest_bytes) + dictionary_bytes
+        + sum(len(chunk.data) for chunk in new_chunks),
+    }
+
+
+def format_report(report: Dict[str, int]) -> str:
+    single = report['single_file_bytes']
+
+    def line(label: str, size: int) -> str:
+        if not single:
+            return ""
+        if size == single:
+            return f"  {label:<38} {size:>12,} bytes (same size as the single file)"
+        change = 'smaller' if size < single else 'larger'
+        return f"  {label:<38} {size:>12,} bytes ({abs(size / single - 1):.1%} {change} than the single file)"
+
+    return '\n'.join([
+        f"Feed version {report['version']}: {report['plans']} plans, {report['new_chunks']} new chunks",
+        f"  {'single pretty-printed file':<38} {single:>12,} bytes",
+        line('single file, gzip', report['single_file_gzip_bytes']),
+        line('manifest + all chunks (first fetch)', report['full_download_bytes']),
+        line('manifest + new chunks (update)', report['update_download_bytes']),
+    ])
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Publish plans as a chunked, compressed feed")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    publish_parser = commands.add_parser('publish', help="Write or update a feed directory")
+    publish_parser.add_argument('feed_dir')
+    publish_parser.add_argument('inputs', nargs='+', help="Plan JSON or NDJSON files, in feed order")
+    publish_parser.add_argument('--prune', action='store_true', help="Delete chunks the manifest no longer uses")
+
+    verify_parser = commands.add_parser('verify', help="Check that a feed decodes to the given plans")
+    verify_parser.add_argument('feed_dir')
+    verify_parser.add_argument('inputs', nargs='+')
+    args = parser.parse_args(argv)
+
+    if args.command == 'publish':
+        report = publish(args.feed_dir, iter_plan_files(args.inputs), prune=args.prune)
+        print(format_report(report))
+        return 0
+
+    expected = [plan for plan, _ in iter_plan_files(args.inputs)]
+    published = load_feed(args.feed_dir)
+    if published != expected:
+        print(f"Feed differs from the inputs ({len(published)} vs {len(expected)} plans)", file=sys.stderr)
+        return 1
+    print(f"Feed matches the {len(expected)} input plans")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
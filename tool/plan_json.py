@@ -0,0 +1,180 @@
+# file: plan_json.py
+"""JSON serialization of plans, on orjson when it is installed.
+
+Every function gives the exact bytes of the ``json`` call it replaces, so
+files, downloads and cache entries do not depend on the backend:
+
+- ``dumps``/``dumps_bytes``/``dump``: ``json.dumps(plan, indent=2, ensure_ascii=False)``
+- ``dumps_compact``: ``json.dumps(value, ensure_ascii=False, separators=(',', ':'))``
+  encoded as UTF-8
+
+orjson writes a few values differently: floats below 1e-4 or from 1e16
+(``0.00001`` for ``1e-05``), NaN and infinities (``null``), and it refuses
+non-string keys, integers beyond 64 bits and lone surrogates. Its output is
+scanned for the spellings those values produce and, on any hit or refusal,
+the value is encoded again with ``json``. Plans never hold such values, so
+the scan is all they pay. ``loads`` likewise falls back to ``json`` for the
+documents orjson rejects (``NaN``, huge integers) before reporting an error.
+
+``python plan_json.py plan.json ...`` checks both backends agree on the
+files and compares their round-trip times.
+
+Install orjson (``pip install orjson``) for the fast path; without it every
+call goes to ``json``.
+"""
+import argparse
+import io
+import json
+import re
+import sys
+import time
+from typing import Any, Callable, Dict, IO, List, Optional, Union
+
+try:
+    import orjson
+except ImportError:  # optional dependency
+    orjson = None
+
+BACKEND_JSON = 'json'
+BACKEND_ORJSON = 'orjson'
+BACKENDS = (BACKEND_JSON, BACKEND_ORJSON) if orjson is not None else (BACKEND_JSON,)
+# Backend used when a call does not name one
+BACKEND = BACKENDS[-1]
+
+# Types orjson would encode where json raises, or encode differently, go to json
+_PASSTHROUGH = (orjson.OPT_PASSTHROUGH_DATACLASS | orjson.OPT_PASSTHROUGH_DATETIME
+                | orjson.OPT_PASSTHROUGH_SUBCLASS) if orjson is not None else 0
+# An exponent as orjson writes it ("1e16", "1e-7"). With the substrings for
+# floats below 1e-4 and non-finite floats, these cover every value json
+# writes differently. Strings can match too, which only costs a json encode;
+# a pattern starting with a literal keeps the scan far cheaper than the encode.
+_EXPONENT = re.compile(rb'e[-\d]')
+
+
+def _diverges(data: bytes) -> bool:
+    return b'null' in data or b'0.0000' in data or _EXPONENT.search(data) is not None
+
+
+def _orjson_dumps(value: Any, option: int) -> Optional[bytes]:
+    """orjson's encoding of value, or None when json must encode it"""
+    try:
+        data = orjson.dumps(value, option=option | _PASSTHROUGH)
+    except TypeError:
+        return None
+    return None if _diverges(data) else data
+
+
+def dumps_bytes(plan: Any, backend: Optional[str] = None) -> bytes:
+    """Indented plan JSON as UTF-8, for files and downloads"""
+    if (backend or BACKEND) == BACKEND_ORJSON:
+        data = _orjson_dumps(plan, orjson.OPT_INDENT_2)
+        if data is not None:
+            return data
+    return json.dumps(plan, indent=2, ensure_ascii=False).encode('utf-8')
+
+
+def dumps(plan: Any, backend: Optional[str] = None) -> str:
+    """Indented plan JSON, as shown in the editor"""
+    if (backend or BACKEND) == BACKEND_ORJSON:
+        data = _orjson_dumps(plan, orjson.OPT_INDENT_2)
+        if data is not None:
+            return data.decode('utf-8')
+    # Not through dumps_bytes: text with lone surrogates has a str form but no UTF-8 one
+    return json.dumps(plan, indent=2, ensure_ascii=False)
+
+
+def dump(plan: Any, fp: IO, backend: Optional[str] = None):
+    """Write indented plan JSON to a text or binary file in one call"""
+    if isinstance(fp, io.TextIOBase):
+        fp.write(dumps(plan, backend))
+    else:
+        fp.write(dumps_bytes(plan, backend))
+
+
+def dumps_compact(value: Any, backend: Optional[str] = None) -> bytes:
+    """Minified UTF-8 JSON, for cache entries, archives and feed chunks"""
+    if (backend or BACKEND) == BACKEND_ORJSON:
+        data = _orjson_dumps(value, 0)
+        if data is not None:
+            return data
+    return json.dumps(value, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def loads(data: Union[str, bytes, bytearray, memoryview], backend: Optional[str] = None) -> Any:
+    """Parse JSON text or UTF-8 bytes; invalid documents raise json.JSONDecodeError"""
+    if (backend or BACKEND) == BACKEND_ORJSON:
+        try:
+            return orjson.loads(data)
+        except orjson.JSONDecodeError:
+            pass
+    if isinstance(data, memoryview):
+        data = data.tobytes()
+    return json.loads(data)
+
+
+def load(fp: IO, backend: Optional[str] = None) -> Any:
+    return loads(fp.read(), backend)
+
+
+def _time(func: Callable[[], Any], min_time: float = 0.2) -> float:
+    """Best seconds per call over repeated calls"""
+    best = float('inf')
+    deadline = time.perf_counter() + min_time
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def compare_backends(plans: List[Any], min_time: float = 0.2) -> Dict[str, Dict[str, float]]:
+    """Milliseconds per batch for each backend and step of the round trip"""
+    for plan in plans:
+        for backend in BACKENDS:
+            if dumps(plan, backend) != json.dumps(plan, indent=2, ensure_ascii=False):
+                raise ValueError(f"{backend} output differs from json")
+            if dumps_compact(plan, backend) != dumps_compact(plan, BACKEND_JSON):
+                raise ValueError(f"{backend} compact output differs from json")
+
+    texts = [dumps(plan) for plan in plans]
+    results = {}
+    for backend in BACKENDS:
+        results[backend] = {
+            'dumps_ms': _time(lambda: [dumps(p, backend) for p in plans], min_time) * 1000,
+            'dumps_compact_ms': _time(lambda: [dumps_compact(p, backend) for p in plans], min_time) * 1000,
+            'loads_ms': _time(lambda: [loads(t, backend) for t in texts], min_time) * 1000,
+            'round_trip_ms': _time(lambda: [dumps(loads(t, backend), backend) for t in texts], min_time) * 1000,
+        }
+    return results
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Check and time the JSON backends on plan files")
+    parser.add_argument('plans', nargs='*', help="Plan JSON files (default: plans parsed from generated notes)")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Seconds spent per measurement")
+    args = parser.parse_args(argv)
+
+    if args.plans:
+        plans = []
+        for path in args.plans:
+            with open(path, encoding='utf-8') as f:
+                plans.append(json.load(f))
+    else:
+        from notes_generator import generate_notes
+        from training_plan_converter import TrainingPlanConverter
+        converter = TrainingPlanConverter()
+        plans = [converter.parse_training_notes(generate_notes(groups=4, blocks=3, seed=seed)) for seed in range(50)]
+
+    try:
+        results = compare_backends(plans, args.min_time)
+    except ValueError as e:
+        print(e, file=sys.stderr)
+        return 1
+    print(f"{len(plans)} plans, outputs identical across {', '.join(BACKENDS)}")
+    for backend, timings in results.items():
+        print(f"{backend:<8} " + "  ".join(f"{name[:-3]} {value:8.2f}ms" for name, value in timings.items()))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,348 @@
+# file: plan_model.py
+"""Typed, slotted in-memory model of a training plan.
+
+Mirrors the classes of lib/training_plan.dart. ``to_json`` emits keys in the
+order the converter writes them, so ``json.dumps(TrainingPlan.from_json(d).to_json())``
+is byte-identical to ``json.dumps(d)`` for converter output. Keys the model does
+not know about are dropped.
+
+Usage:
+    python plan_model.py ../assets/training_plans/training_example.json
+"""
+import math
+import sys
+from array import array
+from typing import Any, Dict, Iterator, List, Optional, Union
+
+RECOVERY_TYPES = ('active', 'walk', 'jog', 'rest')
+
+
+class IntervalSet:
+    __slots__ = ('repetitions', 'distance_meters', 'duration_seconds', 'vma_percent',
+                 'recovery_seconds', 'recovery_type')
+
+    def __init__(self, repetitions: int, vma_percent: float, recovery_seconds: float, recovery_type: str,
+                 distance_meters: Optional[float] = None, duration_seconds: Optional[float] = None):
+        self.repetitions = repetitions
+        self.distance_meters = distance_meters
+        self.duration_seconds = duration_seconds
+        self.vma_percent = vma_percent
+        self.recovery_seconds = recovery_seconds
+        self.recovery_type = recovery_type
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'IntervalSet':
+        return cls(
+            repetitions=data.get('repetitions'),
+            distance_meters=data.get('distanceMeters'),
+            duration_seconds=data.get('durationSeconds'),
+            vma_percent=data.get('vmaPercent'),
+            recovery_seconds=data.get('recoverySeconds'),
+            recovery_type=data.get('recoveryType'),
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {'repetitions': self.repetitions}
+        if self.distance_meters is not None:
+            data['distanceMeters'] = self.distance_meters
+        if self.duration_seconds is not None:
+            data['durationSeconds'] = self.duration_seconds
+        data['vmaPercent'] = self.vma_percent
+        data['recoverySeconds'] = self.recovery_seconds
+        data['recoveryType'] = self.recovery_type
+        return data
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, IntervalSet):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self.__slots__)
+
+    def __repr__(self) -> str:
+        fields = ', '.join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"IntervalSet({fields})"
+
+
+# Flags kept per row by SetColumns so numbers come back with their JSON type
+_HAS_DISTANCE = 1
+_HAS_DURATION = 2
+_INT_DISTANCE = 4
+_INT_DURATION = 8
+_INT_VMA = 16
+_INT_RECOVERY = 32
+
+
+class SetColumns:
+    """Column-wise storage of sets shared by every block of an archive.
+
+    Numbers live in typed arrays and recovery types in a small string table,
+    which costs a few dozen bytes per set instead of a dict per set. Blocks
+    hold a SetRange into the columns; rows are materialized as IntervalSet
+    objects on access.
+    """
+
+    __slots__ = ('repetitions', 'distance_meters', 'duration_seconds', 'vma_percent',
+                 'recovery_seconds', 'recovery_type_codes', 'recovery_type_names', 'flags')
+
+    def __init__(self):
+        self.repetitions = array('q')
+        self.distance_meters = array('d')
+        self.duration_seconds = array('d')
+        self.vma_percent = array('d')
+        self.recovery_seconds = array('d')
+        self.recovery_type_codes = array('B')
+        self.recovery_type_names: List[Optional[str]] = list(RECOVERY_TYPES)
+        self.flags = array('B')
+
+    def extend(self, sets: List[Dict[str, Any]]) -> 'SetRange':
+        """Append the JSON sets of one block and return the range they occupy"""
+        start = len(self)
+        for set_data in sets:
+            self.append(IntervalSet.from_json(set_data))
+        return SetRange(self, start, len(self))
+
+    def append(self, interval: IntervalSet):
+        if interval.repetitions is None or interval.vma_percent is None or interval.recovery_seconds is None:
+            raise ValueError("Columnar storage needs repetitions, vmaPercent and recoverySeconds on every set")
+
+        flags = 0
+        if interval.distance_meters is not None:
+            flags |= _HAS_DISTANCE
+            if isinstance(interval.distance_meters, int):
+                flags |= _INT_DISTANCE
+        if interval.duration_seconds is not None:
+            flags |= _HAS_DURATION
+            if isinstance(interval.duration_seconds, int):
+                flags |= _INT_DURATION
+        if isinstance(interval.vma_percent, int):
+            flags |= _INT_VMA
+        if isinstance(interval.recovery_seconds, int):
+            flags |= _INT_RECOVERY
+
+        try:
+            code = self.recovery_type_names.index(interval.recovery_type)
+        except ValueError:
+            code = len(self.recovery_type_names)
+            self.recovery_type_names.append(interval.recovery_type)
+
+        self.repetitions.append(interval.repetitions)
+        self.distance_meters.append(interval.distance_meters if interval.distance_meters is not None else math.nan)
+        self.duration_seconds.append(interval.duration_seconds if interval.duration_seconds is not None else math.nan)
+        self.vma_percent.append(interval.vma_percent)
+        self.recovery_seconds.append(interval.recovery_seconds)
+        self.recovery_type_codes.append(code)
+        self.flags.append(flags)
+
+    def __len__(self) -> int:
+        return len(self.repetitions)
+
+    def __getitem__(self, index: int) -> IntervalSet:
+        flags = self.flags[index]
+        distance = duration = None
+        if flags & _HAS_DISTANCE:
+            distance = self.distance_meters[index]
+            if flags & _INT_DISTANCE:
+                distance = int(distance)
+        if flags & _HAS_DURATION:
+            duration = self.duration_seconds[index]
+            if flags & _INT_DURATION:
+                duration = int(duration)
+        vma_percent = self.vma_percent[index]
+        recovery_seconds = self.recovery_seconds[index]
+        return IntervalSet(
+            repetitions=self.repetitions[index],
+            distance_meters=distance,
+            duration_seconds=duration,
+            vma_percent=int(vma_percent) if flags & _INT_VMA else vma_percent,
+            recovery_seconds=int(recovery_seconds) if flags & _INT_RECOVERY else recovery_seconds,
+            recovery_type=self.recovery_type_names[self.recovery_type_codes[index]],
+        )
+
+    def __iter__(self) -> Iterator[IntervalSet]:
+        for index in range(len(self)):
+            yield self[index]
+
+
+class SetRange:
+    """The sets of one block inside a shared SetColumns"""
+
+    __slots__ = ('columns', 'start', 'stop')
+
+    def __init__(self, columns: SetColumns, start: int, stop: int):
+        self.columns = columns
+        self.start = start
+        self.stop = stop
+
+    def __len__(self) -> int:
+        return self.stop - self.start
+
+    def __getitem__(self, index: int) -> IntervalSet:
+        if not -len(self) <= index < len(self):
+            raise IndexError(index)
+        return self.columns[self.start + index % len(self)]
+
+    def __iter__(self) -> Iterator[IntervalSet]:
+        columns = self.columns
+        for index in range(self.start, self.stop):
+            yield columns[index]
+
+
+class TrainingBlock:
+    __slots__ = ('title', 'sets', 'after_recovery_seconds', 'after_recovery_type')
+
+    def __init__(self, title: str, sets: Union[List[IntervalSet], SetRange],
+                 after_recovery_seconds: Optional[float] = None, after_recovery_type: Optional[str] = None):
+        self.title = title
+        self.sets = sets
+        self.after_recovery_seconds = after_recovery_seconds
+        self.after_recovery_type = after_recovery_type
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], columns: Optional[SetColumns] = None) -> 'TrainingBlock':
+        raw_sets = data.get('sets', [])
+        sets = columns.extend(raw_sets) if columns is not None else [IntervalSet.from_json(s) for s in raw_sets]
+        return cls(
+            title=data.get('title'),
+            sets=sets,
+            after_recovery_seconds=data.get('afterRecoverySeconds'),
+            after_recovery_type=data.get('afterRecoveryType'),
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        data = {
+            'title': self.title,
+            'sets': [interval.to_json() for interval in self.sets]
+        }
+        if self.after_recovery_seconds is not None:
+            data['afterRecoverySeconds'] = self.after_recovery_seconds
+        if self.after_recovery_type is not None:
+            data['afterRecoveryType'] = self.after_recovery_type
+        return data
+
+
+class BlockGroup:
+    __slots__ = ('title', 'blocks')
+
+    def __init__(self, title: str, blocks: List[TrainingBlock]):
+        self.title = title
+        self.blocks = blocks
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], columns: Optional[SetColumns] = None) -> 'BlockGroup':
+        return cls(
+            title=data.get('title'),
+            blocks=[TrainingBlock.from_json(b, columns) for b in data.get('blocks', [])],
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'title': self.title,
+            'blocks': [block.to_json() for block in self.blocks]
+        }
+
+
+class TrainingPlan:
+    __slots__ = ('title', 'warmup', 'cooldown', 'remarks', 'groups')
+
+    def __init__(self, title: str, warmup: str, cooldown: str, remarks: str, groups: List[BlockGroup]):
+        self.title = title
+        self.warmup = warmup
+        self.cooldown = cooldown
+        self.remarks = remarks
+        self.groups = groups
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any], columns: Optional[SetColumns] = None) -> 'TrainingPlan':
+        """Build the model from plan JSON, appending sets to columns when given"""
+        return cls(
+            title=data.get('title'),
+            warmup=data.get('warmup'),
+            cooldown=data.get('cooldown'),
+            remarks=data.get('remarks'),
+            groups=[BlockGroup.from_json(g, columns) for g in data.get('groups', [])],
+        )
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'title': self.title,
+            'warmup': self.warmup,
+            'cooldown': self.cooldown,
+            'remarks': self.remarks,
+            'groups': [group.to_json() for group in self.groups]
+        }
+
+    def iter_sets(self) -> Iterator[IntervalSet]:
+        for group in self.groups:
+            for block in group.blocks:
+                yield from block.sets
+
+
+def plans_from_json(plans: List[Dict[str, Any]], columnar: bool = False) -> List[TrainingPlan]:
+    """Load many plans, sharing one SetColumns between all of them when columnar"""
+    columns = SetColumns() if columnar else None
+    return [TrainingPlan.from_json(plan, columns) for plan in plans]
+
+
+def deep_sizeof(obj: Any) -> int:
+    """Approximate bytes held by an object graph, counting shared objects once"""
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        current = stack.pop()
+        if id(current) in seen:
+            continue
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+
+        if isinstance(current, dict):
+            stack.extend(current.keys())
+            stack.extend(current.values())
+        elif isinstance(current, (list, tuple, set, frozenset)):
+            stack.extend(current)
+        elif hasattr(type(current), '__slots__'):
+            stack.extend(getattr(current, name) for name in type(current).__slots__ if hasattr(current, name))
+
+    return total
+
+
+def footprint_report(plans: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Memory held by the same plans as dicts, slotted objects and columnar sets"""
+    return {
+        'plans': len(plans),
+        'dict_bytes': deep_sizeof(plans),
+        'slotted_bytes': deep_sizeof(plans_from_json(plans)),
+        'columnar_bytes': deep_sizeof(plans_from_json(plans, columnar=True)),
+    }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import json
+    import plan_json
+    paths = argv if argv is not None else sys.argv[1:]
+    if not paths:
+        print("Usage: python plan_model.py PLAN.json [PLAN.json ...]", file=sys.stderr)
+        return 2
+
+    plans = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            plans.append(json.load(f))
+
+    for plan in plans:
+        for columns in (None, SetColumns()):
+            model = TrainingPlan.from_json(plan, columns)
+            if plan_json.dumps(model.to_json()) != plan_json.dumps(plan):
+                print(f"Warning: {plan.get('title')} does not round-trip identically", file=sys.stderr)
+
+    report = footprint_report(plans)
+    dict_bytes = report['dict_bytes']
+    print(f"{report['plans']} plans")
+    print(f"  dicts:    {dict_bytes:>10} bytes")
+    for label, key in (('slotted', 'slotted_bytes'), ('columnar', 'columnar_bytes')):
+        print(f"  {label + ':':<9} {report[key]:>10} bytes ({report[key] / dict_bytes:.0%} of dicts)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,299 @@
+# file: plan_schema.py
+"""Declarative schema of the training plan format and its compiled validator.
+
+The schema follows the rules enforced by ``TrainingPlan.fromJson`` in
+lib/training_plan.dart: field types, the RecoveryType enum, and every set
+carrying either a distance or a duration. It is compiled once into plain
+Python functions, so validating a plan is a single traversal that reports
+structured issues (JSON path + code) and can stop at the first one.
+
+Usage:
+    python plan_schema.py plan.json [plan.json ...]
+    python plan_schema.py --benchmark 5000
+"""
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from plan_model import RECOVERY_TYPES
+
+# Issue codes
+MISSING_FIELD = 'missing_field'
+WRONG_TYPE = 'wrong_type'
+INVALID_ENUM = 'invalid_enum'
+OUT_OF_RANGE = 'out_of_range'
+DISTANCE_OR_DURATION = 'distance_or_duration'
+
+SET_SCHEMA = {
+    'type': 'object',
+    'required': ['repetitions', 'vmaPercent', 'recoverySeconds', 'recoveryType'],
+    'properties': {
+        'repetitions': {'type': 'integer', 'minimum': 1},
+        'distanceMeters': {'type': 'number', 'exclusiveMinimum': 0},
+        'durationSeconds': {'type': 'number', 'exclusiveMinimum': 0},
+        'vmaPercent': {'type': 'number', 'exclusiveMinimum': 0},
+        'recoverySeconds': {'type': 'number', 'minimum': 0},
+        'recoveryType': {'type': 'string', 'enum': RECOVERY_TYPES},
+    },
+    'exactlyOne': ['distanceMeters', 'durationSeconds'],
+}
+
+BLOCK_SCHEMA = {
+    'type': 'object',
+    'required': ['title', 'sets'],
+    'properties': {
+        'title': {'type': 'string'},
+        'sets': {'type': 'array', 'items': SET_SCHEMA},
+        'afterRecoverySeconds': {'type': 'number', 'minimum': 0},
+        'afterRecoveryType': {'type': 'string', 'enum': RECOVERY_TYPES},
+    },
+}
+
+GROUP_SCHEMA = {
+    'type': 'object',
+    'required': ['title', 'blocks'],
+    'properties': {
+        'title': {'type': 'string'},
+        'blocks': {'type': 'array', 'items': BLOCK_SCHEMA},
+    },
+}
+
+PLAN_SCHEMA = {
+    'type': 'object',
+    'required': ['title', 'warmup', 'cooldown', 'remarks', 'groups'],
+    'properties': {
+        'title': {'type': 'string'},
+        'warmup': {'type': 'string'},
+        'cooldown': {'type': 'string'},
+        'remarks': {'type': 'string'},
+        'groups': {'type': 'array', 'items': GROUP_SCHEMA},
+    },
+}
+
+
+EXAMPLE_PLAN = os.path.join(os.path.dirname(__file__), '..', 'assets', 'training_plans', 'training_example.json')
+
+
+class ValidationIssue(NamedTuple):
+    path: str
+    code: str
+    message: str
+
+    def __str__(self) -> str:
+        return f"{self.path}: {self.message}"
+
+
+class _FailFast(Exception):
+    pass
+
+
+# Paths are linked (parent, segment) pairs and only rendered when an issue is found
+Path = Optional[Tuple[Any, Any]]
+Check = Callable[[Any, Path, List[ValidationIssue], bool], None]
+
+
+def render_path(path: Path) -> str:
+    segments = []
+    while path is not None:
+        path, segment = path
+        segments.append(f"[{segment}]" if isinstance(segment, int) else f".{segment}")
+    return '$' + ''.join(reversed(segments))
+
+
+def _report(errors: List[ValidationIssue], fail_fast: bool, path: Path, code: str, message: str):
+    errors.append(ValidationIssue(render_path(path), code, message))
+    if fail_fast:
+        raise _FailFast()
+
+
+# Condition (as source) that is true when a value does NOT have the schema type
+_TYPE_MISMATCH = {
+    'string': "type({0}) is not str",
+    'integer': "type({0}) is not int",
+    'number': "type({0}) not in _NUMBER_TYPES",
+    'array': "not isinstance({0}, list)",
+    'object': "not isinstance({0}, dict)",
+}
+_NUMBER_TYPES = frozenset((int, float))
+_MISSING = object()
+
+
+class _SchemaCompiler:
+    """Generate one Python function per object/array schema node.
+
+    Checks are emitted inline as plain comparisons, so the valid path of a set
+    costs a handful of type() and dict lookups instead of a call per field.
+    Paths are only built when an issue is reported.
+    """
+
+    def __init__(self):
+        self.sources: List[str] = []
+        self.namespace: Dict[str, Any] = {
+            '_report': _report, '_NUMBER_TYPES': _NUMBER_TYPES, '_MISSING': _MISSING,
+        }
+        self.counter = 0
+
+    def _name(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}_{self.counter}"
+
+    def compile(self, schema: Dict[str, Any]) -> 'Check':
+        name = self.function(schema)
+        exec('\n\n'.join(self.sources), self.namespace)
+        return self.namespace[name]
+
+    def function(self, schema: Dict[str, Any]) -> str:
+        name = self._name('_check')
+        lines = [f"def {name}(value, path, errors, fail_fast):"]
+        self.node(schema, 'value', 'path', lines, 1)
+        lines.append('    return None')
+        self.sources.append('\n'.join(lines))
+        return name
+
+    def node(self, schema: Dict[str, Any], var: str, path: str, lines: List[str], depth: int):
+        pad = '    ' * depth
+        type_name = schema.get('type')
+        if type_name:
+            lines.append(f"{pad}if {_TYPE_MISMATCH[type_name].format(var)}:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {WRONG_TYPE!r}, "
+                         f"{('expected ' + type_name + ', got ')!r} + type({var}).__name__)")
+            lines.append(f"{pad}else:")
+            pad += '    '
+            depth += 1
+        lines.append(f"{pad}pass")
+
+        if 'enum' in schema:
+            enum_name = self._name('_enum')
+            self.namespace[enum_name] = frozenset(schema['enum'])
+            message = f" is not one of {', '.join(schema['enum'])}"
+            lines.append(f"{pad}if {var} not in {enum_name}:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {INVALID_ENUM!r}, repr({var}) + {message!r})")
+        # Negated so that NaN, which fails every comparison, is out of range too
+        if 'minimum' in schema:
+            lines.append(f"{pad}if not {var} >= {schema['minimum']!r}:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {OUT_OF_RANGE!r}, "
+                         f"{('must be at least ' + str(schema['minimum']))!r})")
+        if 'exclusiveMinimum' in schema:
+            lines.append(f"{pad}if not {var} > {schema['exclusiveMinimum']!r}:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {OUT_OF_RANGE!r}, "
+                         f"{('must be greater than ' + str(schema['exclusiveMinimum']))!r})")
+
+        if 'items' in schema:
+            item_function = self.function(schema['items'])
+            index = self._name('index')
+            item = self._name('item')
+            lines.append(f"{pad}for {index}, {item} in enumerate({var}):")
+            lines.append(f"{pad}    {item_function}({item}, ({path}, {index}), errors, fail_fast)")
+
+        for name in schema.get('required', ()):
+            lines.append(f"{pad}if {name!r} not in {var}:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {MISSING_FIELD!r}, {('missing ' + name)!r})")
+        for name, sub_schema in schema.get('properties', {}).items():
+            field = self._name('field')
+            lines.append(f"{pad}{field} = {var}.get({name!r}, _MISSING)")
+            lines.append(f"{pad}if {field} is not _MISSING:")
+            self.node(sub_schema, field, f"({path}, {name!r})", lines, depth + 1)
+        exactly_one = schema.get('exactlyOne')
+        if exactly_one:
+            present = ' + '.join(f"({var}.get({name!r}) is not None)" for name in exactly_one)
+            lines.append(f"{pad}if {present} != 1:")
+            lines.append(f"{pad}    _report(errors, fail_fast, {path}, {DISTANCE_OR_DURATION!r}, "
+                         f"{('needs exactly one of ' + ' or '.join(exactly_one))!r})")
+
+
+def compile_schema(schema: Dict[str, Any]) -> Check:
+    """Turn a schema into a check(value, path, errors, fail_fast) function"""
+    return _SchemaCompiler().compile(schema)
+
+
+class PlanValidator:
+    """Validator compiled once from a schema and reused across plans"""
+
+    def __init__(self, schema: Optional[Dict[str, Any]] = None):
+        self._check = compile_schema(schema or PLAN_SCHEMA)
+
+    def validate(self, plan: Any, fail_fast: bool = False, path: Sequence[Any] = ()) -> List[ValidationIssue]:
+        """Validate a value; path gives its location when it is part of a larger plan"""
+        errors: List[ValidationIssue] = []
+        linked_path = None
+        for segment in path:
+            linked_path = (linked_path, segment)
+        try:
+            self._check(plan, linked_path, errors, fail_fast)
+        except _FailFast:
+            pass
+        return errors
+
+    def is_valid(self, plan: Any) -> bool:
+        return not self.validate(plan, fail_fast=True)
+
+    def validate_many(self, plans: Iterable[Any], fail_fast: bool = False) -> List[List[ValidationIssue]]:
+        return [self.validate(plan, fail_fast) for plan in plans]
+
+
+_default_validator = None
+
+
+def validate_plan(plan: Any, fail_fast: bool = False) -> List[ValidationIssue]:
+    """Validate one plan against PLAN_SCHEMA with a shared compiled validator"""
+    global _default_validator
+    if _default_validator is None:
+        _default_validator = PlanValidator()
+    return _default_validator.validate(plan, fail_fast)
+
+
+def benchmark(count: int) -> Dict[str, float]:
+    """Time the compiled validator against the legacy key-presence checks"""
+    import json
+    from training_plan_converter import validate_json_structure_legacy
+
+    with open(EXAMPLE_PLAN, encoding='utf-8') as f:
+        example = json.load(f)
+    plans = [json.loads(json.dumps(example)) for _ in range(count)]
+    validator = PlanValidator()
+
+    timings = {}
+    start = time.perf_counter()
+    for plan in plans:
+        validate_json_structure_legacy(plan)
+    timings['legacy_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    validator.validate_many(plans)
+    timings['schema_s'] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    validator.validate_many(plans, fail_fast=True)
+    timings['schema_fail_fast_s'] = time.perf_counter() - start
+    return timings
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+    import json
+    parser = argparse.ArgumentParser(description="Validate training plan JSON files")
+    parser.add_argument('plans', nargs='*', help="Plan JSON files")
+    parser.add_argument('--fail-fast', action='store_true', help="Stop at the first issue of each plan")
+    parser.add_argument('--benchmark', type=int, metavar='N', help="Benchmark against the legacy validator on N plans")
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        timings = benchmark(args.benchmark)
+        for name, seconds in timings.items():
+            print(f"{name:<20} {seconds:.3f}s ({args.benchmark / seconds:,.0f} plans/s)")
+        return 0
+
+    validator = PlanValidator()
+    status = 0
+    for path in args.plans:
+        with open(path, encoding='utf-8') as f:
+            issues = validator.validate(json.load(f), fail_fast=args.fail_fast)
+        for issue in issues:
+            print(f"{path}: {issue.path} [{issue.code}] {issue.message}")
+        status = status or (1 if issues else 0)
+    return status
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+# file: startup_benchmark.py
+"""Cold start cost of the converter modules, each in a fresh interpreter.
+
+Every target is imported (and optionally exercised) in a new ``python``
+process, as a batch job or a spawned pool worker would, and the probe reports
+the import time, the resident memory and the modules the import loaded. The
+bare interpreter is measured the same way so its own start-up can be
+subtracted. Core-only targets must not load Streamlit, the JSON backends or
+other modules the parser does not need; ``--check`` exits 1 when they do, or
+when their import exceeds ``--max-import-ms``.
+
+Usage:
+    python startup_benchmark.py                      # run and print
+    python startup_benchmark.py --top 10             # slowest modules per target
+    python startup_benchmark.py --check --max-import-ms 50
+"""
+import argparse
+import ast
+import importlib.util
+import os
+import statistics
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+TOOL_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# name -> (import statement, statement run after it or None)
+TARGETS: Dict[str, Tuple[str, Optional[str]]] = {
+    'interpreter': ('pass', None),
+    'core': ('import training_plan_converter', None),
+    'core + parse': (
+        'from training_plan_converter import ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter, '
+        'validate_json_structure',
+        'validate_json_structure(TrainingPlanConverter(ENGINE_SINGLE_PASS).parse_training_notes(SAMPLE_NOTES))',
+    ),
+    'editor module': ('import text_to_training_data', None),
+    'editor + streamlit': ('import text_to_training_data, streamlit', None),
+}
+CORE_TARGETS = ('core', 'core + parse')
+# Top-level modules a core-only process must not load
+HEAVY_MODULES = ('streamlit', 'numpy', 'pandas', 'pyarrow', 'orjson', 'json', 'logging', 'argparse')
+
+# Written to stderr before the target is imported, ending the interpreter's own imports
+MARKER = '-- probe --\n'
+# Runs in the fresh interpreter; prints a dict literal so it loads nothing itself
+PROBE = '''
+import sys, time
+def rss_kb():
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    import resource
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == 'darwin' else peak
+sys.path.insert(0, {tool_dir!r})
+sys.stderr.write({marker!r})
+loaded = set(sys.modules)
+start = time.perf_counter()
+{statement}
+import_s = time.perf_counter() - start
+start = time.perf_counter()
+{work}
+work_s = time.perf_counter() - start
+modules = sorted(m for m in set(sys.modules) - loaded if '.' not in m)
+print(repr({{'import_ms': import_s * 1000, 'work_ms': work_s * 1000, 'rss_kb': rss_kb(), 'modules': modules}}))
+'''
+
+
+def _probe_code(target: str) -> str:
+    statement, work = TARGETS[target]
+    return PROBE.format(tool_dir=TOOL_DIR, marker=MARKER, statement=statement, work=work or 'pass')
+
+
+def available_targets() -> List[str]:
+    """Targets whose imports are installed here"""
+    if importlib.util.find_spec('streamlit') is None:
+        return [name for name in TARGETS if 'streamlit' not in name]
+    return list(TARGETS)
+
+
+def probe(target: str) -> Dict:
+    """One fresh interpreter: import and work times, RSS and loaded modules"""
+    start = time.perf_counter()
+    completed = subprocess.run([sys.executable, '-c', _probe_code(target)], cwd=TOOL_DIR,
+                               capture_output=True, text=True, check=True)
+    result = ast.literal_eval(completed.stdout.strip().splitlines()[-1])
+    result['process_ms'] = (time.perf_counter() - start) * 1000
+    return result
+
+
+def measure(target: str, runs: int = 5) -> Dict:
+    """Median of ``runs`` probes, after one warm-up that fills the bytecode caches"""
+    probe(target)
+    samples = [probe(target) for _ in range(runs)]
+    summary = {key: statistics.median(sample[key] for sample in samples)
+               for key in ('import_ms', 'work_ms', 'process_ms', 'rss_kb')}
+    summary['modules'] = samples[-1]['modules']
+    return summary
+
+
+def slowest_modules(target: str, top: int) -> List[Tuple[str, int]]:
+    """(module, self microseconds) of the slowest imports, from ``-X importtime``"""
+    completed = subprocess.run([sys.executable, '-X', 'importtime', '-c', _probe_code(target)], cwd=TOOL_DIR,
+                               capture_output=True, text=True, check=True)
+    modules = []
+    for line in completed.stderr.split(MARKER, 1)[-1].splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        modules.append((name.strip(), int(self_us)))
+    return sorted(modules, key=lambda item: -item[1])[:top]
+
+
+def check(results: Dict[str, Dict], max_import_ms: Optional[float] = None) -> List[str]:
+    """Problems of the core-only targets: heavy modules loaded or import over budget"""
+    problems = []
+    for target in CORE_TARGETS:
+        heavy = sorted(set(results[target]['modules']) & set(HEAVY_MODULES))
+        if heavy:
+            problems.append(f"{target}: loads {', '.join(heavy)}")
+        if max_import_ms is not None and results[target]['import_ms'] > max_import_ms:
+            problems.append(f"{target}: import {results[target]['import_ms']:.1f}ms > {max_import_ms:.1f}ms")
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Measure cold import time and memory of the converter modules")
+    parser.add_argument('--runs', type=int, default=5, help="Fresh interpreters per target (default: 5)")
+    parser.add_argument('--top', type=int, default=0, metavar='N', help="Also list the N slowest imports per target")
+    parser.add_argument('--check', action='store_true', help="Exit 1 if a core-only target loads heavy modules")
+    parser.add_argument('--max-import-ms', type=float, help="With --check, also fail core imports slower than this")
+    args = parser.parse_args(argv)
+
+    if sys.flags.dont_write_bytecode:
+        print("Note: PYTHONDONTWRITEBYTECODE is set, import times include compiling the sources", file=sys.stderr)
+
+    results = {target: measure(target, args.runs) for target in available_targets()}
+    base_rss = results['interpreter']['rss_kb']
+    print(f"{'target':<20} {'import':>10} {'work':>9} {'process':>10} {'RSS':>9} {'+RSS':>9} {'modules':>8}")
+    for target, result in results.items():
+        print(f"{target:<20} {result['import_ms']:8.1f}ms {result['work_ms']:7.1f}ms {result['process_ms']:8.1f}ms "
+              f"{result['rss_kb'] / 1024:7.1f}MB {(result['rss_kb'] - base_rss) / 1024:7.1f}MB "
+              f"{len(result['modules']):>8}")
+        if args.top and target != 'interpreter':
+            for name, self_us in slowest_modules(target, args.top):
+                print(f"    {self_us / 1000:7.2f}ms  {name}")
+
+    if args.check:
+        problems = check(results, args.max_import_ms)
+        for line in problems:
+            print(f"STARTUP {line}", file=sys.stderr)
+        if problems:
+            return 1
+        print(f"Core imports stay clear of {', '.join(HEAVY_MODULES)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
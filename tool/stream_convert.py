@@ -0,0 +1,94 @@
+# file: stream_convert.py
+"""Stream a notes export holding many sessions into NDJSON, one plan per line.
+
+Usage:
+    python stream_convert.py season_export.txt > plans.ndjson
+    cat season_export.txt | python stream_convert.py - -o plans.ndjson
+"""
+import argparse
+import re
+import sys
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional
+
+import plan_json
+from training_plan_converter import ENGINES, ENGINE_SINGLE_PASS, TrainingPlanConverter, validate_json_structure
+
+# Header lines that open a session. A new session starts on an "Avant séance"
+# line once the current one has content, or on a second "Échauffement".
+SESSION_START = re.compile(r'^\s*Avant\s+séance')
+WARMUP_START = re.compile(r'^\s*Échauffement')
+
+
+def iter_sessions(lines: Iterable[str]) -> Iterator[str]:
+    """Group a stream of lines into session texts, holding one session at a time"""
+    buffer: List[str] = []
+    seen_warmup = False
+
+    for line in lines:
+        if not buffer and not line.strip():
+            # Blank lines between sessions never open one
+            continue
+
+        if SESSION_START.match(line):
+            if buffer:
+                yield ''.join(buffer)
+                buffer = []
+            seen_warmup = False
+        elif WARMUP_START.match(line):
+            if seen_warmup:
+                yield ''.join(buffer)
+                buffer = []
+            seen_warmup = True
+
+        buffer.append(line)
+
+    if buffer:
+        yield ''.join(buffer)
+
+
+def stream_plans(lines: Iterable[str], converter: Optional[TrainingPlanConverter] = None) -> Iterator[Dict[str, Any]]:
+    """Parse each session as soon as its last line has been read"""
+    converter = converter or TrainingPlanConverter(engine=ENGINE_SINGLE_PASS)
+    for session in iter_sessions(lines):
+        yield converter.parse_training_notes(session)
+
+
+def write_ndjson(plans: Iterable[Dict[str, Any]], out: IO[str], errors_out: Optional[IO[str]] = None) -> int:
+    """Write plans as NDJSON, flushing after each line; returns the number written"""
+    count = 0
+    for plan in plans:
+        out.write(plan_json.dumps_compact(plan).decode('utf-8'))
+        out.write('\n')
+        out.flush()
+        if errors_out is not None:
+            for error in validate_json_structure(plan):
+                errors_out.write(f"Session {count + 1}: {error}\n")
+        count += 1
+    return count
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Convert a multi-session notes export to NDJSON plans")
+    parser.add_argument('input', help="Notes export file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="NDJSON output file (default: stdout)")
+    parser.add_argument('--engine', choices=ENGINES, default=ENGINE_SINGLE_PASS, help="Parsing engine")
+    parser.add_argument('--validate', action='store_true', help="Report validation errors on stderr")
+    args = parser.parse_args(argv)
+
+    converter = TrainingPlanConverter(engine=args.engine)
+    source = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8')
+    try:
+        count = write_ndjson(stream_plans(source, converter), out, sys.stderr if args.validate else None)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Wrote {count} plans", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
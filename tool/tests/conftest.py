@@ -0,0 +1,42 @@
+# file: tests/conftest.py
+"""Shared fixtures; the tool modules import each other as top-level modules."""
+import copy
+import os
+import sys
+
+import pytest
+
+TOOL_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if TOOL_DIR not in sys.path:
+    sys.path.insert(0, TOOL_DIR)
+
+from training_plan_converter import ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter  # noqa: E402
+
+_SAMPLE_PLAN = TrainingPlanConverter(ENGINE_SINGLE_PASS).parse_training_notes(SAMPLE_NOTES)
+
+
+@pytest.fixture
+def sample_plan():
+    """The plan of SAMPLE_NOTES, a fresh copy per test"""
+    return copy.deepcopy(_SAMPLE_PLAN)
+
+
+def make_plan(*groups, title='Séance'):
+    """A plan from (group title, [(block title, [set, ...], after recovery seconds)]) tuples"""
+    plan = {'title': title, 'warmup': "15'", 'cooldown': "5'", 'remarks': '', 'groups': []}
+    for group_title, blocks in groups:
+        plan['groups'].append({'title': group_title, 'blocks': [
+            {'title': block_title, 'sets': sets, 'afterRecoverySeconds': after, 'afterRecoveryType': 'rest'}
+            for block_title, sets, after in blocks
+        ]})
+    return plan
+
+
+def make_set(repetitions=1, distance=None, duration=None, percent=90.0, recovery=60.0, recovery_type='active'):
+    set_data = {'repetitions': repetitions}
+    if distance is not None:
+        set_data['distanceMeters'] = distance
+    if duration is not None:
+        set_data['durationSeconds'] = duration
+    set_data.update(vmaPercent=percent, recoverySeconds=recovery, recoveryType=recovery_type)
+    return set_data
@@ -0,0 +1,34 @@
+import json
+
+from batch_convert import collect_inputs, main
+from training_plan_converter import ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter
+
+
+def test_converts_a_directory_tree(tmp_path):
+    notes = tmp_path / 'notes'
+    (notes / 'march').mkdir(parents=True)
+    (notes / 'a.txt').write_text(SAMPLE_NOTES, encoding='utf-8')
+    (notes / 'march' / 'b.txt').write_text(SAMPLE_NOTES, encoding='utf-8')
+    output = tmp_path / 'out'
+
+    assert main([str(notes), '-o', str(output), '-j', '1']) == 0
+    expected = TrainingPlanConverter(ENGINE_SINGLE_PASS).parse_training_notes(SAMPLE_NOTES)
+    for name in ('a.json', 'march/b.json'):
+        assert json.loads((output / name).read_text(encoding='utf-8')) == expected
+
+
+def test_missing_input_exits_2(tmp_path, capsys):
+    assert main([str(tmp_path / 'missing.txt')]) == 2
+    assert 'not found' in capsys.readouterr().err
+
+
+def test_colliding_outputs_exit_2(tmp_path, capsys):
+    for directory in ('a', 'b'):
+        (tmp_path / directory).mkdir()
+        (tmp_path / directory / 'session.txt').write_text(SAMPLE_NOTES, encoding='utf-8')
+    inputs = [str(tmp_path / 'a' / 'session.txt'), str(tmp_path / 'b' / 'session.txt')]
+    assert [relative for _, relative in collect_inputs(inputs)] == ['session.json', 'session.json']
+
+    assert main(inputs + ['-o', str(tmp_path / 'out')]) == 2
+    assert 'same output file' in capsys.readouterr().err
+    assert not (tmp_path / 'out').exists()
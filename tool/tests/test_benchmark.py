@@ -0,0 +1,49 @@
+import json
+
+from benchmark import build_cases, compare, main, measure
+from notes_generator import generate_notes, generate_set_lines, generate_time_strings
+from training_plan_converter import TrainingPlanConverter
+
+
+def test_generator_is_deterministic():
+    assert generate_notes(groups=3, seed=4) == generate_notes(groups=3, seed=4)
+    assert generate_notes(groups=3, seed=4) != generate_notes(groups=3, seed=5)
+    plan = TrainingPlanConverter().parse_training_notes(generate_notes(groups=3, blocks=2, sets=2, seed=4))
+    assert [len(group['blocks']) for group in plan['groups']] == [2, 2, 2]
+
+
+def test_generated_lines_parse():
+    converter = TrainingPlanConverter()
+    assert all(converter.parse_interval_set(line) for line in generate_set_lines(200))
+    assert all(converter.parse_time_to_seconds(text) > 0 for text in generate_time_strings(200))
+
+
+def test_measure_reports_percentiles():
+    result = measure(lambda: sum(range(100)), min_time=0, min_runs=7)
+    assert result['runs'] == 7
+    assert result['p50_ms'] <= result['p95_ms'] <= result['p99_ms']
+
+
+def test_every_case_runs():
+    for func in build_cases(sizes=((1, 2),)).values():
+        func()
+
+
+def test_compare_flags_only_drops_beyond_tolerance():
+    baseline = {'a': {'ops_per_s': 100.0}, 'b': {'ops_per_s': 100.0}, 'gone': {'ops_per_s': 1.0}}
+    results = {'a': {'ops_per_s': 85.0}, 'b': {'ops_per_s': 75.0}}
+    regressions = compare(results, baseline, tolerance=0.2)
+    assert len(regressions) == 1 and regressions[0].startswith('b:')
+
+
+def test_save_then_check(tmp_path, capsys):
+    baseline = tmp_path / 'baseline.json'
+    assert main(['--min-time', '0', '--filter', 'x1000', '--save', str(baseline)]) == 0
+    saved = json.loads(baseline.read_text(encoding='utf-8'))['results']
+    assert set(saved) == {'parse_interval_set x1000', 'parse_time_to_seconds x1000'}
+
+    for result in saved.values():
+        result['ops_per_s'] *= 1000
+    baseline.write_text(json.dumps({'results': saved}), encoding='utf-8')
+    assert main(['--min-time', '0', '--filter', 'x1000', '--check', str(baseline)]) == 1
+    assert 'REGRESSION' in capsys.readouterr().err
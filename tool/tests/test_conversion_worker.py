@@ -0,0 +1,84 @@
+import threading
+
+import pytest
+
+from conversion_worker import CANCELLED, DONE, Conversion, ConversionWorker
+from incremental_parse import IncrementalNotesParser
+from notes_generator import generate_notes
+from parse_cache import ParseCache
+from training_plan_converter import ENGINE_LEGACY, ENGINE_SINGLE_PASS, ENGINES, TrainingPlanConverter
+
+NOTES = generate_notes(groups=4, blocks=3, seed=5)
+
+
+class Stop(Exception):
+    pass
+
+
+def _counting(converter):
+    """Count the interval lines the converter expands"""
+    calls = []
+    build_sets = converter.build_sets
+    converter.build_sets = lambda *args: calls.append(args) or build_sets(*args)
+    return calls
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_on_group_sees_every_group_in_order(engine):
+    converter = TrainingPlanConverter(engine)
+    seen = []
+    plan = converter.parse_training_notes(NOTES, lambda index, group: seen.append((index, group)))
+    assert seen == list(enumerate(plan['groups']))
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_on_group_is_called_while_scanning(engine):
+    converter = TrainingPlanConverter(engine)
+    full = _counting(converter)
+    converter.parse_training_notes(NOTES)
+
+    converter = TrainingPlanConverter(engine)
+    partial = _counting(converter)
+
+    def stop(index, group):
+        raise Stop()
+
+    with pytest.raises(Stop):
+        converter.parse_training_notes(NOTES, stop)
+    # Raising in the first group's callback leaves the other groups unparsed
+    assert 0 < len(partial) < len(full)
+
+
+def test_incremental_parser_reports_the_same_groups():
+    seen = []
+    plan = IncrementalNotesParser().parse_training_notes(NOTES, lambda index, group: seen.append(group))
+    assert seen == plan['groups'] == TrainingPlanConverter(ENGINE_SINGLE_PASS).parse_training_notes(NOTES)['groups']
+
+
+def test_worker_publishes_groups_and_finishes():
+    worker = ConversionWorker(ParseCache(TrainingPlanConverter(ENGINE_LEGACY)))
+    try:
+        conversion = worker.submit(NOTES)
+        conversion.future.result(timeout=10)
+        assert conversion.state == DONE
+        assert conversion.groups_so_far() == conversion.plan['groups']
+        assert worker.submit(NOTES) is not conversion
+    finally:
+        worker.shutdown()
+
+
+def test_cancel_stops_at_the_next_group():
+    conversion = Conversion(NOTES)
+    cancelled = threading.Event()
+
+    class CancellingConverter(TrainingPlanConverter):
+        def build_sets(self, *args):
+            if conversion.groups and not cancelled.is_set():
+                cancelled.set()
+                conversion.cancel()
+            return super().build_sets(*args)
+
+    converter = CancellingConverter(ENGINE_SINGLE_PASS)
+    conversion._run(ParseCache(converter))
+    assert conversion.state == CANCELLED
+    assert len(conversion.groups) == 1
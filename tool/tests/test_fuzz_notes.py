@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from conftest import TOOL_DIR
+from fuzz_notes import CRASH, Checker, Failure, _ddmin, load_corpus, make_case, minimize, read_donors, save_failure
+from training_plan_converter import ENGINES
+
+CORPUS = load_corpus(os.path.join(TOOL_DIR, 'fuzz_corpus'))
+
+
+@pytest.mark.parametrize('path, entry', CORPUS, ids=[os.path.basename(path) for path, _ in CORPUS])
+def test_corpus_entries_stay_fixed(path, entry):
+    # Generous budget: the corpus guards against crashes and super-linear parses, not slow machines
+    checker = Checker(entry['engine'], budget_ms=500)
+    assert checker.check(entry['text'], entry.get('model')) is None
+
+
+@pytest.mark.parametrize('engine', ENGINES)
+def test_generated_cases_hold_their_properties(engine):
+    checker = Checker(engine, budget_ms=500)
+    donors = read_donors([])
+    for index in range(150):
+        text, model = make_case(0, index, donors)
+        assert checker.check(text, model) is None, index
+
+
+def test_cases_replay_from_their_seed():
+    donors = read_donors([])
+    assert make_case(3, 17, donors) == make_case(3, 17, donors)
+
+
+def test_ddmin_finds_a_minimal_failing_input():
+    items = list(range(40))
+    minimal = _ddmin(items, lambda candidate: {7, 23} <= set(candidate), [1000])
+    assert minimal == [7, 23]
+
+
+def test_checker_reports_and_minimizes_a_crash(monkeypatch):
+    checker = Checker(ENGINES[0])
+
+    def parse(text):
+        if 'boom' in text:
+            raise KeyError('boom')
+        return original(text)
+
+    original = checker.converter.parse_training_notes
+    monkeypatch.setattr(checker.converter, 'parse_training_notes', parse)
+    failure = checker.check("Bloc GROUPE 1 :\nBloc 1\n- 3 x 400 boom 95%\n")
+    assert failure.kind == CRASH and 'KeyError' in failure.detail
+    assert minimize(checker, failure).text == 'boom'
+
+
+def test_saved_failures_load_back(tmp_path):
+    failure = Failure(CRASH, 'KeyError in parse', 'Bloc 1\n- 3 x 400', None)
+    path = save_failure(str(tmp_path), ENGINES[0], failure)
+    assert load_corpus(str(tmp_path)) == [(path, {'engine': ENGINES[0], 'kind': CRASH,
+                                                  'detail': failure.detail, 'text': failure.text})]
@@ -0,0 +1,82 @@
+import random
+
+import pytest
+
+from incremental_parse import IncrementalNotesParser, IncrementalPlanView, render_group_markdown
+from notes_generator import generate_notes
+from training_plan_converter import ENGINE_SINGLE_PASS, TrainingPlanConverter, validate_json_structure
+
+
+def _edit(text, rng):
+    """A random keystroke-sized edit: change a digit or drop a line"""
+    lines = text.split('\n')
+    index = rng.randrange(len(lines))
+    if rng.random() < 0.3:
+        del lines[index]
+    else:
+        lines[index] = ''.join(str(rng.randint(1, 9)) if char.isdigit() and rng.random() < 0.3 else char
+                               for char in lines[index])
+    return '\n'.join(lines)
+
+
+def test_edits_parse_like_a_full_parse():
+    rng = random.Random(8)
+    parser = IncrementalNotesParser()
+    full = TrainingPlanConverter(ENGINE_SINGLE_PASS)
+    text = generate_notes(groups=4, blocks=4, sets=2, seed=1)
+    for _ in range(150):
+        text = _edit(text, rng) if rng.random() < 0.9 else generate_notes(groups=3, seed=rng.randrange(100))
+        assert parser.parse_training_notes(text) == full.parse_training_notes(text)
+
+
+def test_only_changed_blocks_are_reparsed():
+    parser = IncrementalNotesParser()
+    text = generate_notes(groups=3, blocks=4, seed=2)
+    parser.parse_training_notes(text)
+    assert parser.reused_blocks == 0
+
+    parser.parse_training_notes(text)
+    assert (parser.reparsed_blocks, parser.changed_groups) == (0, set())
+
+    last_block = text.rindex('Bloc 4')
+    edited = text[:last_block] + text[last_block:].replace('x', ' x ', 1)
+    plan = parser.parse_training_notes(edited)
+    assert parser.reparsed_blocks == 1 and parser.reused_blocks == 11
+    assert parser.changed_groups == {2}
+    assert plan == TrainingPlanConverter(ENGINE_SINGLE_PASS).parse_training_notes(edited)
+
+
+def test_cached_blocks_are_not_shared_with_callers():
+    parser = IncrementalNotesParser()
+    text = generate_notes(groups=2, seed=3)
+    first = parser.parse_training_notes(text)
+    first['groups'][0]['blocks'][0]['sets'].clear()
+    assert parser.parse_training_notes(text)['groups'][0]['blocks'][0]['sets']
+
+
+def test_failed_callback_keeps_the_previous_reference():
+    parser = IncrementalNotesParser()
+    text = generate_notes(groups=2, seed=4)
+    parser.parse_training_notes(text)
+
+    def fail(index, group):
+        raise RuntimeError()
+
+    with pytest.raises(RuntimeError):
+        parser.parse_training_notes(generate_notes(groups=2, seed=5), fail)
+    parser.parse_training_notes(text)
+    assert parser.reparsed_blocks == 0
+
+
+def test_plan_view_matches_full_validation(sample_plan):
+    view = IncrementalPlanView()
+    errors, previews = view.update(sample_plan)
+    assert errors == validate_json_structure(sample_plan)
+    assert previews == [render_group_markdown(group) for group in sample_plan['groups']]
+
+    sample_plan['groups'][1]['blocks'][0]['sets'][0]['recoveryType'] = 'sprint'
+    del sample_plan['warmup']
+    errors, _ = view.update(sample_plan)
+    assert errors == validate_json_structure(sample_plan)
+    assert view.recomputed_groups == 1
+    assert view.update('not a plan')[0] == validate_json_structure('not a plan')
@@ -0,0 +1,56 @@
+import logging
+
+import pytest
+
+from instrumentation import (
+    GROUP_SPLIT, NULL_INSTRUMENTATION, RECOVERY_MATCHING, SCAN, VALIDATION, Instrumentation, LoggingSink,
+)
+from training_plan_converter import (
+    ENGINE_LEGACY, ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter, validate_json_structure,
+)
+
+
+@pytest.mark.parametrize('engine, stages', [
+    (ENGINE_LEGACY, {GROUP_SPLIT, RECOVERY_MATCHING}),
+    (ENGINE_SINGLE_PASS, {SCAN, RECOVERY_MATCHING}),
+])
+def test_instrumented_parse_is_unchanged_and_recorded(engine, stages):
+    reports = []
+    instrumentation = Instrumentation(reports.append)
+    converter = TrainingPlanConverter(engine, instrumentation=instrumentation)
+    plan = converter.parse_training_notes(SAMPLE_NOTES)
+    assert plan == TrainingPlanConverter(engine).parse_training_notes(SAMPLE_NOTES)
+
+    validate_json_structure(plan, instrumentation)
+    report = instrumentation.emit()
+    assert reports == [report]
+    assert stages | {VALIDATION} <= set(report['timings_ms'])
+    assert report['counts']['regex_matches.group'] == len(plan['groups'])
+    assert report['counts']['validation_issues'] == 0
+    # emit resets the counters
+    assert instrumentation.snapshot() == {'timings_ms': {}, 'calls': {}, 'counts': {}}
+
+
+def test_null_instrumentation_records_nothing():
+    assert not NULL_INSTRUMENTATION.enabled
+    with NULL_INSTRUMENTATION.stage(SCAN):
+        NULL_INSTRUMENTATION.count('sets')
+    assert not NULL_INSTRUMENTATION.emit()
+    assert TrainingPlanConverter().instrumentation is NULL_INSTRUMENTATION
+
+
+def test_stage_accumulates_calls():
+    instrumentation = Instrumentation()
+    for _ in range(3):
+        with instrumentation.stage(VALIDATION):
+            pass
+    assert instrumentation.snapshot()['calls'] == {VALIDATION: 3}
+
+
+def test_logging_sink(caplog):
+    instrumentation = Instrumentation(LoggingSink())
+    instrumentation.count('sets', 4)
+    with caplog.at_level(logging.INFO, logger='training_plan_converter'):
+        instrumentation.emit()
+    assert caplog.records[0].metrics['counts'] == {'sets': 4}
+    assert '"sets": 4' in caplog.records[0].getMessage()
@@ -0,0 +1,96 @@
+import asyncio
+import json
+
+import pytest
+
+from conftest import make_plan, make_set
+from intervals_upload import Athlete, load_roster, main, unmatched_athletes, upload_roster, workout_description
+from mock_intervals_server import MockIntervalsServer
+
+API_KEY = 'a' * 24
+
+
+def _write_roster(path, *rows):
+    path.write_text('athlete_id,api_key,vma,group\n' + ''.join(f"{row}\n" for row in rows), encoding='utf-8')
+    return str(path)
+
+
+@pytest.mark.parametrize('vma', ['nan', 'inf', '-inf', '0', '-3', 'fast', ''])
+def test_load_roster_rejects_invalid_vma(tmp_path, vma):
+    roster = _write_roster(tmp_path / 'roster.csv', f"i1,{API_KEY},{vma},")
+    with pytest.raises(ValueError, match='vma'):
+        load_roster(roster)
+
+
+def test_load_roster_reads_groups(tmp_path):
+    roster = _write_roster(tmp_path / 'roster.csv', f"i1,{API_KEY},15.5,Groupe 2", f"i2,{API_KEY},17,")
+    assert load_roster(roster) == [Athlete('i1', API_KEY, 15.5, 'Groupe 2'), Athlete('i2', API_KEY, 17.0, None)]
+
+
+def test_zero_percent_sets_have_no_pace_target():
+    plan = make_plan(('Groupe 1', [('Bloc 1', [make_set(distance=400, percent=90.0),
+                                               make_set(duration=120, percent=0.0)], 180)]))
+    description = workout_description(plan, plan['groups'][0], 16.0)
+    assert "- 400m 04:10/km Pace" in description
+    assert "- 2m\n" in description
+    assert '-/km' not in description
+
+
+def test_unmatched_groups_are_reported(tmp_path, sample_plan, capsys):
+    plan_path = tmp_path / 'plan.json'
+    plan_path.write_text(json.dumps(sample_plan), encoding='utf-8')
+    roster = _write_roster(tmp_path / 'roster.csv', f"i1,{API_KEY},15,Groupe 1", f"i2,{API_KEY},15,Groupe 9")
+
+    athletes = load_roster(roster)
+    assert unmatched_athletes(sample_plan, athletes) == [athletes[1]]
+    assert main([str(plan_path), roster, '--date', '2026-10-21', '--dry-run']) == 1
+    assert "i2" in capsys.readouterr().err
+
+
+def test_upload_to_mock_server(sample_plan):
+    roster = [Athlete(f"i{i}", API_KEY, 14 + i % 5) for i in range(12)]
+
+    async def run():
+        async with MockIntervalsServer() as server:
+            return await upload_roster(sample_plan, roster, '2026-10-21', base_url=server.url, batch_size=1)
+
+    results = asyncio.run(run())
+    assert all(result.ok for result in results)
+    assert sum(result.events for result in results) == len(roster) * len(sample_plan['groups'])
+
+
+@pytest.mark.parametrize('status_line', [b'', b'garbage', b'HTTP/1.1 OK'])
+def test_malformed_status_line_fails_only_its_upload(sample_plan, status_line):
+    roster = [Athlete(f"i{i}", API_KEY, 15) for i in range(4)]
+    responses = []
+
+    async def handle(reader, writer):
+        while True:
+            try:
+                head = await reader.readuntil(b'\r\n\r\n')
+            except asyncio.IncompleteReadError:
+                break
+            length = int(head.lower().split(b'content-length:')[1].split(b'\r\n')[0])
+            await reader.readexactly(length)
+            # The first response is broken, the server then drops that connection
+            if not responses:
+                responses.append(status_line)
+                writer.write(status_line + b'\r\n\r\n')
+                break
+            responses.append(b'200')
+            writer.write(b'HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\n[]')
+            await writer.drain()
+        writer.close()
+
+    async def run():
+        server = await asyncio.start_server(handle, '127.0.0.1', 0)
+        port = server.sockets[0].getsockname()[1]
+        async with server:
+            return await upload_roster(sample_plan, roster, '2026-10-21', base_url=f'http://127.0.0.1:{port}',
+                                       concurrency=1, retries=0)
+
+    results = asyncio.run(run())
+    failed = [result for result in results if not result.ok]
+    assert len(failed) == 1 and failed[0].status is None
+    assert 'Malformed status line' in failed[0].error
+    assert len(results) == len(roster)
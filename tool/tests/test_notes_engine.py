@@ -0,0 +1,65 @@
+import pytest
+
+from notes_engine import BLOCK, GROUP, RECOVERY, SET, WARMUP
+from notes_generator import generate_notes
+from training_plan_converter import ENGINE_LEGACY, ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter
+
+BLOCK_NOTES = """Bloc GROUPE 1 :
+
+Bloc 1
+- 3 x 400 95%
+1' actif
+- 1 x 1000 80%-85%
+2' marche
+3' pause sèche
+"""
+
+
+@pytest.fixture(scope='module')
+def engines():
+    return TrainingPlanConverter(ENGINE_LEGACY), TrainingPlanConverter(ENGINE_SINGLE_PASS)
+
+
+@pytest.mark.parametrize('seed', range(60))
+def test_engines_agree_on_generated_notes(engines, seed):
+    legacy, single_pass = engines
+    text = generate_notes(groups=1 + seed % 5, blocks=1 + seed % 4, sets=1 + seed % 3, seed=seed,
+                          multi_percent_ratio=0.5)
+    assert single_pass.parse_training_notes(text) == legacy.parse_training_notes(text)
+
+
+def test_tokens_in_document_order(engines):
+    _, single_pass = engines
+    kinds = [kind for kind, _ in single_pass.single_pass_parser.tokenize("Échauffement 15'\n" + BLOCK_NOTES)]
+    assert kinds == [WARMUP, GROUP, BLOCK, SET, RECOVERY, SET, RECOVERY, RECOVERY]
+
+
+def test_block_sets_recoveries_and_after_recovery(engines):
+    legacy, single_pass = engines
+    plan = single_pass.parse_training_notes(BLOCK_NOTES)
+    assert plan == legacy.parse_training_notes(BLOCK_NOTES)
+    block = plan['groups'][0]['blocks'][0]
+    assert [(s['repetitions'], s['distanceMeters'], s['vmaPercent']) for s in block['sets']] == [
+        (3, 400, 95.0), (1, 1000, 80.0), (1, 1000, 85.0)]
+    assert [(s['recoverySeconds'], s['recoveryType']) for s in block['sets']] == [
+        (60.0, 'active'), (120.0, 'walk'), (180.0, 'rest')]
+    assert (block['afterRecoverySeconds'], block['afterRecoveryType']) == (180.0, 'rest')
+
+
+def test_parse_block_matches_the_full_scan(engines):
+    _, single_pass = engines
+    content = BLOCK_NOTES.split('Bloc 1', 1)[1]
+    block = single_pass.single_pass_parser.parse_block('Bloc 1', content)
+    assert block == single_pass.parse_training_notes(BLOCK_NOTES)['groups'][0]['blocks'][0]
+
+
+def test_long_digit_runs_parse(engines):
+    legacy, single_pass = engines
+    # Quadratic or worse recovery matching would not finish on this
+    text = SAMPLE_NOTES.replace("2' actif", '9' * 20000 + " actif")
+    assert single_pass.parse_training_notes(text) == legacy.parse_training_notes(text)
+
+
+def test_unknown_engine():
+    with pytest.raises(ValueError, match='engine'):
+        TrainingPlanConverter('regex')
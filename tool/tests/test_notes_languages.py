@@ -0,0 +1,67 @@
+import pytest
+
+from notes_generator import generate_notes
+from notes_languages import DEFAULT_LANGUAGES, fold, select_languages
+from training_plan_converter import ENGINE_LEGACY, ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter
+
+# Remarks in French that hold English recovery words and a bare group header
+FRENCH_REMARKS = ("Groupe 3 : ceux qui reviennent de blessure font 2 active puis 5 rest, "
+                  "Remarques : 10 walk autorisé.")
+
+
+def _parse(text, engine=ENGINE_SINGLE_PASS, codes=None):
+    languages = select_languages(codes) if codes else None
+    return TrainingPlanConverter(engine, languages=languages).parse_training_notes(text)
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_single_pass_matches_legacy_on_french_notes(seed):
+    text = generate_notes(groups=1 + seed % 4, blocks=1 + seed % 5, sets=1 + seed % 3, seed=seed)
+    text = text.replace("Bien respecter les % de VMA très important.", FRENCH_REMARKS)
+    assert _parse(text) == _parse(text, ENGINE_LEGACY)
+
+
+def test_sample_notes_parity():
+    assert _parse(SAMPLE_NOTES) == _parse(SAMPLE_NOTES, ENGINE_LEGACY)
+
+
+def test_other_languages_are_opt_in():
+    assert [language.code for language in select_languages(DEFAULT_LANGUAGES)] == ['fr']
+    english = (SAMPLE_NOTES.replace('Bloc GROUPE', 'Group').replace('Bloc ', 'Block ')
+               .replace('Échauffement', 'Warm-up').replace('Retour au calme', 'Cool down')
+               .replace('Remarques supplémentaires', 'Additional remarks')
+               .replace('pause sèche', 'standing rest').replace('actif', 'active'))
+    assert _parse(english)['groups'] == []
+    assert _parse(english, codes=['en']) == _parse(SAMPLE_NOTES)
+
+
+def test_short_french_headers_are_opt_in():
+    text = SAMPLE_NOTES.replace('Bloc GROUPE', 'Groupe').replace('Remarques supplémentaires', 'Remarques')
+    assert _parse(text)['groups'] == []
+    assert _parse(text, codes=['fr-short']) == _parse(SAMPLE_NOTES)
+
+
+def test_unknown_language():
+    with pytest.raises(ValueError, match='xx'):
+        select_languages(['fr', 'xx'])
+
+
+def test_fold_ignores_case_accents_and_separators():
+    assert fold('Pause  Sèche') == fold('pause-seche') == 'pause seche'
+
+
+@pytest.mark.parametrize('recovery', ["actif(pour les plus en forme)", "actif (pour lesplus en forme)"])
+@pytest.mark.parametrize('engine', [ENGINE_SINGLE_PASS, ENGINE_LEGACY])
+def test_recovery_phrase_without_separator_keeps_its_type(recovery, engine):
+    converter = TrainingPlanConverter(engine)
+    assert converter.parse_recovery_type(recovery) == 'active'
+    text = f"Bloc GROUPE 1 :\nBloc 1\n- 3 x 800 90%\n2' {recovery}, marche ou trott\n3' pause sèche"
+    block = converter.parse_training_notes(text)['groups'][0]['blocks'][0]
+    assert block['sets'][0]['recoveryType'] == 'active'
+    assert block['afterRecoverySeconds'] == 180
+
+
+def test_headers_match_without_separator():
+    text = SAMPLE_NOTES.replace('Échauffement', 'Warmup')
+    assert _parse(text, codes=['fr', 'en'])['warmup'] == _parse(SAMPLE_NOTES)['warmup'].replace(
+        'Échauffement', 'Warmup')
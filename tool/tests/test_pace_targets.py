@@ -0,0 +1,42 @@
+import io
+import json
+import math
+
+import pytest
+
+from conftest import make_plan, make_set
+from pace_targets import Athlete, PlanTargets, format_pace_per_km, load_athletes, write_targets
+
+
+def _write_roster(path, *rows):
+    path.write_text('athlete_id,vma,group\n' + ''.join(f"{row}\n" for row in rows), encoding='utf-8')
+    return str(path)
+
+
+def test_pace_rounds_like_dart():
+    assert format_pace_per_km(16.0) == '03:45'
+    assert format_pace_per_km(0) == '-'
+
+
+@pytest.mark.parametrize('vma', ['nan', 'inf', '0', 'x'])
+def test_load_athletes_rejects_invalid_vma(tmp_path, vma):
+    with pytest.raises(ValueError, match='vma'):
+        load_athletes(_write_roster(tmp_path / 'roster.csv', f"a1,{vma},"))
+
+
+def test_targets_are_valid_json_per_athlete(tmp_path, sample_plan):
+    roster = load_athletes(_write_roster(tmp_path / 'roster.csv', "a1,15,Groupe 1", "a2,15,", "a3,16.5,Groupe 2"))
+    out = io.StringIO()
+    plan_targets = write_targets(sample_plan, roster, out)
+    records = [json.loads(line) for line in out.getvalue().splitlines()]
+
+    assert [(record['athlete'], record['vma']) for record in records] == [('a1', 15.0), ('a2', 15.0), ('a3', 16.5)]
+    assert [group['title'] for group in records[0]['groups']] == ['Groupe 1']
+    assert len(records[1]['groups']) == len(sample_plan['groups'])
+    assert plan_targets.distinct_vmas == 2
+
+
+def test_nan_vma_is_not_written_as_json():
+    plan = make_plan(('Groupe 1', [('Bloc 1', [make_set(distance=400)], 180)]))
+    with pytest.raises(ValueError):
+        PlanTargets(plan).athlete_json(Athlete('a1', math.nan))
@@ -0,0 +1,50 @@
+from notes_generator import generate_notes
+from parse_cache import ParseCache, normalize_notes
+from training_plan_converter import SAMPLE_NOTES, TrainingPlanConverter, validate_json_structure
+
+
+def test_hit_returns_an_equal_copy():
+    cache = ParseCache()
+    plan, errors = cache.get_or_parse(SAMPLE_NOTES)
+    assert plan == cache.converter.parse_training_notes(SAMPLE_NOTES)
+    assert errors == validate_json_structure(plan)
+
+    plan['groups'].clear()
+    again, _ = cache.get_or_parse(SAMPLE_NOTES)
+    assert again['groups']
+    assert cache.stats()['hits'] == 1 and cache.stats()['misses'] == 1
+
+
+def test_line_endings_and_accent_forms_share_an_entry():
+    cache = ParseCache()
+    decomposed = SAMPLE_NOTES.replace('\n', '\r\n').replace('\u00c9', 'E\u0301')
+    assert normalize_notes(decomposed) == SAMPLE_NOTES
+    assert cache.key(decomposed) == cache.key(SAMPLE_NOTES)
+    cache.get_or_parse(SAMPLE_NOTES)
+    cache.get_or_parse(decomposed)
+    assert cache.stats()['misses'] == 1
+
+
+def test_lru_eviction_by_entries_and_bytes():
+    cache = ParseCache(max_entries=3)
+    notes = [generate_notes(seed=seed) for seed in range(5)]
+    for text in notes:
+        cache.get_or_parse(text)
+    cache.get_or_parse(notes[2])
+    cache.get_or_parse(notes[0])
+    stats = cache.stats()
+    assert (stats['entries'], stats['evictions'], stats['hits'], stats['misses']) == (3, 3, 1, 6)
+
+    small = ParseCache(max_bytes=stats['bytes'] // 3 + 1)
+    for text in notes:
+        small.get_or_parse(text)
+    assert small.stats()['bytes'] <= small.max_bytes
+
+
+def test_disk_store_warms_a_new_cache(tmp_path):
+    ParseCache(directory=str(tmp_path)).get_or_parse(SAMPLE_NOTES)
+    converter = TrainingPlanConverter()
+    cache = ParseCache(converter, directory=str(tmp_path))
+    plan, _ = cache.get_or_parse(SAMPLE_NOTES)
+    assert cache.stats()['disk_hits'] == 1 and cache.stats()['misses'] == 0
+    assert plan == converter.parse_training_notes(SAMPLE_NOTES)
@@ -0,0 +1,94 @@
+import datetime
+import random
+
+import pytest
+
+from notes_generator import generate_notes
+from plan_archive import PlanArchive, PlanArchiveWriter, _float32, ordinal_date
+from training_plan_converter import TrainingPlanConverter
+
+
+@pytest.fixture(scope='module')
+def dated_plans():
+    converter = TrainingPlanConverter()
+    rng = random.Random(7)
+    base = datetime.date(2024, 9, 2).toordinal()
+    plans = []
+    for seed in range(40):
+        plan = converter.parse_training_notes(generate_notes(groups=1 + seed % 3, blocks=3, sets=2, seed=seed))
+        # Some plans have no date, some share one
+        date = None if seed % 9 == 0 else ordinal_date(base + rng.randint(0, 60))
+        plans.append((plan, date))
+    return plans
+
+
+@pytest.fixture(scope='module')
+def archive(dated_plans, tmp_path_factory):
+    path = str(tmp_path_factory.mktemp('archive') / 'plans.vpa')
+    with PlanArchiveWriter(path) as writer:
+        for plan, date in dated_plans:
+            writer.add(plan, date)
+    with PlanArchive(path) as reader:
+        yield reader
+
+
+def _within(value, low, high):
+    return (low is None or value >= _float32(low)) and (high is None or value <= _float32(high))
+
+
+def brute_force(dated_plans, date_from=None, date_to=None, group=None, min_distance=None, max_distance=None,
+                min_percent=None, max_percent=None, min_repetitions=None):
+    """(plan, group title, block) of every block with a set within every bound"""
+    matches = []
+    for index, (plan, date) in enumerate(dated_plans):
+        if date_from or date_to:
+            if date is None or (date_from and date < date_from) or (date_to and date > date_to):
+                continue
+        for plan_group in plan['groups']:
+            if group is not None and plan_group.get('title') != group:
+                continue
+            for block in plan_group['blocks']:
+                if any(_within(_float32(float(s.get('distanceMeters') or 0)), min_distance, max_distance)
+                       and _within(_float32(float(s.get('vmaPercent') or 0)), min_percent, max_percent)
+                       and (min_repetitions is None or (s.get('repetitions') or 0) >= min_repetitions)
+                       for s in block['sets']):
+                    matches.append((index, plan_group.get('title', ''), block))
+    return matches
+
+
+def test_round_trip(archive, dated_plans):
+    assert len(archive) == len(dated_plans)
+    for index, (plan, date) in enumerate(dated_plans):
+        assert archive.plan(index) == plan
+        assert archive.date(index) == date
+
+
+def test_query_matches_brute_force(archive, dated_plans):
+    rng = random.Random(11)
+    dates = sorted({date for _, date in dated_plans if date})
+    for _ in range(200):
+        bounds = {}
+        if rng.random() < 0.5:
+            bounds['date_from'] = rng.choice(dates)
+        if rng.random() < 0.5:
+            bounds['date_to'] = rng.choice(dates)
+        if rng.random() < 0.3:
+            bounds['group'] = rng.choice(archive.titles + ['Groupe 9'])
+        if rng.random() < 0.5:
+            bounds['min_distance'] = rng.choice((0, 200, 400, 1000, 1500))
+        if rng.random() < 0.3:
+            bounds['max_distance'] = rng.choice((0, 300, 1000, 3000))
+        if rng.random() < 0.5:
+            bounds['min_percent'] = rng.choice((80, 90, 95.5, 100))
+        if rng.random() < 0.3:
+            bounds['max_percent'] = rng.choice((85, 95, 105))
+        if rng.random() < 0.2:
+            bounds['min_repetitions'] = rng.randint(1, 8)
+        expected = brute_force(dated_plans, **bounds)
+        got = [(match.plan, match.group, match.block) for match in archive.query(**bounds)]
+        assert got == expected, bounds
+
+
+def test_query_decompresses_only_matching_plans(archive):
+    matches = archive.query(min_percent=100)
+    assert archive.plans_loaded == len({match.plan for match in matches})
@@ -0,0 +1,152 @@
+import copy
+import json
+import random
+
+import pytest
+
+from notes_generator import generate_notes
+from plan_diff import (
+    BLOCK, GROUP, PlanIndex, apply_diff, apply_operation, canonical, diff_plans, main, plan_hash,
+)
+import plan_json
+from training_plan_converter import ENGINE_SINGLE_PASS, SAMPLE_NOTES, TrainingPlanConverter
+
+
+@pytest.fixture(scope='module')
+def templates():
+    converter = TrainingPlanConverter(ENGINE_SINGLE_PASS)
+    return [converter.parse_training_notes(generate_notes(groups=groups, blocks=3, seed=seed))
+            for seed in range(10) for groups in (1, 3)]
+
+
+def _mutate(plan, rng):
+    """Insert, drop, reorder and edit groups, blocks and set fields"""
+    plan = copy.deepcopy(plan)
+    for _ in range(rng.randint(0, 6)):
+        groups = plan['groups']
+        roll = rng.random()
+        if not groups:
+            break
+        if roll < 0.15:
+            groups.insert(rng.randint(0, len(groups)), copy.deepcopy(rng.choice(groups)))
+        elif roll < 0.25:
+            groups.pop(rng.randrange(len(groups)))
+        elif roll < 0.35:
+            rng.shuffle(groups)
+        elif roll < 0.95:
+            blocks = rng.choice(groups)['blocks']
+            if not blocks:
+                continue
+            block = rng.choice(blocks)
+            roll = rng.random()
+            if roll < 0.2:
+                blocks.insert(rng.randint(0, len(blocks)), copy.deepcopy(block))
+            elif roll < 0.3:
+                blocks.remove(block)
+            elif roll < 0.4:
+                block['title'] += 'x'
+            elif roll < 0.5:
+                block.pop('afterRecoverySeconds', None)
+            elif roll < 0.6:
+                block['sets'].append(copy.deepcopy(rng.choice(block['sets'])))
+            elif block['sets']:
+                set_data = rng.choice(block['sets'])
+                key = rng.choice(list(set_data))
+                value = set_data[key]
+                set_data[key] = value + 1 if isinstance(value, (int, float)) else value + 'y'
+        else:
+            plan['remarks'] += '!'
+    return plan
+
+
+@pytest.mark.parametrize('copies', [True, False])
+def test_apply_diff_rebuilds_the_target(templates, copies):
+    rng = random.Random(1 + copies)
+    for _ in range(300):
+        old = _mutate(rng.choice(templates), rng)
+        new = _mutate(old, rng) if rng.random() < 0.7 else _mutate(rng.choice(templates), rng)
+        patch = diff_plans(old, new, copies)
+        assert plan_hash(apply_diff(old, patch)) == plan_hash(new)
+        # Patches are plain JSON
+        assert plan_json.loads(json.dumps(patch)) == patch
+
+
+def test_identical_plans_need_no_operations(templates):
+    plan = templates[3]
+    assert diff_plans(plan, copy.deepcopy(plan)) == []
+
+
+def test_added_block_is_a_copy_of_an_equal_one(templates):
+    old = templates[1]
+    new = copy.deepcopy(old)
+    new['groups'][1]['blocks'].append(copy.deepcopy(old['groups'][0]['blocks'][0]))
+    patch = diff_plans(old, new)
+    assert [operation['op'] for operation in patch] == ['copy']
+    assert apply_diff(old, patch) == new
+
+
+def test_canonical_hash_ignores_serialization_details():
+    plan = TrainingPlanConverter().parse_training_notes(SAMPLE_NOTES)
+    reserialized = json.loads(json.dumps(plan))
+    reserialized['groups'][0]['blocks'][0]['sets'][0]['distanceMeters'] = float(
+        plan['groups'][0]['blocks'][0]['sets'][0]['distanceMeters'])
+    reserialized['title'] = reserialized['title'].replace('é', 'é')
+    assert canonical(reserialized) == canonical(plan)
+    assert plan_hash(reserialized) == plan_hash(plan)
+    assert plan_hash(dict(plan, remarks='autre')) != plan_hash(plan)
+    assert plan_hash(dict(plan, remarks='autre'), 'shape') == plan_hash(plan, 'shape')
+
+
+def test_index_finds_duplicates_and_bases(templates):
+    index = PlanIndex()
+    for plan in templates[:4]:
+        index.add(plan)
+    edited = copy.deepcopy(templates[3])
+    edited['groups'][0]['blocks'][0]['sets'][0]['vmaPercent'] += 5
+    assert index.bases[index.add(edited)] == 3
+    repeated = index.duplicates(BLOCK)
+    assert repeated and all(len(occurrences) > 1 for occurrences in repeated)
+    assert any(kind == 'intensity' for kind, _ in index.near_duplicates(BLOCK))
+    assert index.distinct(GROUP) <= index.nodes[GROUP]
+
+
+@pytest.mark.parametrize('operation', [
+    {'op': 'move', 'from': '/groups/0', 'path': '/groups/1'},
+    {'op': 'remove', 'path': ''},
+    {'op': 'replace', 'path': '/groups/9', 'value': {}},
+    {'op': 'add', 'path': 'groups/0', 'value': {}},
+    {'op': 'remove', 'path': '/missing'},
+])
+def test_invalid_operations_raise_value_error(sample_plan, operation):
+    with pytest.raises(ValueError):
+        apply_operation(sample_plan, operation)
+
+
+def test_cli_diff_then_apply(sample_plan, tmp_path, capsys):
+    edited = copy.deepcopy(sample_plan)
+    edited['groups'][0]['blocks'][0]['sets'][0]['vmaPercent'] = 97
+    edited['groups'].reverse()
+    paths = {}
+    for name, plan in (('old', sample_plan), ('new', edited)):
+        paths[name] = str(tmp_path / f'{name}.json')
+        with open(paths[name], 'w', encoding='utf-8') as f:
+            plan_json.dump(plan, f)
+    patch, rebuilt = str(tmp_path / 'patch.json'), str(tmp_path / 'rebuilt.json')
+
+    assert main(['diff', paths['old'], paths['new'], '-o', patch]) == 0
+    assert 'operations' in capsys.readouterr().err
+    assert main(['apply', paths['old'], patch, '-o', rebuilt]) == 0
+    with open(rebuilt, encoding='utf-8') as f:
+        assert plan_hash(plan_json.load(f)) == plan_hash(edited)
+
+
+def test_cli_apply_reports_bad_patches(sample_plan, tmp_path, capsys):
+    plan, patch = tmp_path / 'plan.json', tmp_path / 'patch.json'
+    plan.write_text(plan_json.dumps(sample_plan), encoding='utf-8')
+    patch.write_text(json.dumps([{'op': 'remove', 'path': '/groups/9'}]), encoding='utf-8')
+    assert main(['apply', str(plan), str(patch)]) == 1
+    assert capsys.readouterr().err
+
+
+def test_benchmark_runs():
+    assert main(['benchmark', '--plans', '30', '--seed', '2']) == 0
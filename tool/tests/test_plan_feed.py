@@ -0,0 +1,51 @@
+import copy
+import json
+
+from notes_generator import generate_notes
+from plan_feed import format_report, load_feed, load_manifest, main, publish
+from training_plan_converter import TrainingPlanConverter
+
+
+def _plans(count=6):
+    converter = TrainingPlanConverter()
+    return [(converter.parse_training_notes(generate_notes(groups=2, seed=seed)), f"2026-10-{seed + 1:02d}")
+            for seed in range(count)]
+
+
+def test_publish_round_trip(tmp_path):
+    plans = _plans()
+    report = publish(str(tmp_path), plans)
+    assert load_feed(str(tmp_path)) == [plan for plan, _ in plans]
+    assert report['version'] == 1 and report['plans'] == len(plans)
+
+
+def test_republish_downloads_only_changed_chunks(tmp_path):
+    plans = _plans()
+    publish(str(tmp_path), plans)
+    assert publish(str(tmp_path), plans)['version'] == 1
+
+    changed = copy.deepcopy(plans)
+    changed[2][0]['groups'][0]['blocks'][0]['sets'][0]['repetitions'] += 1
+    report = publish(str(tmp_path), changed, prune=True)
+    assert report['version'] == 2
+    assert report['new_chunks'] == 1
+    assert load_feed(str(tmp_path)) == [plan for plan, _ in changed]
+    assert len(list((tmp_path / 'plans').iterdir())) == len(load_manifest(str(tmp_path))['plans'])
+
+
+def test_verify_command(tmp_path, sample_plan):
+    plan_path = tmp_path / '2026-10-21.json'
+    plan_path.write_text(json.dumps(sample_plan), encoding='utf-8')
+    feed = str(tmp_path / 'feed')
+    assert main(['publish', feed, str(plan_path)]) == 0
+    assert main(['verify', feed, str(plan_path)]) == 0
+
+
+def test_report_states_smaller_or_larger_without_sign():
+    report = {'version': 3, 'plans': 2, 'new_chunks': 1, 'single_file_bytes': 1000,
+              'single_file_gzip_bytes': 250, 'full_download_bytes': 1200, 'update_download_bytes': 1000}
+    lines = format_report(report).splitlines()
+    assert lines[2].endswith("(75.0% smaller than the single file)")
+    assert lines[3].endswith("(20.0% larger than the single file)")
+    assert lines[4].endswith("(same size as the single file)")
+    assert 'saved' not in format_report(report)
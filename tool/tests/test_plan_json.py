@@ -0,0 +1,63 @@
+import io
+import json
+import math
+
+import pytest
+
+import plan_json
+from plan_json import BACKENDS, dump, dumps, dumps_bytes, dumps_compact, loads
+
+# Values orjson writes differently from json, or refuses
+EDGE_VALUES = [
+    1e-05, 1e16, 1.5e300, -0.0, math.nan, math.inf, -math.inf, 2 ** 70, {1: 'int key'}, '\ud800',
+    'e-5 in a string', 'null', 'Échauffement ’', [0.1, 100.0, 12345678.9],
+]
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_plans_encode_like_json(backend, sample_plan):
+    assert dumps(sample_plan, backend) == json.dumps(sample_plan, indent=2, ensure_ascii=False)
+    assert dumps_bytes(sample_plan, backend) == dumps(sample_plan, backend).encode('utf-8')
+    assert dumps_compact(sample_plan, backend) == json.dumps(
+        sample_plan, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    assert loads(dumps_compact(sample_plan, backend), backend) == sample_plan
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+@pytest.mark.parametrize('value', EDGE_VALUES, ids=repr)
+def test_edge_values_encode_like_json(backend, value):
+    document = {'value': value}
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    assert dumps(document, backend) == text
+    compact = json.dumps(document, ensure_ascii=False, separators=(',', ':'))
+    if value == '\ud800':
+        # No UTF-8 form, with either backend
+        with pytest.raises(UnicodeEncodeError):
+            dumps_compact(document, backend)
+        with pytest.raises(UnicodeEncodeError):
+            dumps_bytes(document, backend)
+    else:
+        assert dumps_compact(document, backend) == compact.encode('utf-8')
+        assert dumps_bytes(document, backend) == text.encode('utf-8')
+
+
+@pytest.mark.parametrize('backend', BACKENDS)
+def test_loads_accepts_every_input_type_and_json_only_documents(backend):
+    text = '{"a": [1, 2.5, "é"]}'
+    for data in (text, text.encode('utf-8'), bytearray(text.encode('utf-8')), memoryview(text.encode('utf-8'))):
+        assert loads(data, backend) == {'a': [1, 2.5, 'é']}
+    assert loads('[NaN, 123456789012345678901234567890]', backend)[1] == 123456789012345678901234567890
+    with pytest.raises(json.JSONDecodeError):
+        loads('{"a": ', backend)
+
+
+def test_dump_to_text_and_binary_files(sample_plan):
+    text, binary = io.StringIO(), io.BytesIO()
+    dump(sample_plan, text)
+    dump(sample_plan, binary)
+    assert binary.getvalue() == text.getvalue().encode('utf-8') == dumps_bytes(sample_plan)
+
+
+def test_main_checks_the_backends_agree(capsys):
+    assert plan_json.main(['--min-time', '0']) == 0
+    assert 'outputs identical' in capsys.readouterr().out
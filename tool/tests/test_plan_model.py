@@ -0,0 +1,56 @@
+import glob
+import json
+import os
+
+import pytest
+
+from conftest import TOOL_DIR, make_plan, make_set
+from notes_generator import generate_notes
+from plan_model import SetColumns, TrainingPlan, footprint_report, plans_from_json
+from training_plan_converter import TrainingPlanConverter
+
+ASSET_PLANS = sorted(glob.glob(os.path.join(TOOL_DIR, '..', 'assets', 'training_plans', '*.json')))
+
+
+def _plans():
+    converter = TrainingPlanConverter()
+    plans = [converter.parse_training_notes(generate_notes(groups=2, seed=seed)) for seed in range(8)]
+    plans.append(make_plan(('Groupe 1', [('Bloc 1', [make_set(duration=90, percent=100, recovery=30),
+                                                     make_set(repetitions=4, distance=200.5, percent=110.5)],
+                                          180)])))
+    for path in ASSET_PLANS:
+        with open(path, encoding='utf-8') as f:
+            plans.append(json.load(f))
+    return plans
+
+
+@pytest.mark.parametrize('columnar', [False, True])
+def test_json_round_trip_is_byte_identical(columnar):
+    plans = _plans()
+    for plan, model in zip(plans, plans_from_json(plans, columnar=columnar)):
+        assert json.dumps(model.to_json()) == json.dumps(plan)
+
+
+def test_columnar_rows_keep_their_json_types():
+    columns = SetColumns()
+    block = TrainingPlan.from_json(make_plan(('Groupe 1', [('Bloc 1', [
+        make_set(distance=400, percent=95, recovery=60),
+        make_set(duration=30.5, percent=100.0, recovery=15.5, recovery_type='custom'),
+    ], 180)])), columns).groups[0].blocks[0]
+    first, second = block.sets
+    assert isinstance(first.distance_meters, int) and first.duration_seconds is None
+    assert isinstance(first.vma_percent, int) and isinstance(second.vma_percent, float)
+    assert second.distance_meters is None and second.recovery_type == 'custom'
+    assert block.sets[-1] == second
+    with pytest.raises(IndexError):
+        block.sets[2]
+
+
+def test_columnar_needs_complete_sets():
+    with pytest.raises(ValueError):
+        SetColumns().extend([{'repetitions': 1, 'distanceMeters': 400}])
+
+
+def test_slotted_and_columnar_models_are_smaller():
+    report = footprint_report(_plans())
+    assert report['columnar_bytes'] < report['slotted_bytes'] < report['dict_bytes']
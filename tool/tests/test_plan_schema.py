@@ -0,0 +1,93 @@
+import copy
+import json
+import random
+
+from conftest import make_plan, make_set
+from plan_schema import (
+    DISTANCE_OR_DURATION, INVALID_ENUM, MISSING_FIELD, OUT_OF_RANGE, WRONG_TYPE, GROUP_SCHEMA, PlanValidator,
+    validate_plan,
+)
+from training_plan_converter import fix_recovery_types, validate_json_structure, validate_json_structure_legacy
+
+REQUIRED = {
+    'plan': ['title', 'warmup', 'cooldown', 'remarks', 'groups'],
+    'group': ['title', 'blocks'],
+    'block': ['title', 'sets'],
+    'set': ['repetitions', 'vmaPercent', 'recoverySeconds', 'recoveryType'],
+}
+
+
+def _nodes(plan):
+    yield 'plan', plan
+    for group in plan.get('groups', []):
+        yield 'group', group
+        for block in group.get('blocks', []):
+            yield 'block', block
+            for set_data in block.get('sets', []):
+                yield 'set', set_data
+
+
+def test_valid_plan_has_no_issues(sample_plan):
+    assert validate_plan(sample_plan) == []
+    assert validate_json_structure_legacy(sample_plan) == []
+
+
+def test_missing_fields_match_the_legacy_checks(sample_plan):
+    rng = random.Random(5)
+    for _ in range(200):
+        plan = copy.deepcopy(sample_plan)
+        for _ in range(rng.randint(1, 4)):
+            kind, node = rng.choice(list(_nodes(plan)))
+            present = [key for key in REQUIRED[kind] if key in node]
+            if present:
+                del node[rng.choice(present)]
+        missing = [issue for issue in validate_plan(plan) if issue.code == MISSING_FIELD]
+        assert len(missing) == len(validate_json_structure_legacy(plan))
+
+
+def test_issue_codes_and_paths():
+    plan = make_plan(('Groupe 1', [('Bloc 1', [
+        make_set(distance=400, percent=0),
+        make_set(distance=400, duration=60),
+        make_set(repetitions='3', distance=400),
+        make_set(distance=400, recovery_type='sprint'),
+    ], 180)]))
+    issues = [(issue.path, issue.code) for issue in validate_plan(plan)]
+    prefix = '$.groups[0].blocks[0].sets'
+    assert issues == [
+        (f'{prefix}[0].vmaPercent', OUT_OF_RANGE),
+        (f'{prefix}[1]', DISTANCE_OR_DURATION),
+        (f'{prefix}[2].repetitions', WRONG_TYPE),
+        (f'{prefix}[3].recoveryType', INVALID_ENUM),
+    ]
+    assert len(validate_plan(plan, fail_fast=True)) == 1
+    assert not PlanValidator().is_valid(plan)
+
+    fix_recovery_types(plan)
+    assert INVALID_ENUM not in {issue.code for issue in validate_plan(plan)}
+
+
+def test_nan_numbers_are_out_of_range(sample_plan):
+    plan = copy.deepcopy(sample_plan)
+    block = plan['groups'][0]['blocks'][0]
+    for field in ('vmaPercent', 'recoverySeconds', 'distanceMeters'):
+        block['sets'][0][field] = float('nan')
+    block['afterRecoverySeconds'] = float('nan')
+    issues = [(issue.path, issue.code) for issue in validate_plan(plan)]
+    prefix = '$.groups[0].blocks[0]'
+    assert issues == [
+        (f'{prefix}.sets[0].distanceMeters', OUT_OF_RANGE),
+        (f'{prefix}.sets[0].vmaPercent', OUT_OF_RANGE),
+        (f'{prefix}.sets[0].recoverySeconds', OUT_OF_RANGE),
+        (f'{prefix}.afterRecoverySeconds', OUT_OF_RANGE),
+    ]
+    # json.loads reads NaN, so a plan file can hold it in any number field
+    assert len(validate_json_structure(json.loads(json.dumps(plan)))) == 4
+
+
+def test_sub_schema_paths():
+    validator = PlanValidator(GROUP_SCHEMA)
+    issues = validator.validate({'title': 'Groupe 1'}, path=('groups', 2))
+    # Missing fields are reported on the object that lacks them
+    assert [(issue.path, issue.code) for issue in issues] == [('$.groups[2]', MISSING_FIELD)]
+    assert 'blocks' in issues[0].message
@@ -0,0 +1,30 @@
+import pytest
+
+import text_to_training_data
+import training_plan_converter
+from startup_benchmark import CORE_TARGETS, HEAVY_MODULES, available_targets, check, probe
+
+
+@pytest.mark.parametrize('target', CORE_TARGETS)
+def test_core_imports_stay_light(target):
+    result = probe(target)
+    assert not set(result['modules']) & set(HEAVY_MODULES)
+    assert 'training_plan_converter' in result['modules']
+
+
+def test_editor_target_is_measured():
+    assert 'editor module' in available_targets()
+    assert 'text_to_training_data' in probe('editor module')['modules']
+
+
+def test_check_reports_heavy_modules_and_budget():
+    light = {'import_ms': 5.0, 'modules': ['training_plan_converter', 're']}
+    heavy = {'import_ms': 80.0, 'modules': ['training_plan_converter', 'json']}
+    assert check({'core': light, 'core + parse': light}, max_import_ms=50) == []
+    assert check({'core': light, 'core + parse': heavy}, max_import_ms=50) == [
+        'core + parse: loads json', 'core + parse: import 80.0ms > 50.0ms']
+
+
+def test_editor_module_reexports_the_core():
+    for name in ('TrainingPlanConverter', 'validate_json_structure', 'fix_recovery_types', 'SAMPLE_NOTES'):
+        assert getattr(text_to_training_data, name) is getattr(training_plan_converter, name)
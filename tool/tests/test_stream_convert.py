@@ -0,0 +1,64 @@
+import io
+import json
+
+import pytest
+
+import plan_json
+from notes_generator import generate_notes
+from stream_convert import iter_sessions, main, stream_plans, write_ndjson
+from training_plan_converter import ENGINE_SINGLE_PASS, TrainingPlanConverter
+
+SESSIONS = [generate_notes(groups=1 + seed % 3, seed=seed) for seed in range(5)]
+
+
+def test_sessions_split_and_parse_like_single_files():
+    export = '\n\n'.join(SESSIONS)
+    converter = TrainingPlanConverter(ENGINE_SINGLE_PASS)
+    plans = list(stream_plans(io.StringIO(export), converter))
+    assert plans == [converter.parse_training_notes(text) for text in SESSIONS]
+
+
+def test_second_warmup_opens_a_session():
+    lines = ["Échauffement 15'\n", "Bloc GROUPE 1 :\n", "Échauffement 10'\n", "Bloc GROUPE 2 :\n"]
+    assert list(iter_sessions(lines)) == [''.join(lines[:2]), ''.join(lines[2:])]
+
+
+def test_plans_are_yielded_before_the_rest_is_read():
+    read = []
+
+    def lines():
+        for index, text in enumerate(SESSIONS):
+            read.append(index)
+            yield from text.splitlines(keepends=True)
+
+    plans = stream_plans(lines())
+    next(plans)
+    # The first plan needs the line that opens the second session, nothing after it
+    assert read == [0, 1]
+
+
+def test_main_writes_ndjson(tmp_path, capsys):
+    source = tmp_path / 'export.txt'
+    source.write_text('\n'.join(SESSIONS), encoding='utf-8')
+    output = tmp_path / 'plans.ndjson'
+    assert main([str(source), '-o', str(output), '--validate']) == 0
+    lines = output.read_text(encoding='utf-8').splitlines()
+    assert len(lines) == len(SESSIONS)
+    assert all(json.loads(line)['groups'] for line in lines)
+    assert capsys.readouterr().err == f"Wrote {len(SESSIONS)} plans\n"
+
+
+def test_write_ndjson_reports_invalid_plans():
+    errors = io.StringIO()
+    assert write_ndjson([{'title': 'x'}], io.StringIO(), errors) == 1
+    assert errors.getvalue().startswith('Session 1: ')
+
+
+@pytest.mark.parametrize('backend', plan_json.BACKENDS)
+def test_ndjson_lines_are_the_same_with_every_backend(monkeypatch, backend):
+    plans = list(stream_plans(SESSIONS))
+    monkeypatch.setattr(plan_json, 'BACKEND', backend)
+    out = io.StringIO()
+    write_ndjson(plans, out)
+    expected = [json.dumps(plan, ensure_ascii=False, separators=(',', ':')) for plan in plans]
+    assert out.getvalue().splitlines() == expected
@@ -0,0 +1,77 @@
+import datetime
+import io
+import random
+
+import pytest
+
+from conftest import make_plan, make_set
+from notes_generator import generate_notes
+from plan_archive import ordinal_date
+from training_load import LoadTimeline, week_start
+from training_plan_converter import TrainingPlanConverter
+from workout_metrics import group_metrics
+
+VMA = 15.0
+
+
+def _plans():
+    converter = TrainingPlanConverter()
+    return [converter.parse_training_notes(generate_notes(groups=1 + seed % 4, blocks=3, seed=seed))
+            for seed in range(12)]
+
+
+def test_rolling_windows_match_brute_force():
+    rng = random.Random(3)
+    plans = _plans()
+    base = datetime.date(2024, 3, 13).toordinal()
+    sessions = [(rng.choice(plans), ordinal_date(base + rng.randint(-60, 200))) for _ in range(150)]
+    timeline = LoadTimeline()
+    daily = {}
+    seen = set()
+    for plan, date in sessions:
+        added = timeline.add_session(plan, date)
+        assert added == ((id(plan), date) not in seen)
+        if not added:
+            continue
+        seen.add((id(plan), date))
+        ordinal = datetime.date.fromisoformat(date).toordinal()
+        for record in group_metrics([plan], VMA):
+            days = daily.setdefault(record['group'], {})
+            days[ordinal] = days.get(ordinal, 0.0) + record['load']
+
+    for title, days in daily.items():
+        arrays = timeline.daily_arrays(title, VMA)
+        assert int(arrays['date'][0]) == week_start(min(days))
+        for i, ordinal in enumerate(int(o) for o in arrays['date']):
+            acute = sum(days.get(ordinal - k, 0.0) for k in range(7))
+            chronic = sum(days.get(ordinal - k, 0.0) for k in range(28)) / 4
+            assert arrays['load'][i] == pytest.approx(days.get(ordinal, 0.0), rel=1e-5, abs=1e-4)
+            assert arrays['acute'][i] == pytest.approx(acute, rel=1e-5, abs=1e-4)
+            assert arrays['chronic'][i] == pytest.approx(chronic, rel=1e-5, abs=1e-4)
+
+
+def test_zero_percent_set_keeps_the_group_load():
+    sets = [make_set(4, distance=400, percent=100.0)]
+    with_zero = sets + [make_set(1, distance=1000, percent=0.0)]
+    plain, mixed = LoadTimeline(), LoadTimeline()
+    plain.add_session(make_plan(('G', [('B', sets, 0)])), '2026-10-12')
+    mixed.add_session(make_plan(('G', [('B', with_zero, 0)])), '2026-10-12')
+    [expected], [status] = plain.status(VMA), mixed.status(VMA)
+    assert expected['acute'] > 0
+    assert status['acute'] == expected['acute']
+    assert status['ratio'] == expected['ratio']
+
+
+def test_save_and_load_round_trip(tmp_path):
+    timeline = LoadTimeline()
+    for day, plan in enumerate(_plans()):
+        timeline.add_session(plan, ordinal_date(datetime.date(2026, 1, 5).toordinal() + 2 * day))
+    path = str(tmp_path / 'club.npz')
+    timeline.save(path)
+    reloaded = LoadTimeline.load(path)
+    for weekly in (False, True):
+        before, after = io.StringIO(), io.StringIO()
+        timeline.write_csv(before, VMA, weekly=weekly)
+        reloaded.write_csv(after, VMA, weekly=weekly)
+        assert before.getvalue() == after.getvalue()
+    assert reloaded.add_session(_plans()[0], '2026-01-05') is False
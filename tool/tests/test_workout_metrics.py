@@ -0,0 +1,41 @@
+import math
+
+import numpy as np
+import pytest
+
+from conftest import make_plan, make_set
+from workout_metrics import WorkoutMetrics, group_metrics
+
+
+def test_matches_hand_computed_values():
+    # 2 x 400m at 100% of 16 km/h: 90s each; 1 x 5' at 50%
+    plan = make_plan(('G', [('B', [make_set(2, distance=400, percent=100.0, recovery=60.0),
+                                  make_set(1, duration=300, percent=50.0, recovery=0.0)], 120)]))
+    [record] = group_metrics([plan], 16.0)
+    assert record['workSeconds'] == pytest.approx(2 * 90 + 300)
+    assert record['recoverySeconds'] == pytest.approx(2 * 60 + 120)
+    assert record['sessionSeconds'] == pytest.approx(480 + 240)
+    assert record['load'] == pytest.approx((180 * 1.0 + 300 * 0.25) / 36)
+
+
+def test_zero_percent_sets_do_not_turn_the_group_into_nan():
+    block = [
+        make_set(1, distance=1000, percent=0.0, recovery=0.0),
+        make_set(2, duration=120, percent=0.0, recovery=30.0),
+        make_set(2, distance=400, percent=100.0, recovery=60.0),
+    ]
+    [record] = group_metrics([make_plan(('G', [('B', block, 0)]))], 16.0)
+    assert all(math.isfinite(value) for key, value in record.items() if key not in ('plan', 'group'))
+    # The duration reps count without a pace, the 0% distance rep adds nothing
+    assert record['workSeconds'] == pytest.approx(2 * 120 + 2 * 90)
+    assert record['recoverySeconds'] == pytest.approx(2 * 30 + 2 * 60)
+    assert record['load'] == pytest.approx(2 * 90 / 36)
+
+
+def test_roster_matches_single_athlete_records(sample_plan):
+    vmas = [12.0, 16.0, 20.5]
+    values = WorkoutMetrics([sample_plan]).compute(vmas, dtype=np.float64)
+    for column, vma in enumerate(vmas):
+        for row, record in enumerate(group_metrics([sample_plan], vma)):
+            assert values['load'][row, column] == pytest.approx(record['load'])
+            assert values['session_seconds'][row, column] == pytest.approx(record['sessionSeconds'])
@@ -0,0 +1,450 @@
+# file: training_load.py
+"""Season-long training load per group, updated one session at a time.
+
+Every dated session adds, for each of its groups:
+
+- its load to a daily series, with the rolling 7-day (acute) and 28-day
+  (chronic) sums kept next to it. A session on the latest day touches one
+  entry of each; a back-dated one patches at most the 28 days after it, so
+  adding a session never walks the history;
+- its meters to the weekly volume of the intensity zone of each set.
+
+Loads are those of workout_metrics (a full hour at 100% VMA scores 100).
+They depend on the athlete's VMA as ``fixed + per_vma / VMA``, so both
+coefficients are summed and any VMA is applied when reading: the
+acute:chronic ratio is the 7-day load over the weekly average of the 28-day
+load. Sets without a %VMA add no load and no volume.
+
+The timeline is saved to one ``.npz`` file and reloaded to append new
+sessions, so a club's history is never re-read. Sessions come from plan JSON
+or NDJSON files, plan archives and notes files run through
+TrainingPlanConverter; dates are taken from ``YYYY-MM-DD`` in file names and
+from archive indexes. Sessions seen before (same date and plan) are skipped.
+
+Usage:
+    python training_load.py ingest club.npz plans/*.json season.vpa notes/2026-*.txt
+    python training_load.py status club.npz --vma 16
+    python training_load.py export club.npz --vma 16 -o load.csv
+    python training_load.py export club.npz --weekly -o volume.csv
+    python training_load.py benchmark --years 10
+"""
+import argparse
+import csv
+import datetime
+import hashlib
+import json
+import os
+import sys
+import time
+from array import array
+from typing import Any, Dict, IO, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+import plan_json
+from plan_archive import DATE_IN_NAME, NO_DATE, PlanArchive, date_ordinal, iter_plan_files, ordinal_date
+from workout_metrics import SetTable, WorkoutMetrics
+
+ACUTE_DAYS = 7
+CHRONIC_DAYS = 28
+# (name, lowest %VMA) of the intensity zones
+ZONES = (('endurance', 0.0), ('tempo', 80.0), ('threshold', 90.0), ('speed', 100.0))
+ZONE_BOUNDS = np.array([bound for _, bound in ZONES[1:]])
+DEFAULT_VMA = 16.0
+# Rounding left over when a session leaves a rolling sum
+_EPSILON = 1e-9
+STATE_VERSION = 1
+
+# Daily columns of a series: the day's load and its rolling sums, each as
+# the two coefficients of fixed + per_vma / VMA
+DAY_COLUMNS = ('daily_fixed', 'daily_per_vma', 'acute_fixed', 'acute_per_vma', 'chronic_fixed', 'chronic_per_vma')
+
+
+def week_start(ordinal: int) -> int:
+    """Ordinal of the Monday of the week holding ``ordinal``"""
+    return ordinal - datetime.date.fromordinal(ordinal).weekday()
+
+
+class LoadSeries:
+    """Daily load and weekly zone volume of one group, from its first week on"""
+
+    def __init__(self, start: int):
+        self.start = start
+        self.days: Dict[str, array] = {name: array('d') for name in DAY_COLUMNS}
+        self.weekly_meters: List[array] = [array('d') for _ in ZONES]
+        self.sessions = 0
+
+    def __len__(self) -> int:
+        return len(self.days['daily_fixed'])
+
+    def extend_to(self, ordinal: int):
+        """Grow the daily columns up to ``ordinal``, rolling the windows forward"""
+        days = self.days
+        daily_fixed, daily_per_vma = days['daily_fixed'], days['daily_per_vma']
+        acute_fixed, acute_per_vma = days['acute_fixed'], days['acute_per_vma']
+        chronic_fixed, chronic_per_vma = days['chronic_fixed'], days['chronic_per_vma']
+        for i in range(len(daily_fixed), ordinal - self.start + 1):
+            daily_fixed.append(0.0)
+            daily_per_vma.append(0.0)
+            # Each window moves one day: the oldest day leaves it
+            if i:
+                acute = (acute_fixed[i - 1], acute_per_vma[i - 1])
+                chronic = (chronic_fixed[i - 1], chronic_per_vma[i - 1])
+            else:
+                acute = chronic = (0.0, 0.0)
+            if i >= ACUTE_DAYS:
+                acute = (acute[0] - daily_fixed[i - ACUTE_DAYS], acute[1] - daily_per_vma[i - ACUTE_DAYS])
+            if i >= CHRONIC_DAYS:
+                chronic = (chronic[0] - daily_fixed[i - CHRONIC_DAYS], chronic[1] - daily_per_vma[i - CHRONIC_DAYS])
+            # Loads are never negative: what rounding leaves of an emptied window is zero
+            acute_fixed.append(acute[0] if acute[0] > _EPSILON else 0.0)
+            acute_per_vma.append(acute[1] if acute[1] > _EPSILON else 0.0)
+            chronic_fixed.append(chronic[0] if chronic[0] > _EPSILON else 0.0)
+            chronic_per_vma.append(chronic[1] if chronic[1] > _EPSILON else 0.0)
+        weeks = (ordinal - self.start) // 7 + 1
+        for column in self.weekly_meters:
+            column.extend([0.0] * (weeks - len(column)))
+
+    def _rebase(self, ordinal: int):
+        # A session older than the series: pad the front with empty weeks
+        start = week_start(ordinal)
+        days = self.start - start
+        for name, column in self.days.items():
+            self.days[name] = array('d', bytes(8 * days)) + column
+        self.weekly_meters = [array('d', bytes(8 * (days // 7))) + column for column in self.weekly_meters]
+        self.start = start
+
+    def add(self, ordinal: int, load_fixed: float, load_per_vma: float, zone_meters: Sequence[float]):
+        if ordinal < self.start:
+            self._rebase(ordinal)
+        self.extend_to(ordinal)
+        i = ordinal - self.start
+        days = self.days
+        days['daily_fixed'][i] += load_fixed
+        days['daily_per_vma'][i] += load_per_vma
+        end = len(self)
+        for j in range(i, min(i + ACUTE_DAYS, end)):
+            days['acute_fixed'][j] += load_fixed
+            days['acute_per_vma'][j] += load_per_vma
+        for j in range(i, min(i + CHRONIC_DAYS, end)):
+            days['chronic_fixed'][j] += load_fixed
+            days['chronic_per_vma'][j] += load_per_vma
+        week = i // 7
+        for column, meters in zip(self.weekly_meters, zone_meters):
+            column[week] += meters
+        self.sessions += 1
+
+    def column(self, name: str) -> np.ndarray:
+        """Zero-copy view of a daily column"""
+        return np.frombuffer(self.days[name], dtype=np.float64)
+
+
+def _at_vma(series: LoadSeries, window: str, vma: float) -> np.ndarray:
+    return series.column(f'{window}_fixed') + series.column(f'{window}_per_vma') / vma
+
+
+class LoadTimeline:
+    """Load series of every group title across a history of sessions"""
+
+    def __init__(self):
+        self.series: Dict[str, LoadSeries] = {}
+        self.last_day = NO_DATE
+        self.duplicates = 0
+        self.undated = 0
+        self._seen: Set[bytes] = set()
+
+    @property
+    def sessions(self) -> int:
+        return len(self._seen)
+
+    def add_session(self, plan: Dict[str, Any], date: Optional[str]) -> bool:
+        """Add one session; False when it has no date or was added before"""
+        return self.add_sessions([(plan, date)]) == 1
+
+    def add_sessions(self, sessions: Iterable[Tuple[Dict[str, Any], Optional[str]]], chunk_size: int = 512) -> int:
+        """Add (plan, ISO date) pairs, computing loads per chunk; returns the number added"""
+        added = 0
+        plans: List[Dict[str, Any]] = []
+        days: List[int] = []
+        for plan, date in sessions:
+            if not date:
+                self.undated += 1
+                continue
+            digest = hashlib.sha256(date.encode('ascii') + b'\0' + plan_json.dumps_compact(plan)).digest()[:16]
+            if digest in self._seen:
+                self.duplicates += 1
+                continue
+            self._seen.add(digest)
+            plans.append(plan)
+            days.append(date_ordinal(date))
+            if len(plans) == chunk_size:
+                added += self._add_chunk(plans, days)
+                plans, days = [], []
+        if plans:
+            added += self._add_chunk(plans, days)
+        return added
+
+    def _add_chunk(self, plans: List[Dict[str, Any]], days: List[int]) -> int:
+        table = SetTable(plans)
+        metrics = WorkoutMetrics(table)
+        # Sets without a %VMA already weigh nothing in WorkoutMetrics
+        load_fixed = metrics.load_fixed
+        load_per_vma = metrics.load_per_vma
+
+        zone = np.searchsorted(ZONE_BOUNDS, table.vma_percent, side='right')
+        meters = np.where(table.vma_percent > 0, table.repetitions * table.distance_meters, 0.0)
+        zone_meters = np.bincount(table.group_index * len(ZONES) + zone, weights=meters,
+                                  minlength=len(metrics.groups) * len(ZONES)).reshape(-1, len(ZONES))
+
+        for g, (plan_index, title) in enumerate(metrics.groups):
+            ordinal = days[plan_index]
+            series = self.series.get(title)
+            if series is None:
+                series = self.series[title] = LoadSeries(week_start(ordinal))
+            series.add(ordinal, float(load_fixed[g]), float(load_per_vma[g]), zone_meters[g].tolist())
+        self.last_day = max(self.last_day, max(days))
+        return len(plans)
+
+    def _extended(self, title: str) -> LoadSeries:
+        # Every series ends on the latest session day, so their windows line up
+        series = self.series[title]
+        series.extend_to(self.last_day)
+        return series
+
+    def daily_arrays(self, title: str, vma: float = DEFAULT_VMA) -> Dict[str, np.ndarray]:
+        """Per-day date ordinals, load, acute and chronic (weekly average) load and their ratio"""
+        series = self._extended(title)
+        acute = _at_vma(series, 'acute', vma)
+        chronic = _at_vma(series, 'chronic', vma) * (ACUTE_DAYS / CHRONIC_DAYS)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ratio = np.where(chronic > 0, acute / chronic, np.nan)
+        return {
+            'date': np.arange(series.start, series.start + len(series), dtype=np.int32),
+            'load': _at_vma(series, 'daily', vma).astype(np.float32),
+            'acute': acute.astype(np.float32),
+            'chronic': chronic.astype(np.float32),
+            'ratio': ratio.astype(np.float32),
+        }
+
+    def weekly_arrays(self, title: str) -> Dict[str, np.ndarray]:
+        """Monday ordinals and the meters run in each zone per week"""
+        series = self._extended(title)
+        weeks = len(series.weekly_meters[0])
+        arrays = {'week': np.arange(series.start, series.start + 7 * weeks, 7, dtype=np.int32)}
+        for (name, _), column in zip(ZONES, series.weekly_meters):
+            arrays[name] = np.frombuffer(column, dtype=np.float64).astype(np.float32)
+        return arrays
+
+    def status(self, vma: float = DEFAULT_VMA) -> List[Dict[str, Any]]:
+        """Acute and chronic load of every group on the latest session day"""
+        records = []
+        for title in sorted(self.series):
+            series = self._extended(title)
+            acute = _at_vma(series, 'acute', vma)[-1]
+            chronic = _at_vma(series, 'chronic', vma)[-1] * (ACUTE_DAYS / CHRONIC_DAYS)
+            records.append({
+                'group': title,
+                'sessions': series.sessions,
+                'acute': round(float(acute), 1),
+                'chronic': round(float(chronic), 1),
+                'ratio': round(float(acute / chronic), 2) if chronic > 0 else None,
+            })
+        return records
+
+    def write_csv(self, out: IO[str], vma: float = DEFAULT_VMA, weekly: bool = False,
+                  groups: Optional[Sequence[str]] = None):
+        """One row per group and day (or week with ``weekly``)"""
+        writer = csv.writer(out, lineterminator='\n')
+        titles = groups if groups is not None else sorted(self.series)
+        if weekly:
+            writer.writerow(['group', 'week'] + [f'{name}_m' for name, _ in ZONES])
+            for title in titles:
+                arrays = self.weekly_arrays(title)
+                columns = [arrays[name].tolist() for name, _ in ZONES]
+                for i, week in enumerate(arrays['week'].tolist()):
+                    writer.writerow([title, ordinal_date(week)] + [f'{column[i]:.0f}' for column in columns])
+            return
+
+        writer.writerow(['group', 'date', 'load', 'acute', 'chronic', 'ratio'])
+        for title in titles:
+            arrays = self.daily_arrays(title, vma)
+            load, acute, chronic, ratio = (arrays[name].tolist() for name in ('load', 'acute', 'chronic', 'ratio'))
+            for i, day in enumerate(arrays['date'].tolist()):
+                writer.writerow([title, ordinal_date(day), f'{load[i]:.1f}', f'{acute[i]:.1f}', f'{chronic[i]:.1f}',
+                                 f'{ratio[i]:.2f}' if ratio[i] == ratio[i] else ''])
+
+    def save(self, path: str):
+        titles = sorted(self.series)
+        meta = {
+            'version': STATE_VERSION,
+            'last_day': self.last_day,
+            'duplicates': self.duplicates,
+            'undated': self.undated,
+            'series': [{'title': t, 'start': self.series[t].start, 'sessions': self.series[t].sessions}
+                       for t in titles],
+        }
+        arrays = {'meta': np.frombuffer(json.dumps(meta, ensure_ascii=False).encode('utf-8'), dtype=np.uint8),
+                  'seen': np.frombuffer(b''.join(sorted(self._seen)), dtype=np.uint8)}
+        for i, title in enumerate(titles):
+            series = self.series[title]
+            for name, column in series.days.items():
+                arrays[f'{i}.{name}'] = np.frombuffer(column, dtype=np.float64)
+            arrays[f'{i}.weekly'] = np.array([np.frombuffer(c, dtype=np.float64) for c in series.weekly_meters])
+        # Written next to the target and renamed, so an interrupted save keeps the previous state
+        tmp_path = f"{path}.{os.getpid()}.tmp.npz"
+        np.savez_compressed(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str) -> 'LoadTimeline':
+        timeline = cls()
+        with np.load(path) as data:
+            meta = json.loads(data['meta'].tobytes())
+            if meta['version'] != STATE_VERSION:
+                raise ValueError(f"{path}: unsupported load timeline version {meta['version']}")
+            timeline.last_day = meta['last_day']
+            timeline.duplicates = meta['duplicates']
+            timeline.undated = meta['undated']
+            seen = data['seen'].tobytes()
+            timeline._seen = {seen[i:i + 16] for i in range(0, len(seen), 16)}
+            for i, entry in enumerate(meta['series']):
+                series = LoadSeries(entry['start'])
+                series.sessions = entry['sessions']
+                for name in DAY_COLUMNS:
+                    series.days[name] = array('d', data[f'{i}.{name}'].tobytes())
+                series.weekly_meters = [array('d', row.tobytes()) for row in data[f'{i}.weekly']]
+                timeline.series[entry['title']] = series
+        return timeline
+
+
+def iter_sessions(paths: Iterable[str]) -> Iterator[Tuple[Dict[str, Any], Optional[str]]]:
+    """(plan, date) of plan files, plan archives and notes files"""
+    converter = None
+    for path in paths:
+        if path.endswith('.vpa'):
+            with PlanArchive(path) as archive:
+                for index in range(len(archive)):
+                    yield archive.plan(index), archive.date(index)
+        elif path.endswith('.txt'):
+            if converter is None:
+                from training_plan_converter import TrainingPlanConverter
+                converter = TrainingPlanConverter()
+            with open(path, encoding='utf-8') as f:
+                plan = converter.parse_training_notes(f.read())
+            match = DATE_IN_NAME.search(os.path.basename(path))
+            yield plan, match.group(1) if match else None
+        else:
+            yield from iter_plan_files([path])
+
+
+def run_benchmark(years: int, sessions_per_week: int, groups: int) -> int:
+    from notes_generator import generate_notes
+    from training_plan_converter import TrainingPlanConverter
+
+    converter = TrainingPlanConverter()
+    plans = [converter.parse_training_notes(generate_notes(groups=groups, blocks=3, seed=seed)) for seed in range(64)]
+    first = datetime.date(2020, 1, 6).toordinal()
+    timeline = LoadTimeline()
+    per_year = []
+    session = 0
+    for year in range(years):
+        start = time.perf_counter()
+        count = 0
+        for week in range(52):
+            for day in range(sessions_per_week):
+                ordinal = first + (year * 52 + week) * 7 + day * 2
+                timeline.add_session(plans[session % len(plans)], ordinal_date(ordinal))
+                session += 1
+                count += 1
+        per_year.append((time.perf_counter() - start) / count)
+
+    start = time.perf_counter()
+    # Back-dated sessions patch at most the 28 days after them
+    for i in range(100):
+        timeline.add_session(plans[i % len(plans)], ordinal_date(first + 3 + 7 * i))
+    back_dated = (time.perf_counter() - start) / 100
+
+    print(f"{timeline.sessions} sessions over {years} years, {len(timeline.series)} groups")
+    print("  add_session, first year: "
+          f"{per_year[0] * 1e6:.0f}us, last year: {per_year[-1] * 1e6:.0f}us, back-dated: {back_dated * 1e6:.0f}us")
+
+    path = f"training_load_benchmark.{os.getpid()}.npz"
+    try:
+        start = time.perf_counter()
+        timeline.save(path)
+        saved = time.perf_counter()
+        LoadTimeline.load(path)
+        loaded = time.perf_counter()
+        size = os.path.getsize(path)
+    finally:
+        os.remove(path)
+    print(f"  state: {size / 1024:.1f} KB, save {(saved - start) * 1000:.1f}ms, load {(loaded - saved) * 1000:.1f}ms")
+
+    start = time.perf_counter()
+    for title in timeline.series:
+        timeline.daily_arrays(title)
+        timeline.weekly_arrays(title)
+    print(f"  export of every series as arrays: {(time.perf_counter() - start) * 1000:.1f}ms")
+    return 0
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Track weekly zone volume and acute:chronic load per group")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    ingest = commands.add_parser('ingest', help="Add dated sessions to a timeline file, creating it if needed")
+    ingest.add_argument('state')
+    ingest.add_argument('inputs', nargs='+', help="Plan JSON / NDJSON files, .vpa archives or .txt notes")
+
+    status = commands.add_parser('status', help="Print the latest acute:chronic ratio of every group")
+    status.add_argument('state')
+    status.add_argument('--vma', type=float, default=DEFAULT_VMA, help=f"Athlete VMA in km/h (default: {DEFAULT_VMA})")
+
+    export = commands.add_parser('export', help="Write daily load or weekly zone volume as CSV")
+    export.add_argument('state')
+    export.add_argument('--vma', type=float, default=DEFAULT_VMA, help=f"Athlete VMA in km/h (default: {DEFAULT_VMA})")
+    export.add_argument('--weekly', action='store_true', help="Weekly meters per intensity zone instead")
+    export.add_argument('--group', action='append', help="Only this group title (repeatable)")
+    export.add_argument('-o', '--output', default='-', help="CSV file (default: stdout)")
+
+    benchmark = commands.add_parser('benchmark', help="Time ingestion and export on a synthetic history")
+    benchmark.add_argument('--years', type=int, default=5)
+    benchmark.add_argument('--sessions-per-week', type=int, default=3)
+    benchmark.add_argument('--groups', type=int, default=4)
+    args = parser.parse_args(argv)
+
+    if args.command == 'benchmark':
+        return run_benchmark(args.years, args.sessions_per_week, args.groups)
+
+    if args.command == 'ingest':
+        timeline = LoadTimeline.load(args.state) if os.path.exists(args.state) else LoadTimeline()
+        duplicates, undated = timeline.duplicates, timeline.undated
+        start = time.perf_counter()
+        added = timeline.add_sessions(iter_sessions(args.inputs))
+        timeline.save(args.state)
+        print(f"Added {added} sessions ({timeline.duplicates - duplicates} already present, "
+              f"{timeline.undated - undated} without a date) in {time.perf_counter() - start:.2f}s; "
+              f"{timeline.sessions} sessions, {len(timeline.series)} groups up to {ordinal_date(timeline.last_day)}")
+        return 0
+
+    timeline = LoadTimeline.load(args.state)
+    if args.command == 'status':
+        for record in timeline.status(args.vma):
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    unknown = [title for title in args.group or () if title not in timeline.series]
+    if unknown:
+        print(f"Unknown group: {', '.join(unknown)}", file=sys.stderr)
+        return 2
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        timeline.write_csv(out, args.vma, weekly=args.weekly, groups=args.group)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
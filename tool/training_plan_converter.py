@@ -0,0 +1,367 @@
+# file: training_plan_converter.py
+"""Parsing and validation core of the notes converter, without the editor.
+
+Holds ``TrainingPlanConverter``, the validation and quick-fix helpers and the
+engine constants. It imports only the standard library and the parser
+modules next to it, so batch jobs, pool workers and scripts start in a few
+milliseconds; Streamlit and the JSON backends are loaded by the modules that
+need them. ``text_to_training_data`` re-exports these names and adds the
+editor. ``python startup_benchmark.py`` checks the import cost stays low.
+"""
+import re
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+from instrumentation import (
+    BLOCK_SPLIT, GROUP_SPLIT, INTERVAL_EXTRACTION, NULL_INSTRUMENTATION, RECOVERY_MATCHING,
+    VALIDATION, NullInstrumentation,
+)
+from notes_engine import GroupCallback, NotesGrammar, SinglePassNotesParser
+from notes_languages import Language
+from plan_model import RECOVERY_TYPES
+from plan_schema import validate_plan
+
+# Parsing engines selectable on TrainingPlanConverter
+ENGINE_LEGACY = 'legacy'
+ENGINE_SINGLE_PASS = 'single_pass'
+ENGINES = (ENGINE_LEGACY, ENGINE_SINGLE_PASS)
+
+# Bump whenever parsing output changes so cached plans are not reused
+CONVERTER_VERSION = '4'
+
+# Example session shown in the editor and used by main()
+SAMPLE_NOTES = """Avant  séance (20min)
+
+Échauffement 15' boucle habituelle + 3 gammes  
+
+Contenu de la séance (40 min)
+
+Bloc GROUPE 1  :
+
+Bloc 1
+
+-       3x 1200 75%-80%-85%
+
+2'30'' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+Bloc 2
+
+3'min pause sèche 
+
+-       3 x 800 90%
+
+2' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+Bloc 3 
+
+-       4 x 200 105%
+
+1' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+3'min pause sèche 
+
+Bloc GROUPE 2  :
+
+Bloc 1
+
+-       3x 1000 75%-80%-85%
+
+2'30'' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+Bloc 2
+
+3'min pause sèche 
+
+-       3 x 600 90%
+
+2' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+Bloc 3 
+
+-       4 x 100 105%
+
+1' actif (pour les plus en forme), marche ou trott entre chaque répétition 
+
+Retour au calme en footing lent autour de la piste dans le sens horlogique 5'
+
+Remarques supplémentaires : 
+
+Bien respecter les % de VMA très important."""
+
+
+class TrainingPlanConverter:
+    def __init__(self, engine: str = ENGINE_LEGACY, instrumentation: Optional[NullInstrumentation] = None,
+                 languages: Optional[Sequence[Language]] = None):
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown parsing engine: {engine} (expected one of {', '.join(ENGINES)})")
+        self.engine = engine
+        # Stage timings and regex counters; NULL_INSTRUMENTATION records nothing
+        self.instrumentation = instrumentation or NULL_INSTRUMENTATION
+        # French keywords unless other languages are given; the legacy engine reads French notes only
+        self.grammar = NotesGrammar(languages)
+        self.single_pass_parser = SinglePassNotesParser(self, self.grammar)
+
+    @property
+    def recovery_type_map(self) -> Dict[str, str]:
+        """Folded recovery phrase -> recovery type, in priority order"""
+        return self.grammar.recovery_types
+    
+    def parse_recovery_type(self, text: str) -> str:
+        return self.grammar.recovery_type(text)
+    
+    def parse_time_to_seconds(self, time_str: str) -> float:
+        time_str = time_str.replace('min', '').replace("'", '').replace('"', '').strip()
+        
+        if '’' in time_str:
+            parts = time_str.split('’')
+            if len(parts) == 2:
+                minutes = float(parts[0]) if parts[0] else 0
+                seconds = float(parts[1]) if parts[1] else 0
+                return minutes * 60 + seconds
+            else:
+                return float(parts[0]) * 60
+        else:
+            return float(time_str) * 60
+    
+    def parse_training_notes(self, text: str, on_group: Optional[GroupCallback] = None) -> Dict[str, Any]:
+        """Parse notes into a plan; ``on_group(index, group)`` is called as each group is parsed"""
+        if self.engine == ENGINE_SINGLE_PASS:
+            return self.single_pass_parser.parse(text, on_group)
+        return self.parse_training_notes_legacy(text, on_group)
+
+    def parse_training_notes_legacy(self, text: str, on_group: Optional[GroupCallback] = None) -> Dict[str, Any]:
+        warmup_match = re.search(r'Échauffement\s*(.+)', text)
+        warmup = warmup_match.group(1).strip() if warmup_match else "Échauffement 15' boucle habituelle + 3 gammes"
+        
+        cooldown_match = re.search(r'Retour au calme\s*(.+)', text)
+        cooldown = cooldown_match.group(1).strip() if cooldown_match else "Retour au calme en footing lent autour de la piste dans le sens horlogique 5'"
+        
+        remarks_match = re.search(r'Remarques supplémentaires\s*:\s*(.+)', text, re.DOTALL)
+        remarks = remarks_match.group(1).strip() if remarks_match else "Bien respecter les % de VMA très important."
+        
+        instrumentation = self.instrumentation
+        instrumented = instrumentation.enabled
+        groups = []
+
+        # Split by group sections
+        if instrumented:
+            start = time.perf_counter()
+        group_sections = re.split(r'Bloc GROUPE\s*(\d+)\s*:', text)
+        if instrumented:
+            instrumentation.add_time(GROUP_SPLIT, time.perf_counter() - start)
+            # The three section searches above and the split
+            instrumentation.count('regex_calls', 4)
+            instrumentation.count('regex_matches.group', len(group_sections) // 2)
+
+        for i in range(1, len(group_sections), 2):
+            if i + 1 < len(group_sections):
+                group_number = group_sections[i]
+                group_content = group_sections[i + 1]
+                
+                blocks = []
+                
+                # Better block splitting
+                if instrumented:
+                    start = time.perf_counter()
+                block_parts = re.split(r'(Bloc\s+\d+)', group_content)
+                if instrumented:
+                    instrumentation.add_time(BLOCK_SPLIT, time.perf_counter() - start)
+                    instrumentation.count('regex_calls')
+                    instrumentation.count('regex_matches.block', len(block_parts) // 2)
+
+                for j in range(1, len(block_parts), 2):
+                    if j + 1 < len(block_parts):
+                        block_title_match = re.search(r'Bloc\s+(\d+)', block_parts[j])
+                        if block_title_match:
+                            block_title = f"Bloc {block_title_match.group(1)}"
+                            block_content = block_parts[j + 1]
+
+                            if instrumented:
+                                start = time.perf_counter()
+                            # FIX: More flexible interval line pattern
+                            # Handles both "3x 1200" and "3 x 800" patterns
+                            interval_lines = re.findall(r'-\s*(\d+\s*x\s*\d+\s*[\d%-]+)', block_content)
+
+                            sets = []
+
+                            for line in interval_lines:
+                                sets.extend(self.parse_interval_set(line))
+                            if instrumented:
+                                instrumentation.add_time(INTERVAL_EXTRACTION, time.perf_counter() - start)
+                                # Title search, findall and one search per interval line
+                                instrumentation.count('regex_calls', 2 + len(interval_lines))
+                                instrumentation.count('regex_matches.set', len(interval_lines))
+                                instrumentation.count('sets', len(sets))
+                                start = time.perf_counter()
+
+                            # Parse recovery times for each set (matched atomically, like NotesGrammar.scanner)
+                            recovery_pattern = r"(?<!\d)(?=(\d+[''']?\d*))\1\s*(actif|pause sèche|marche|trott)"
+                            recovery_matches = list(re.finditer(recovery_pattern, block_content))
+                            
+                            for k, set_data in enumerate(sets):
+                                if k < len(recovery_matches):
+                                    match = recovery_matches[k]
+                                    time_str, recovery_type_str = match.groups()
+                                    set_data['recoverySeconds'] = self.parse_time_to_seconds(time_str)
+                                    set_data['recoveryType'] = self.parse_recovery_type(recovery_type_str)
+                            
+                            # Parse after-recovery for the entire block
+                            after_recovery_seconds = None
+                            after_recovery_type = 'rest'
+                            
+                            after_recovery_match = re.search(r"(?<!\d)(?=(\d+[''']?\d*))\1\s*(pause sèche)", block_content)
+                            if after_recovery_match:
+                                after_recovery_seconds = self.parse_time_to_seconds(after_recovery_match.group(1))
+                                after_recovery_type = self.parse_recovery_type(after_recovery_match.group(2))
+                            if instrumented:
+                                instrumentation.add_time(RECOVERY_MATCHING, time.perf_counter() - start)
+                                instrumentation.count('regex_calls', 2)
+                                instrumentation.count('regex_matches.recovery', len(recovery_matches))
+
+                            block_data = {
+                                'title': block_title,
+                                'sets': sets
+                            }
+                            
+                            if after_recovery_seconds:
+                                block_data['afterRecoverySeconds'] = after_recovery_seconds
+                                block_data['afterRecoveryType'] = after_recovery_type
+                            else:
+                                # Default after recovery
+                                block_data['afterRecoverySeconds'] = 180
+                                block_data['afterRecoveryType'] = 'rest'
+                            
+                            blocks.append(block_data)
+                
+                groups.append({
+                    'title': f'Groupe {group_number}',
+                    'blocks': blocks
+                })
+                if on_group is not None:
+                    on_group(len(groups) - 1, groups[-1])
+        
+        return {
+            'title': 'Mercredi (séance piste)',
+            'warmup': warmup,
+            'cooldown': cooldown,
+            'remarks': remarks,
+            'groups': groups
+        }
+
+    def parse_interval_set(self, text: str) -> List[Dict[str, Any]]:
+        # FIX: More flexible pattern that handles spaces around 'x'
+        pattern = r'(?<!\d)(\d+)\s*x\s*(\d+)\s+([\d%-]+)'
+        match = re.search(pattern, text)
+        
+        if match:
+            return self.build_sets(int(match.group(1)), int(match.group(2)), match.group(3))
+        
+        return []
+
+    def build_sets(self, repetitions: int, distance: int, percentages: str) -> List[Dict[str, Any]]:
+        """Expand one interval line into sets, one per percentage of a "75%-80%" run"""
+        sets = []
+        
+        if '-' in percentages:
+            percent_list = percentages.split('-')
+            if len(percent_list) > 1:
+                for percent in percent_list:
+                    percent_clean = percent.replace('%', '').strip()
+                    if percent_clean:
+                        sets.append({
+                            'repetitions': 1,
+                            'distanceMeters': distance,
+                            'vmaPercent': float(percent_clean),
+                            'recoverySeconds': 0,
+                            'recoveryType': 'active'
+                        })
+            else:
+                percent_clean = percent_list[0].replace('%', '').strip()
+                if percent_clean:
+                    sets.append({
+                        'repetitions': repetitions,
+                        'distanceMeters': distance,
+                        'vmaPercent': float(percent_clean),
+                        'recoverySeconds': 0,
+                        'recoveryType': 'active'
+                    })
+        else:
+            percent_clean = percentages.replace('%', '').strip()
+            # A lone "%" has no percentage: skip it like the empty parts of a run
+            if percent_clean:
+                sets.append({
+                    'repetitions': repetitions,
+                    'distanceMeters': distance,
+                    'vmaPercent': float(percent_clean),
+                    'recoverySeconds': 0,
+                    'recoveryType': 'active'
+                })
+        
+        return sets
+
+def validate_json_structure(data: Dict, instrumentation: Optional[NullInstrumentation] = None) -> List[str]:
+    """Validate the training plan against plan_schema and return error messages"""
+    if instrumentation is None or not instrumentation.enabled:
+        return [str(issue) for issue in validate_plan(data)]
+    with instrumentation.stage(VALIDATION):
+        errors = [str(issue) for issue in validate_plan(data)]
+    instrumentation.count('validation_issues', len(errors))
+    return errors
+
+def fix_recovery_types(data: Dict) -> int:
+    """Replace unknown recovery types with 'rest', in place; returns how many were replaced"""
+    fixed = 0
+    for group in data.get('groups', []):
+        for block in group.get('blocks', []):
+            for set_data in block.get('sets', []):
+                if set_data.get('recoveryType', 'rest') not in RECOVERY_TYPES:
+                    set_data['recoveryType'] = 'rest'
+                    fixed += 1
+            if 'afterRecoveryType' in block and block['afterRecoveryType'] not in RECOVERY_TYPES:
+                block['afterRecoveryType'] = 'rest'
+                fixed += 1
+    return fixed
+
+def add_missing_fields(data: Dict) -> int:
+    """Give sets without a recovery the defaults, in place; returns how many fields were added"""
+    added = 0
+    for group in data.get('groups', []):
+        for block in group.get('blocks', []):
+            for set_data in block.get('sets', []):
+                if 'recoveryType' not in set_data:
+                    set_data['recoveryType'] = 'rest'
+                    added += 1
+                if 'recoverySeconds' not in set_data:
+                    set_data['recoverySeconds'] = 60
+                    added += 1
+    return added
+
+def validate_json_structure_legacy(data: Dict) -> List[str]:
+    """Key-presence checks used before plan_schema, kept for comparison"""
+    errors = []
+    
+    required_top_level = ['title', 'warmup', 'cooldown', 'remarks', 'groups']
+    for field in required_top_level:
+        if field not in data:
+            errors.append(f"Missing required field: {field}")
+    
+    if 'groups' in data:
+        for i, group in enumerate(data['groups']):
+            if 'title' not in group:
+                errors.append(f"Group {i} missing title")
+            if 'blocks' not in group:
+                errors.append(f"Group {i} missing blocks")
+            else:
+                for j, block in enumerate(group['blocks']):
+                    if 'title' not in block:
+                        errors.append(f"Block {j} in group {i} missing title")
+                    if 'sets' not in block:
+                        errors.append(f"Block {j} in group {i} missing sets")
+                    else:
+                        for k, set_data in enumerate(block['sets']):
+                            set_required = ['repetitions', 'vmaPercent', 'recoverySeconds', 'recoveryType']
+                            for field in set_required:
+                                if field not in set_data:
+                                    errors.append(f"Set {k} in block {j}, group {i} missing {field}")
+    
+    return errors
@@ -0,0 +1,183 @@
+# file: workout_metrics.py
+"""Session cost of parsed plans for a whole roster, computed with NumPy.
+
+For each (plan, group) and each athlete VMA this gives the total work time,
+recovery time, session duration and an intensity-weighted load:
+
+- work: a distance rep takes ``distance / speed`` with ``speed = VMA * %VMA``,
+  a duration rep takes its duration;
+- recovery: ``recoverySeconds`` after every rep plus each block's
+  ``afterRecoverySeconds``;
+- load: work hours x (%VMA / 100)^2 x 100, a TSS-like score where a full
+  hour at 100% VMA scores 100.
+
+A set without a positive %VMA adds its duration reps to the work time but no
+load, and its distance reps, which have no pace, add nothing.
+
+Distance work scales with 1 / VMA, so every metric is ``a + b / VMA`` per
+group: sets are reduced to those two coefficients once, and the roster is
+applied with a single outer product.
+
+Usage:
+    python workout_metrics.py --archive-size 1000 --athletes 10000
+    python workout_metrics.py plan.json --vma 16
+"""
+import argparse
+import json
+import sys
+import time
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+
+from plan_model import TrainingPlan
+from plan_schema import EXAMPLE_PLAN
+
+# km/h * %VMA -> m/s: VMA * pct / 100 * 1000 / 3600
+_SPEED_FACTOR = 1 / 360
+
+
+class SetTable:
+    """Sets of many plans flattened into columns, one row per set"""
+
+    def __init__(self, plans: Sequence[Any]):
+        self.groups: List[Tuple[int, str]] = []
+        group_index: List[int] = []
+        repetitions: List[float] = []
+        distance: List[float] = []
+        duration: List[float] = []
+        vma_percent: List[float] = []
+        recovery: List[float] = []
+        after_recovery: List[float] = []
+
+        for plan_index, plan in enumerate(plans):
+            if isinstance(plan, TrainingPlan):
+                plan = plan.to_json()
+            for group in plan.get('groups', []):
+                current = len(self.groups)
+                self.groups.append((plan_index, group.get('title')))
+                group_after_recovery = 0.0
+                for block in group.get('blocks', []):
+                    group_after_recovery += block.get('afterRecoverySeconds') or 0
+                    for set_data in block.get('sets', []):
+                        group_index.append(current)
+                        repetitions.append(set_data.get('repetitions') or 0)
+                        distance.append(set_data.get('distanceMeters') or 0)
+                        duration.append(set_data.get('durationSeconds') or 0)
+                        vma_percent.append(set_data.get('vmaPercent') or 0)
+                        recovery.append(set_data.get('recoverySeconds') or 0)
+                after_recovery.append(group_after_recovery)
+
+        self.group_index = np.asarray(group_index, dtype=np.intp)
+        self.repetitions = np.asarray(repetitions, dtype=np.float64)
+        self.distance_meters = np.asarray(distance, dtype=np.float64)
+        self.duration_seconds = np.asarray(duration, dtype=np.float64)
+        self.vma_percent = np.asarray(vma_percent, dtype=np.float64)
+        self.recovery_seconds = np.asarray(recovery, dtype=np.float64)
+        self.after_recovery_seconds = np.asarray(after_recovery, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.group_index)
+
+
+class WorkoutMetrics:
+    """Per-group metric coefficients of an archive, evaluated for any roster.
+
+    Takes plans, or a SetTable already built from them.
+    """
+
+    def __init__(self, plans: Union[Sequence[Any], SetTable]):
+        table = plans if isinstance(plans, SetTable) else SetTable(plans)
+        self.groups = table.groups
+        n_groups = len(table.groups)
+
+        pct = table.vma_percent
+        has_pct = pct > 0
+        safe_pct = np.where(has_pct, pct, 1.0)
+        # Sets without a %VMA have no pace: no load, and no time for their distance
+        intensity = np.where(has_pct, (pct / 100) ** 2, 0.0)
+        # Seconds per rep at a VMA of 1 km/h; divide by the athlete VMA
+        distance_seconds = np.where(has_pct, table.distance_meters / (safe_pct * _SPEED_FACTOR), 0.0)
+
+        def per_group(values: np.ndarray) -> np.ndarray:
+            return np.bincount(table.group_index, weights=values, minlength=n_groups)
+
+        reps = table.repetitions
+        self.work_fixed = per_group(reps * table.duration_seconds)
+        self.work_per_vma = per_group(reps * distance_seconds)
+        self.recovery = per_group(reps * table.recovery_seconds) + table.after_recovery_seconds
+        # load = work seconds / 3600 * intensity * 100
+        self.load_fixed = per_group(reps * table.duration_seconds * intensity) / 36
+        self.load_per_vma = per_group(reps * distance_seconds * intensity) / 36
+
+    def compute(self, vmas: Sequence[float], dtype=np.float32) -> Dict[str, np.ndarray]:
+        """Metrics as (groups x athletes) arrays for the given VMAs in km/h"""
+        inverse_vma = (1 / np.asarray(vmas, dtype=np.float64)).astype(dtype)
+
+        work = np.multiply.outer(self.work_per_vma.astype(dtype), inverse_vma)
+        work += self.work_fixed.astype(dtype)[:, None]
+        load = np.multiply.outer(self.load_per_vma.astype(dtype), inverse_vma)
+        load += self.load_fixed.astype(dtype)[:, None]
+
+        recovery = np.broadcast_to(self.recovery.astype(dtype)[:, None], work.shape)
+        return {
+            'work_seconds': work,
+            'recovery_seconds': recovery,
+            'session_seconds': work + recovery,
+            'load': load,
+        }
+
+
+def group_metrics(plans: Sequence[Any], vma: float) -> List[Dict[str, Any]]:
+    """Metrics of every group for a single athlete, as plain records"""
+    metrics = WorkoutMetrics(plans)
+    values = metrics.compute([vma], dtype=np.float64)
+    return [
+        {
+            'plan': plan_index,
+            'group': title,
+            'workSeconds': float(values['work_seconds'][i, 0]),
+            'recoverySeconds': float(values['recovery_seconds'][i, 0]),
+            'sessionSeconds': float(values['session_seconds'][i, 0]),
+            'load': float(values['load'][i, 0]),
+        }
+        for i, (plan_index, title) in enumerate(metrics.groups)
+    ]
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Compute workout metrics for a roster")
+    parser.add_argument('plans', nargs='*', help="Plan JSON files (default: the bundled example)")
+    parser.add_argument('--vma', type=float, default=None, help="Print per-group metrics for one VMA")
+    parser.add_argument('--archive-size', type=int, default=1000, help="Benchmark archive size in plans")
+    parser.add_argument('--athletes', type=int, default=10000, help="Benchmark roster size")
+    args = parser.parse_args(argv)
+
+    paths = args.plans or [EXAMPLE_PLAN]
+    plans = []
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            plans.append(json.load(f))
+
+    if args.vma is not None:
+        for record in group_metrics(plans, args.vma):
+            print(json.dumps(record, ensure_ascii=False))
+        return 0
+
+    archive = [plans[i % len(plans)] for i in range(args.archive_size)]
+    vmas = np.random.default_rng(0).uniform(10, 22, args.athletes)
+
+    start = time.perf_counter()
+    metrics = WorkoutMetrics(archive)
+    prepared = time.perf_counter()
+    values = metrics.compute(vmas)
+    done = time.perf_counter()
+
+    print(f"{len(archive)} plans ({len(metrics.groups)} groups) x {len(vmas)} athletes")
+    print(f"  set table + coefficients: {prepared - start:.3f}s")
+    print(f"  roster evaluation:        {done - prepared:.3f}s ({values['load'].size:,} group-athlete cells)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())